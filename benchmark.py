@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Excel到MySQL数据导入工具 - 性能基准测试
+不需要连接数据库，用生成的宽表数据对比各处理步骤的耗时
+
+使用示例:
+  python benchmark.py clean_data --rows 50000 --columns 60
+  python benchmark.py convert_to_tuples --rows 50000 --columns 20
+  python benchmark.py read_projection --rows 20000 --columns 120
+  python benchmark.py engines --rows 50000 --columns 20
+  python benchmark.py engines --file data.xlsx --sheet Sheet1
+"""
+
+import argparse
+import logging
+import os
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+from excel_processor import ExcelProcessor
+from reader_engines import available_engines, select_engine
+
+def make_wide_frame(rows: int, columns: int, seed: int = 0) -> pd.DataFrame:
+    """生成宽表测试数据：一半字符串列（含空串和空白串），其余为数值列和日期列"""
+    rng = np.random.default_rng(seed)
+    data = {}
+    for i in range(columns):
+        kind = i % 4
+        if kind in (0, 1):
+            values = rng.choice(np.array(['北京', '上海', 'abc', '', '   ', None], dtype=object), size=rows)
+            data[f'text_{i}'] = values
+        elif kind == 2:
+            values = rng.normal(size=rows)
+            values[rng.random(rows) < 0.1] = np.nan
+            data[f'number_{i}'] = values
+        else:
+            data[f'date_{i}'] = pd.date_range('2024-01-01', periods=rows, freq='min')
+    return pd.DataFrame(data)
+
+def legacy_clean_data(df: pd.DataFrame) -> pd.DataFrame:
+    """旧版逐单元格清理实现，仅用于对比"""
+    cleaned_df = df.copy()
+    for column in cleaned_df.columns:
+        cleaned_df[column] = cleaned_df[column].replace('', None)
+        cleaned_df[column] = cleaned_df[column].apply(
+            lambda x: None if isinstance(x, str) and x.strip() == '' else x
+        )
+        cleaned_df[column] = cleaned_df[column].where(pd.notna(cleaned_df[column]), None)
+    return cleaned_df
+
+def legacy_convert_to_tuples(df: pd.DataFrame, columns: list) -> list:
+    """旧版iterrows逐行转换实现，仅用于对比"""
+    data_tuples = []
+    for _, row in df[columns].iterrows():
+        data_tuples.append(tuple(None if pd.isna(value) else value for value in row))
+    return data_tuples
+
+def timed(func, *args, repeat: int = 3) -> float:
+    """多次运行取最短耗时"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def bench_clean_data(args) -> bool:
+    """对比向量化clean_data与旧版实现"""
+    processor = ExcelProcessor()
+    df = make_wide_frame(args.rows, args.columns)
+    print(f"测试数据: {args.rows}行 x {args.columns}列")
+
+    # 先验证两种实现结果一致（数值列的NaN在转换为元组时统一变为None）
+    expected = legacy_clean_data(df)
+    actual = processor.clean_data(df.copy())
+    columns = list(df.columns)
+    if processor.convert_to_tuples(expected, columns) != processor.convert_to_tuples(actual, columns):
+        print("❌ 清理结果与旧版实现不一致")
+        return False
+
+    legacy_seconds = timed(legacy_clean_data, df, repeat=args.repeat)
+    vectorized_seconds = timed(lambda: processor.clean_data(df.copy()), repeat=args.repeat)
+    copy_seconds = timed(df.copy, repeat=args.repeat)
+    vectorized_seconds = max(vectorized_seconds - copy_seconds, 1e-9)
+
+    print(f"旧版实现:   {legacy_seconds:.4f}s")
+    print(f"向量化实现: {vectorized_seconds:.4f}s")
+    print(f"加速比:     {legacy_seconds / vectorized_seconds:.1f}x")
+    return True
+
+def bench_convert_to_tuples(args) -> bool:
+    """对比按列转换与旧版iterrows实现"""
+    processor = ExcelProcessor()
+    df = processor.clean_data(make_wide_frame(args.rows, args.columns))
+    columns = list(df.columns)
+    print(f"测试数据: {args.rows}行 x {args.columns}列")
+
+    if legacy_convert_to_tuples(df, columns) != processor.convert_to_tuples(df, columns):
+        print("❌ 转换结果与旧版实现不一致")
+        return False
+
+    legacy_seconds = timed(legacy_convert_to_tuples, df, columns, repeat=args.repeat)
+    columnar_seconds = timed(processor.convert_to_tuples, df, columns, repeat=args.repeat)
+
+    print(f"旧版实现: {legacy_seconds:.4f}s")
+    print(f"按列转换: {columnar_seconds:.4f}s")
+    print(f"加速比:   {legacy_seconds / columnar_seconds:.1f}x")
+    return True
+
+def bench_read_projection(args) -> bool:
+    """对比读取宽表的全部列与只读取表中需要的8列"""
+    processor = ExcelProcessor()
+    df = make_wide_frame(args.rows, args.columns)
+    temp_file = tempfile.NamedTemporaryFile(suffix='.xlsx', delete=False)
+    temp_file.close()
+    try:
+        df.to_excel(temp_file.name, index=False)
+        table_structure = {column: 'varchar(50)' for column in list(df.columns)[:8]}
+        print(f"测试数据: {args.rows}行 x {args.columns}列，表中需要{len(table_structure)}列")
+        
+        def process(structure):
+            for chunk in processor.read_excel_chunks(temp_file.name, table_structure=structure):
+                cleaned = processor.clean_data(chunk)
+                for _ in processor.iter_tuple_batches(cleaned, list(cleaned.columns)):
+                    pass
+        
+        full_seconds = timed(process, None, repeat=args.repeat)
+        projected_seconds = timed(process, table_structure, repeat=args.repeat)
+    finally:
+        os.unlink(temp_file.name)
+    
+    print(f"读取全部列: {full_seconds:.4f}s")
+    print(f"列投影:     {projected_seconds:.4f}s")
+    print(f"加速比:     {full_seconds / projected_seconds:.1f}x")
+    return True
+
+def select_engine_or_none(file_path: str, engine: str):
+    """引擎不支持该文件时返回None"""
+    try:
+        return select_engine(file_path, engine)
+    except ValueError:
+        return None
+
+def bench_engines(args) -> bool:
+    """对比已安装的各读取引擎流式读取同一个文件的耗时"""
+    processor = ExcelProcessor()
+    file_path = args.file
+    if not file_path:
+        temp_file = tempfile.NamedTemporaryFile(suffix='.xlsx', delete=False)
+        temp_file.close()
+        file_path = temp_file.name
+        make_wide_frame(args.rows, args.columns).to_excel(file_path, index=False)
+        print(f"测试数据: {args.rows}行 x {args.columns}列")
+    else:
+        print(f"测试文件: {file_path}")
+    
+    try:
+        engines = [name for name in available_engines() if select_engine_or_none(file_path, name)]
+        if not engines:
+            print("没有支持该文件类型的读取引擎")
+            return False
+        
+        def process(engine):
+            for _ in processor.read_excel_chunks(file_path, args.sheet, engine=engine):
+                pass
+        
+        results = {engine: timed(process, engine, repeat=args.repeat) for engine in engines}
+        # 自动选择按文件大小判断，需要在删除临时文件之前进行
+        auto = select_engine(file_path)
+    finally:
+        if not args.file:
+            os.unlink(file_path)
+    
+    baseline = results.get('openpyxl')
+    for engine, seconds in results.items():
+        speedup = f"  ({baseline / seconds:.1f}x)" if baseline else ''
+        print(f"{engine:<10}{seconds:.4f}s{speedup}")
+    print(f"自动选择: {auto.name if auto else 'pandas'}")
+    return True
+
+BENCHMARKS = {
+    'clean_data': bench_clean_data,
+    'convert_to_tuples': bench_convert_to_tuples,
+    'read_projection': bench_read_projection,
+    'engines': bench_engines,
+}
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description='Excel到MySQL导入性能基准测试')
+    parser.add_argument('benchmark', choices=sorted(BENCHMARKS), help='要运行的基准测试')
+    parser.add_argument('--rows', type=int, default=50000, help='测试数据行数')
+    parser.add_argument('--columns', type=int, default=60, help='测试数据列数')
+    parser.add_argument('--repeat', type=int, default=3, help='重复次数，取最短耗时')
+    parser.add_argument('--file', help='engines使用的Excel文件（不指定时生成测试数据）')
+    parser.add_argument('--sheet', help='engines读取的工作表名称')
+    args = parser.parse_args()
+
+    # 基准测试时不输出处理过程日志
+    logging.disable(logging.INFO)
+    if not BENCHMARKS[args.benchmark](args):
+        raise SystemExit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,525 @@
+import datetime
+import decimal
+import logging
+import math
+import os
+import queue
+import tempfile
+import threading
+import time
+from typing import Any, Dict, List, Optional
+from config import Config
+
+LOAD_METHODS = ('auto', 'insert', 'load_data')
+
+# append追加，replace写入临时表后整表替换（见table_swap），upsert按主键或唯一索引插入或更新，
+# delta在upsert的基础上跳过内容没有变化的行（见delta_index）
+IMPORT_MODES = ('append', 'replace', 'upsert', 'delta')
+
+# 按十六进制写入LOAD DATA临时文件、加载时用UNHEX还原的列类型
+BINARY_TYPES = ('binary', 'varbinary', 'tinyblob', 'blob', 'mediumblob', 'longblob')
+
+# LOAD DATA默认转义规则下需要转义的字符
+_TSV_ESCAPES = str.maketrans({
+    '\\': '\\\\',
+    '\t': '\\t',
+    '\n': '\\n',
+    '\r': '\\r',
+    '\0': '\\0'
+})
+
+class BulkInserter:
+    """
+    批量插入器：按估算字节数和max_allowed_packet分批，在显式事务中写入，并根据往返耗时自适应调整批大小；
+    指定update_columns时使用INSERT ... ON DUPLICATE KEY UPDATE，键冲突的行更新这些列
+    """
+
+    SAMPLE_ROWS = 20  # 估算每行字节数时抽样的行数
+
+    def __init__(self, db_manager, table_name: str, columns: List[str],
+                 batch_size: int = Config.DB_BATCH_SIZE,
+                 commit_every: int = Config.DB_COMMIT_EVERY,
+                 target_seconds: float = Config.DB_TARGET_BATCH_SECONDS,
+                 update_columns: Optional[List[str]] = None):
+        """
+        Args:
+            db_manager: 已连接的DatabaseManager
+            table_name: 表名
+            columns: 列名列表
+            batch_size: 初始每批行数
+            commit_every: 每N批提交一次，0表示所有数据在一个事务中提交
+            target_seconds: 每批的目标往返耗时，据此调整批大小
+            update_columns: 键冲突时更新的列（可选），None表示普通INSERT
+        """
+        self.db_manager = db_manager
+        self.connection = db_manager.connection
+        self.table_name = table_name
+        if update_columns is None:
+            self.sql = db_manager.build_insert_sql(table_name, columns)
+        else:
+            self.sql = db_manager.build_upsert_sql(table_name, columns, update_columns)
+        self.batch_size = max(1, batch_size)
+        self.commit_every = commit_every
+        self.target_seconds = target_seconds
+        self.logger = logging.getLogger(__name__)
+
+        # 单条语句的字节上限，留出余量给协议头
+        packet_limit = db_manager.get_max_allowed_packet() - 1024
+        self.max_statement_bytes = max(64 * 1024, min(packet_limit, Config.DB_MAX_STATEMENT_BYTES))
+
+        self.buffer: List[tuple] = []
+        self.row_bytes = 0  # 估算的单行最大字节数
+        self.rows_inserted = 0  # 已发送到服务器的行数
+        self.rows_committed = 0  # 已提交的行数
+        self.batches_since_commit = 0
+        self.in_transaction = False
+
+    def insert(self, rows: List[tuple]) -> bool:
+        """写入一批数据，缓冲到当前批大小后发送"""
+        self.buffer.extend(rows)
+        while self.buffer and len(self.buffer) >= self._batch_rows():
+            batch_rows = self._batch_rows()
+            batch = self.buffer[:batch_rows]
+            del self.buffer[:batch_rows]
+            if not self._execute_batch(batch):
+                return False
+        return True
+
+    def flush(self) -> bool:
+        """发送缓冲中的剩余数据，不提交"""
+        if self.buffer:
+            batch, self.buffer = self.buffer, []
+            return self._execute_batch(batch)
+        return True
+
+    def finish(self) -> bool:
+        """发送剩余数据并提交事务"""
+        return self.flush() and self._commit()
+
+    def abort(self):
+        """回滚未提交的数据"""
+        self.buffer = []
+        if self.in_transaction:
+            try:
+                self.connection.rollback()
+                self.logger.warning(f"已回滚未提交的{self.rows_inserted - self.rows_committed}条记录")
+            except Exception as e:
+                self.logger.error(f"回滚事务失败: {e}")
+            self.in_transaction = False
+        self.rows_inserted = self.rows_committed
+
+    def _batch_rows(self) -> int:
+        """当前每批行数，不超过语句字节上限能容纳的行数"""
+        self._estimate_row_bytes(self.buffer)
+        if self.row_bytes:
+            return max(1, min(self.batch_size, self.max_statement_bytes // self.row_bytes))
+        return self.batch_size
+
+    def _estimate_row_bytes(self, rows: List[tuple]):
+        """抽样估算编码后的单行字节数，只增不减以保证不超过上限"""
+        if not rows:
+            return
+        step = max(1, len(rows) // self.SAMPLE_ROWS)
+        for row in rows[::step][:self.SAMPLE_ROWS]:
+            size = 3 + sum(self._value_bytes(value) for value in row)
+            # 转义可能使字符串变长，保留20%余量
+            self.row_bytes = max(self.row_bytes, int(size * 1.2))
+
+    def _value_bytes(self, value: Any) -> int:
+        """估算单个值在SQL语句中的字节数"""
+        if value is None:
+            return 5
+        if isinstance(value, str):
+            return len(value.encode('utf-8')) + 3
+        if isinstance(value, (bytes, bytearray)):
+            return 2 * len(value) + 4
+        return len(str(value)) + 3
+
+    def _execute_batch(self, batch: List[tuple]) -> bool:
+        """在事务中发送一批数据，失败时回滚"""
+        try:
+            if not self.in_transaction:
+                self.connection.begin()
+                self.in_transaction = True
+            start = time.perf_counter()
+            with self.connection.cursor() as cursor:
+                # pymysql会按该长度把多行INSERT拆成多条语句
+                cursor.max_stmt_length = self.max_statement_bytes
+                cursor.executemany(self.sql, batch)
+            elapsed = time.perf_counter() - start
+        except Exception as e:
+            self.logger.error(f"批量插入失败: {e}")
+            self.abort()
+            return False
+
+        self.rows_inserted += len(batch)
+        self.batches_since_commit += 1
+        self.logger.info(f"批量插入{len(batch)}条记录到表 '{self.table_name}'，耗时{elapsed:.3f}s")
+        self._adapt_batch_size(len(batch), elapsed)
+
+        if self.commit_every > 0 and self.batches_since_commit >= self.commit_every:
+            return self._commit()
+        return True
+
+    def _adapt_batch_size(self, batch_rows: int, elapsed: float):
+        """根据本批往返耗时调整批大小：过快则加倍，过慢则减半"""
+        if self.target_seconds <= 0 or batch_rows < self.batch_size:
+            return
+        if elapsed < self.target_seconds / 2:
+            limit = self.max_statement_bytes // self.row_bytes if self.row_bytes else self.batch_size * 2
+            self.batch_size = max(self.batch_size, min(self.batch_size * 2, limit))
+        elif elapsed > self.target_seconds * 2:
+            self.batch_size = max(1, self.batch_size // 2)
+
+    def _commit(self) -> bool:
+        """提交当前事务"""
+        if not self.in_transaction:
+            return True
+        try:
+            self.connection.commit()
+        except Exception as e:
+            self.logger.error(f"提交事务失败: {e}")
+            self.abort()
+            return False
+        self.in_transaction = False
+        self.batches_since_commit = 0
+        self.rows_committed = self.rows_inserted
+        self.logger.info(f"事务已提交，累计提交{self.rows_committed}条记录")
+        return True
+
+class LoadDataInserter:
+    """LOAD DATA LOCAL INFILE批量导入器：把行转换为转义后的TSV写入临时文件，按段交给MySQL原生加载"""
+
+    def __init__(self, db_manager, table_name: str, columns: List[str],
+                 segment_bytes: int = Config.DB_LOAD_DATA_SEGMENT_BYTES,
+                 binary_columns: Optional[List[str]] = None):
+        """
+        Args:
+            db_manager: 已连接的DatabaseManager（连接需开启local_infile）
+            table_name: 表名
+            columns: 列名列表
+            segment_bytes: 临时文件达到该大小时执行一次LOAD DATA，内存和磁盘占用与总行数无关
+            binary_columns: 二进制列，不指定时按表结构中的BINARY_TYPES确定
+        """
+        self.db_manager = db_manager
+        self.connection = db_manager.connection
+        self.table_name = table_name
+        self.columns = list(columns)
+        self.segment_bytes = segment_bytes
+        self.logger = logging.getLogger(__name__)
+
+        if binary_columns is None:
+            table_structure = db_manager.get_table_structure(table_name)
+            binary_columns = [col for col in self.columns
+                              if table_structure.get(col, '').split('(')[0].lower() in BINARY_TYPES]
+        # 二进制列不能作为utf8mb4文本加载，按十六进制写入用户变量，再用UNHEX还原
+        self.binary = [col in binary_columns for col in self.columns]
+        targets = [f"@v{index}" if binary else f"`{col}`"
+                   for index, (col, binary) in enumerate(zip(self.columns, self.binary))]
+        self.sql = (
+            f"LOAD DATA LOCAL INFILE %s INTO TABLE `{table_name}` "
+            f"CHARACTER SET utf8mb4 "
+            f"FIELDS TERMINATED BY '\\t' ESCAPED BY '\\\\' "
+            f"LINES TERMINATED BY '\\n' ({', '.join(targets)})"
+        )
+        if any(self.binary):
+            self.sql += " SET " + ', '.join(f"`{col}` = UNHEX(@v{index})"
+                                            for index, (col, binary) in enumerate(zip(self.columns, self.binary))
+                                            if binary)
+
+        self.segment = None
+        self.segment_rows = 0
+        self.rows_written = 0  # 已写入临时文件的行数
+        self.rows_inserted = 0  # 服务器已加载的行数
+        self.rows_committed = 0
+        self.in_transaction = False
+
+    def insert(self, rows: List[tuple]) -> bool:
+        """把一批数据写入当前段，段文件足够大时加载到数据库"""
+        try:
+            if self.segment is None:
+                self.segment = tempfile.NamedTemporaryFile(
+                    mode='w', encoding='utf-8', newline='', suffix='.tsv', delete=False
+                )
+            if any(self.binary):
+                self.segment.writelines(
+                    '\t'.join([format_tsv_hex(value) if binary else format_tsv_value(value)
+                               for value, binary in zip(row, self.binary)]) + '\n' for row in rows
+                )
+            else:
+                self.segment.writelines(
+                    '\t'.join([format_tsv_value(value) for value in row]) + '\n' for row in rows
+                )
+            self.segment_rows += len(rows)
+            self.rows_written += len(rows)
+        except Exception as e:
+            self.logger.error(f"写入LOAD DATA临时文件失败: {e}")
+            self.abort()
+            return False
+
+        if self.segment.tell() >= self.segment_bytes:
+            return self._load_segment()
+        return True
+
+    def flush(self) -> bool:
+        """加载当前段中的剩余数据，不提交"""
+        if self.segment is not None and self.segment_rows and not self._load_segment():
+            return False
+        self._remove_segment()
+        return True
+
+    def finish(self) -> bool:
+        """加载剩余数据并提交事务"""
+        if not self.flush():
+            return False
+        if not self.in_transaction:
+            return True
+        try:
+            self.connection.commit()
+        except Exception as e:
+            self.logger.error(f"提交事务失败: {e}")
+            self.abort()
+            return False
+        self.in_transaction = False
+        self.rows_committed = self.rows_inserted
+        self.logger.info(f"LOAD DATA事务已提交，共{self.rows_committed}条记录")
+        return True
+
+    def abort(self):
+        """回滚未提交的数据并删除临时文件"""
+        self._remove_segment()
+        if self.in_transaction:
+            try:
+                self.connection.rollback()
+                self.logger.warning(f"已回滚未提交的{self.rows_inserted}条记录")
+            except Exception as e:
+                self.logger.error(f"回滚事务失败: {e}")
+            self.in_transaction = False
+        self.rows_inserted = self.rows_committed
+
+    def _load_segment(self) -> bool:
+        """把当前段文件交给LOAD DATA LOCAL INFILE加载"""
+        self.segment.close()
+        expected_rows = self.segment_rows
+        try:
+            if not self.in_transaction:
+                self.connection.begin()
+                self.in_transaction = True
+            start = time.perf_counter()
+            with self.connection.cursor() as cursor:
+                loaded_rows = cursor.execute(self.sql, (self.segment.name,))
+            elapsed = time.perf_counter() - start
+            self._log_warnings(expected_rows, loaded_rows)
+        except Exception as e:
+            self.logger.error(f"LOAD DATA加载失败: {e}")
+            self.abort()
+            return False
+        finally:
+            self._remove_segment()
+
+        self.rows_inserted += loaded_rows
+        self.logger.info(f"LOAD DATA加载{loaded_rows}条记录到表 '{self.table_name}'，耗时{elapsed:.3f}s")
+        return True
+
+    def _log_warnings(self, expected_rows: int, loaded_rows: int):
+        """LOCAL模式下数据错误只会产生警告，记录下来便于排查"""
+        if loaded_rows != expected_rows:
+            self.logger.warning(f"LOAD DATA写入{expected_rows}行，实际加载{loaded_rows}行")
+        try:
+            warnings = self.connection.show_warnings()
+        except Exception:
+            return
+        if warnings:
+            self.logger.warning(f"LOAD DATA产生{len(warnings)}条警告，前5条: {list(warnings[:5])}")
+
+    def _remove_segment(self):
+        """删除当前段的临时文件"""
+        if self.segment is None:
+            return
+        try:
+            self.segment.close()
+            os.unlink(self.segment.name)
+        except OSError:
+            pass
+        self.segment = None
+        self.segment_rows = 0
+
+_FLUSH = object()  # 通知分区写完缓冲中的剩余数据后结束
+
+class ParallelInserter:
+    """
+    多连接并行插入器：一次导入的数据分成多个分区，每个分区在自己的连接和事务中写入，
+    InnoDB可以同时使用多个写入线程
+
+    insert把每批数据放入有界队列，空闲的分区取走下一批，较慢的连接自然少分到数据；
+    队列满时insert阻塞（背压）。
+    原子性：各分区的事务在所有分区都写完之后才依次提交（commit_every为0时），写入阶段任一分区失败则全部回滚；
+    只有提交阶段某个分区的COMMIT本身失败时才会部分提交，manifest中记录每个分区的状态和已提交行数，
+    需要完全原子时使用临时表导入后再切换
+    """
+
+    POLL_SECONDS = 0.1  # 等待队列时检查失败和停止标记的间隔
+
+    def __init__(self, db_managers: List[Any], table_name: str, columns: List[str],
+                 load_method: str = 'insert', queue_size: int = Config.PIPELINE_QUEUE_SIZE):
+        """
+        Args:
+            db_managers: 已连接的DatabaseManager列表，每个对应一个分区
+            table_name: 表名
+            columns: 列名列表
+            load_method: 每个分区的导入方式，同create_inserter
+            queue_size: 等待分区写入的批次数上限
+        """
+        self.table_name = table_name
+        self.logger = logging.getLogger(__name__)
+        self.partitions = [create_inserter(db_manager, table_name, columns, load_method)
+                           for db_manager in db_managers]
+        self.states = ['writing'] * len(self.partitions)  # writing、committed、rolled_back 或 failed
+        self._queue: queue.Queue = queue.Queue(maxsize=max(1, queue_size))
+        self._failed = threading.Event()
+        self._stopped = threading.Event()
+        self._threads = [
+            threading.Thread(target=self._run, args=(index,), name=f"insert-{table_name}-{index}", daemon=True)
+            for index in range(len(self.partitions))
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    @property
+    def rows_inserted(self) -> int:
+        return sum(partition.rows_inserted for partition in self.partitions)
+
+    @property
+    def rows_committed(self) -> int:
+        return sum(partition.rows_committed for partition in self.partitions)
+
+    def insert(self, rows: List[tuple]) -> bool:
+        """把一批数据交给空闲的分区，某个分区已失败时回滚所有分区并返回False"""
+        if self._put(rows):
+            return True
+        self.abort()
+        return False
+
+    def finish(self) -> bool:
+        """等待所有分区写完剩余数据，全部成功后依次提交；写入阶段有分区失败时全部回滚"""
+        for _ in self._threads:
+            if not self._put(_FLUSH):
+                break
+        for thread in self._threads:
+            thread.join()
+        if self._failed.is_set():
+            self.abort()
+            return False
+
+        for index, partition in enumerate(self.partitions):
+            if not partition.finish():
+                self.states[index] = 'failed'
+                self.logger.error(f"分区{index}提交失败，之前的{index}个分区已提交: {self.manifest()}")
+                self.abort()
+                return False
+            self.states[index] = 'committed'
+        self.logger.info(f"{len(self.partitions)}个分区均已提交，共{self.rows_committed}条记录")
+        return True
+
+    def abort(self):
+        """停止所有分区，回滚尚未提交的分区"""
+        self._stopped.set()
+        while True:
+            try:
+                self._queue.get_nowait()
+            except queue.Empty:
+                break
+        for thread in self._threads:
+            thread.join()
+        for index, partition in enumerate(self.partitions):
+            if self.states[index] == 'committed':
+                continue
+            partition.abort()
+            if self.states[index] == 'writing':
+                self.states[index] = 'rolled_back'
+
+    def manifest(self) -> List[Dict[str, Any]]:
+        """每个分区的状态、写入行数和已提交行数"""
+        return [
+            {'partition': index, 'status': self.states[index],
+             'rows_inserted': partition.rows_inserted, 'rows_committed': partition.rows_committed}
+            for index, partition in enumerate(self.partitions)
+        ]
+
+    def _put(self, item: Any) -> bool:
+        """放入队列，队列满时等待；有分区失败或已停止时返回False"""
+        while not (self._failed.is_set() or self._stopped.is_set()):
+            try:
+                self._queue.put(item, timeout=self.POLL_SECONDS)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _run(self, index: int):
+        """分区的写入线程：从队列取出批次在本分区的连接上写入，收到结束标记时写完缓冲后退出"""
+        partition = self.partitions[index]
+        while not self._stopped.is_set():
+            try:
+                item = self._queue.get(timeout=self.POLL_SECONDS)
+            except queue.Empty:
+                continue
+            if item is _FLUSH:
+                if not partition.flush():
+                    self._fail_partition(index)
+                return
+            if not partition.insert(item):
+                self._fail_partition(index)
+                return
+
+    def _fail_partition(self, index: int):
+        """记录分区失败（分区的插入器已回滚自己的事务），通知其他分区停止"""
+        self.states[index] = 'failed'
+        self._failed.set()
+        self._stopped.set()
+        self.logger.error(f"表 '{self.table_name}' 的分区{index}写入失败，停止所有分区")
+
+def format_tsv_value(value: Any) -> str:
+    """把Python值转换为LOAD DATA默认格式的TSV字段，None、NaN和正负无穷转换为\\N"""
+    if value is None:
+        return '\\N'
+    if isinstance(value, str):
+        return value.translate(_TSV_ESCAPES)
+    if isinstance(value, bool):
+        return '1' if value else '0'
+    if isinstance(value, int):
+        return str(value)
+    if isinstance(value, float):
+        # MySQL的数值列不能保存NaN和正负无穷
+        return repr(value) if math.isfinite(value) else '\\N'
+    if isinstance(value, decimal.Decimal):
+        # 避免科学计数法
+        return format(value, 'f')
+    if isinstance(value, datetime.datetime):
+        text = value.strftime('%Y-%m-%d %H:%M:%S')
+        return f"{text}.{value.microsecond:06d}" if value.microsecond else text
+    if isinstance(value, datetime.date):
+        return value.strftime('%Y-%m-%d')
+    if isinstance(value, (bytes, bytearray)):
+        # 二进制列由format_tsv_hex写入；文本列中的bytes不是合法的UTF-8时报错，不替换成别的字符
+        return bytes(value).decode('utf-8').translate(_TSV_ESCAPES)
+    return str(value).translate(_TSV_ESCAPES)
+
+def format_tsv_hex(value: Any) -> str:
+    """把二进制列的值转换为十六进制TSV字段（加载时用UNHEX还原），文本按UTF-8编码，None转换为\\N"""
+    if isinstance(value, (bytes, bytearray)):
+        return bytes(value).hex()
+    if isinstance(value, str):
+        return value.encode('utf-8').hex()
+    text = format_tsv_value(value)
+    return text if text == '\\N' else text.encode('utf-8').hex()
+
+def create_inserter(db_manager, table_name: str, columns: List[str], load_method: str = 'insert',
+                    update_columns: Optional[List[str]] = None):
+    """
+    按导入方式创建插入器，load_data使用LOAD DATA LOCAL INFILE，其余使用批量INSERT；
+    指定update_columns时使用INSERT ... ON DUPLICATE KEY UPDATE（LOAD DATA不支持按列更新）
+    """
+    if load_method == 'load_data' and update_columns is None:
+        return LoadDataInserter(db_manager, table_name, columns)
+    return BulkInserter(db_manager, table_name, columns, update_columns=update_columns)
@@ -0,0 +1,160 @@
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+from config import Config
+
+ISOLATION_LEVELS = ('READ UNCOMMITTED', 'READ COMMITTED', 'REPEATABLE READ', 'SERIALIZABLE')
+
+class BulkLoadSession:
+    """
+    批量导入模式：导入期间在写入连接上关闭unique_checks和foreign_key_checks并调整事务隔离级别，
+    数据量很大时先删除普通二级索引、导入后一次重建，减少InnoDB逐行检查和维护索引的开销
+
+    restore在导入成功和失败时都必须调用，恢复每个连接原来的会话设置并重建删除的索引；
+    恢复失败的连接会被关闭而不是放回连接池，避免后续使用者在关闭检查的会话上写入。
+    导入期间没有检查的约束由verify在导入后统一校验
+    """
+
+    def __init__(self, db_manager, table_name: str, isolation_level: str = Config.DB_BULK_ISOLATION):
+        """
+        Args:
+            db_manager: 已连接的DatabaseManager，用于删除和重建索引以及校验
+            table_name: 表名
+            isolation_level: 导入期间的事务隔离级别，空字符串表示不修改
+        """
+        self.db_manager = db_manager
+        self.table_name = table_name
+        self.isolation_level = isolation_level.strip().upper()
+        if self.isolation_level and self.isolation_level not in ISOLATION_LEVELS:
+            raise ValueError(f"不支持的事务隔离级别: {isolation_level}，可选: {', '.join(ISOLATION_LEVELS)}")
+        self.logger = logging.getLogger(__name__)
+        self.dropped_indexes: Dict[str, Dict[str, Any]] = {}  # 已删除、需要重建的索引
+        self._saved: List[Tuple[Any, tuple]] = []  # (DatabaseManager, 原来的会话设置)
+
+    def drop_secondary_indexes(self) -> List[str]:
+        """
+        删除普通二级索引，返回删除的索引名
+
+        唯一索引、主键、全文和空间索引、函数索引以及外键需要的索引保留：
+        重建唯一索引可能因重复数据失败，使表失去约束
+        """
+        foreign_key_columns = [fk['columns'] for fk in self.db_manager.get_foreign_keys(self.table_name).values()]
+        for name, index in self.db_manager.get_table_indexes(self.table_name).items():
+            columns = [column for column, _, _ in index['columns']]
+            if index['unique'] or index['type'] != 'BTREE' or None in columns:
+                continue
+            if any(columns[:len(fk_columns)] == fk_columns for fk_columns in foreign_key_columns):
+                continue
+            if self.db_manager.execute_sql(f"ALTER TABLE `{self.table_name}` DROP INDEX `{name}`"):
+                self.dropped_indexes[name] = index
+        if self.dropped_indexes:
+            self.logger.info(f"批量导入前删除表 '{self.table_name}' 的索引: {list(self.dropped_indexes)}")
+        return list(self.dropped_indexes)
+
+    def apply(self, db_managers: List[Any]) -> bool:
+        """在每个写入连接上记录原来的会话设置，然后关闭检查并设置隔离级别，需要在事务开始之前调用"""
+        for db_manager in db_managers:
+            try:
+                with db_manager.connection.cursor() as cursor:
+                    cursor.execute("SELECT @@SESSION.unique_checks, @@SESSION.foreign_key_checks, "
+                                   "@@SESSION.transaction_isolation")
+                    self._saved.append((db_manager, tuple(cursor.fetchone())))
+                    cursor.execute("SET SESSION unique_checks = 0, foreign_key_checks = 0")
+                    if self.isolation_level:
+                        cursor.execute(f"SET SESSION TRANSACTION ISOLATION LEVEL {self.isolation_level}")
+            except Exception as e:
+                self.logger.error(f"启用批量导入模式失败: {e}")
+                return False
+        self.logger.info(f"已在{len(db_managers)}个连接上启用批量导入模式"
+                         f"（unique_checks=0, foreign_key_checks=0, 隔离级别: {self.isolation_level or '不变'}）")
+        return True
+
+    def restore(self) -> bool:
+        """恢复所有连接的会话设置并重建删除的索引，可以重复调用"""
+        restored = True
+        for db_manager, saved in self._saved:
+            if db_manager.connection is None:
+                continue
+            try:
+                with db_manager.connection.cursor() as cursor:
+                    cursor.execute("SET SESSION unique_checks = %s, foreign_key_checks = %s, "
+                                   "transaction_isolation = %s", saved)
+            except Exception as e:
+                self.logger.error(f"恢复会话设置失败，关闭该连接: {e}")
+                self._close_connection(db_manager)
+                restored = False
+        self._saved = []
+        if self.dropped_indexes:
+            restored = self._rebuild_indexes() and restored
+        return restored
+
+    def verify(self) -> List[str]:
+        """校验表中的数据是否违反唯一索引和外键（导入期间没有检查），返回发现的问题"""
+        violations = []
+        for name, index in self.db_manager.get_table_indexes(self.table_name).items():
+            if not index['unique'] or name == 'PRIMARY' or any(column is None for column, _, _ in index['columns']):
+                continue
+            keys = ', '.join(f"LEFT(`{column}`, {sub_part})" if sub_part else f"`{column}`"
+                             for column, sub_part, _ in index['columns'])
+            not_null = ' AND '.join(f"`{column}` IS NOT NULL" for column, _, _ in index['columns'])
+            count = self._count(
+                f"SELECT COUNT(*) FROM (SELECT 1 FROM `{self.table_name}` WHERE {not_null} "
+                f"GROUP BY {keys} HAVING COUNT(*) > 1) AS duplicates"
+            )
+            if count is None:
+                violations.append(f"无法校验唯一索引 {name}")
+            elif count:
+                violations.append(f"唯一索引 {name} 有{count}组重复值")
+
+        for name, fk in self.db_manager.get_foreign_keys(self.table_name).items():
+            pairs = list(zip(fk['columns'], fk['referenced_columns']))
+            join = ' AND '.join(f"c.`{column}` = p.`{referenced}`" for column, referenced in pairs)
+            not_null = ' AND '.join(f"c.`{column}` IS NOT NULL" for column, _ in pairs)
+            count = self._count(
+                f"SELECT COUNT(*) FROM `{self.table_name}` AS c "
+                f"LEFT JOIN `{fk['referenced_table']}` AS p ON {join} "
+                f"WHERE {not_null} AND p.`{pairs[0][1]}` IS NULL"
+            )
+            if count is None:
+                violations.append(f"无法校验外键 {name}")
+            elif count:
+                violations.append(f"外键 {name} 有{count}行引用的 {fk['referenced_table']} 记录不存在")
+
+        if violations:
+            self.logger.warning(f"表 '{self.table_name}' 批量导入后校验发现问题: {violations}")
+        return violations
+
+    def _rebuild_indexes(self) -> bool:
+        """在一条ALTER TABLE中重建所有删除的索引，表只需要扫描一次"""
+        clauses = []
+        for name, index in self.dropped_indexes.items():
+            parts = []
+            for column, sub_part, descending in index['columns']:
+                part = f"`{column}`" + (f"({sub_part})" if sub_part else '')
+                parts.append(part + (' DESC' if descending else ''))
+            clauses.append(f"ADD INDEX `{name}` ({', '.join(parts)})")
+        sql = f"ALTER TABLE `{self.table_name}` " + ', '.join(clauses)
+        if not self.db_manager.execute_sql(sql):
+            self.logger.error(f"重建索引失败，请手动执行: {sql}")
+            return False
+        self.logger.info(f"已重建表 '{self.table_name}' 的索引: {list(self.dropped_indexes)}")
+        self.dropped_indexes = {}
+        return True
+
+    def _count(self, sql: str) -> Optional[int]:
+        """执行COUNT查询，失败时返回None"""
+        try:
+            with self.db_manager.connection.cursor() as cursor:
+                cursor.execute(sql)
+                return int(cursor.fetchone()[0])
+        except Exception as e:
+            self.logger.error(f"校验查询失败: {e}")
+            return None
+
+    def _close_connection(self, db_manager):
+        """关闭无法恢复设置的连接：连接池归还时发现连接已关闭会丢弃它"""
+        try:
+            db_manager.connection.close()
+        except Exception:
+            pass
+        if db_manager.pool is None:
+            db_manager.connection = None
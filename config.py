@@ -1,4 +1,5 @@
 import os
+import tempfile
 from dotenv import load_dotenv
 
 # 加载环境变量
@@ -15,8 +16,66 @@ class Config:
     DB_NAME = os.getenv('DB_NAME', '')
     DB_CHARSET = os.getenv('DB_CHARSET', 'utf8mb4')
     
+    # 连接池配置
+    DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', '5'))  # 最大连接数
+    DB_POOL_TIMEOUT = float(os.getenv('DB_POOL_TIMEOUT', '30'))  # 等待空闲连接的超时时间（秒）
+    DB_POOL_IDLE_TIMEOUT = float(os.getenv('DB_POOL_IDLE_TIMEOUT', '300'))  # 空闲超过该时间的连接被回收（秒）
+    DB_POOL_MAX_LIFETIME = float(os.getenv('DB_POOL_MAX_LIFETIME', '3600'))  # 连接最长存活时间（秒）
+    
+    # 批量插入配置
+    DB_COMMIT_EVERY = int(os.getenv('DB_COMMIT_EVERY', '0'))  # 每N批提交一次，0表示整个导入在一个事务中提交
+    DB_TARGET_BATCH_SECONDS = float(os.getenv('DB_TARGET_BATCH_SECONDS', '0.5'))  # 每批目标往返耗时，用于自适应批大小，0表示不调整
+    DB_INSERT_WORKERS = int(os.getenv('DB_INSERT_WORKERS', '1'))  # 一次导入并行写入的连接数，1表示单连接写入
+    DB_PARALLEL_MIN_ROWS = int(os.getenv('DB_PARALLEL_MIN_ROWS', '50000'))  # 预计行数低于该值时不并行写入
+    DB_BULK_MODE = os.getenv('DB_BULK_MODE', 'false').lower() in ('1', 'true', 'yes')  # 导入时关闭unique_checks和foreign_key_checks，导入后校验
+    DB_BULK_DROP_INDEX_MIN_ROWS = int(os.getenv('DB_BULK_DROP_INDEX_MIN_ROWS', '1000000'))  # 批量导入模式下预计行数超过该值时先删除普通二级索引，导入后重建，0表示不删除
+    DB_BULK_ISOLATION = os.getenv('DB_BULK_ISOLATION', 'READ COMMITTED')  # 批量导入模式下的事务隔离级别，空表示不修改
+    DB_MAX_STATEMENT_BYTES = int(os.getenv('DB_MAX_STATEMENT_BYTES', str(16 * 1024 * 1024)))  # 单条INSERT语句字节上限，实际取与max_allowed_packet的较小值
+    
+    # LOAD DATA LOCAL INFILE配置（需要服务器同时开启local_infile）
+    DB_LOCAL_INFILE = os.getenv('DB_LOCAL_INFILE', 'false').lower() in ('1', 'true', 'yes')  # 是否允许LOAD DATA LOCAL INFILE
+    DB_LOAD_DATA_MIN_ROWS = int(os.getenv('DB_LOAD_DATA_MIN_ROWS', '100000'))  # 自动模式下超过该行数时使用LOAD DATA
+    DB_LOAD_DATA_SEGMENT_BYTES = int(os.getenv('DB_LOAD_DATA_SEGMENT_BYTES', str(64 * 1024 * 1024)))  # 每段临时文件大小
+    
     # Excel配置
     EXCEL_START_ROW = 2  # 从第二行开始读取数据
+    EXCEL_CHUNK_SIZE = int(os.getenv('EXCEL_CHUNK_SIZE', '10000'))  # 流式读取每块行数，0表示整表读取
+    DB_BATCH_SIZE = int(os.getenv('DB_BATCH_SIZE', '1000'))  # 每批转换和插入的行数
+    PIPELINE_QUEUE_SIZE = int(os.getenv('PIPELINE_QUEUE_SIZE', '8'))  # 解析和插入之间最多缓冲的批次数，解析超前时阻塞等待
+    EXCEL_ENGINE = os.getenv('EXCEL_ENGINE', 'auto')  # 读取引擎：auto、openpyxl、calamine、xlrd、pyxlsb
+    EXCEL_CALAMINE_MAX_MB = float(os.getenv('EXCEL_CALAMINE_MAX_MB', '100'))  # 自动选择时超过该大小的xlsx使用openpyxl流式读取
+    CSV_ENCODING = os.getenv('CSV_ENCODING', 'utf-8-sig')  # CSV/TSV文件编码，utf-8-sig兼容带BOM的UTF-8
+    
+    # 多工作表导入的并行进程数，0表示使用CPU核数
+    IMPORT_SHEET_WORKERS = int(os.getenv('IMPORT_SHEET_WORKERS', '0'))
+    
+    # 表结构缓存有效期（秒），过期后按表的列和索引校验和重新验证，0表示不缓存
+    SCHEMA_CACHE_TTL = float(os.getenv('SCHEMA_CACHE_TTL', '300'))
+    
+    # 下载缓存：按URL缓存下载的文件，有效期内不再请求，过期后用ETag/Last-Modified条件请求验证
+    DOWNLOAD_CACHE_DIR = os.getenv('DOWNLOAD_CACHE_DIR', os.path.join(tempfile.gettempdir(), 'mymcp_download_cache'))
+    DOWNLOAD_CACHE_MAX_MB = float(os.getenv('DOWNLOAD_CACHE_MAX_MB', '1024'))  # 缓存总大小上限，超过时按最近使用时间淘汰
+    DOWNLOAD_CACHE_TTL = float(os.getenv('DOWNLOAD_CACHE_TTL', '300'))  # 服务器没有指定max-age时的有效期（秒）
+    DOWNLOAD_CONNECT_TIMEOUT = float(os.getenv('DOWNLOAD_CONNECT_TIMEOUT', '10'))  # 建立连接的超时（秒）
+    DOWNLOAD_READ_TIMEOUT = float(os.getenv('DOWNLOAD_READ_TIMEOUT', '60'))  # 两次收到数据之间的超时（秒）
+    DOWNLOAD_MAX_MB = float(os.getenv('DOWNLOAD_MAX_MB', '500'))  # 允许下载的最大文件，0表示不限制
+    DOWNLOAD_PARALLEL = int(os.getenv('DOWNLOAD_PARALLEL', '4'))  # 服务器支持Range时并行请求的段数
+    DOWNLOAD_PART_MB = float(os.getenv('DOWNLOAD_PART_MB', '8'))  # 每段大小
+    DOWNLOAD_SPOOL_MB = float(os.getenv('DOWNLOAD_SPOOL_MB', '16'))  # 不超过该大小的文件下载时只保存在内存中
+    
+    # 导入记录：相同内容的文件以相同选项导入同一张表时直接返回之前的结果，相同的导入正在进行时等待其完成
+    # （MCP工具调用默认开启，Dify重试时不会重复导入；调用时指定force可以跳过）
+    IMPORT_LEDGER_ENABLED = os.getenv('IMPORT_LEDGER_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+    IMPORT_LEDGER_TABLE = os.getenv('IMPORT_LEDGER_TABLE', '_import_ledger')
+    IMPORT_LEDGER_WAIT_SECONDS = float(os.getenv('IMPORT_LEDGER_WAIT_SECONDS', '600'))  # 等待相同导入完成的最长时间（秒）
+    IMPORT_LEDGER_STALE_SECONDS = float(os.getenv('IMPORT_LEDGER_STALE_SECONDS', '120'))  # 正在导入的记录超过该时间没有心跳时视为已中断，由等待方接手
+    
+    # 自动id分配的序列表，每个目标表一行，记录下一个可用id
+    ID_SEQUENCE_TABLE = os.getenv('ID_SEQUENCE_TABLE', '_import_id_sequence')
+    
+    # MCP服务器配置
+    MCP_IMPORT_WORKERS = int(os.getenv('MCP_IMPORT_WORKERS', '2'))  # 同时执行的导入任务数
+    MCP_IMPORT_QUEUE_SIZE = int(os.getenv('MCP_IMPORT_QUEUE_SIZE', '8'))  # 最多排队等待的导入任务数
     
     # 日志配置
     LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO') 
\ No newline at end of file
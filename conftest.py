@@ -0,0 +1,554 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试共用的模拟MySQL服务器（不需要真实数据库）
+
+FakeServer按表保存行、列、索引和外键，FakeConnection/FakeCursor解释本项目实际发出的SQL：
+写入按主键和唯一索引检查重复并支持ON DUPLICATE KEY UPDATE，事务回滚时撤销写入，
+访问不存在的表时与MySQL一样报错1146。各测试通过FakeServer的参数注入延迟和失败
+"""
+
+import re
+import tempfile
+import zlib
+import threading
+import time
+from typing import Any, Dict, List, Optional
+from pymysql.err import IntegrityError, OperationalError, ProgrammingError
+from database import ConnectionPool, DatabaseManager
+from excel_to_mysql import ExcelToMySQL
+
+DEFAULT_SESSION = {'unique_checks': 1, 'foreign_key_checks': 1, 'transaction_isolation': 'REPEATABLE-READ'}
+
+class FakeTable:
+    """模拟的表：行按插入顺序保存为字典，唯一索引维护查找表"""
+
+    def __init__(self, columns=None, indexes=None, foreign_keys=()):
+        self.columns: Dict[str, str] = dict(columns or {})
+        # 索引名 -> [(列名, 是否唯一, 类型, 前缀长度, 排序)]
+        self.indexes: Dict[str, List[tuple]] = {name: list(parts) for name, parts in (indexes or {}).items()}
+        self.foreign_keys = list(foreign_keys)  # [(约束名, 列名, 被引用的表, 被引用的列)]
+        self.rows: List[Dict[str, Any]] = []
+        self._reindex()
+
+    def unique_keys(self) -> Dict[str, List[str]]:
+        """主键和唯一索引：索引名 -> 列名列表"""
+        return {name: [part[0] for part in parts] for name, parts in self.indexes.items() if parts[0][1]}
+
+    def find(self, row: Dict[str, Any]) -> Optional[tuple]:
+        """按主键和唯一索引查找冲突的行，返回(索引名, 已有的行)"""
+        for name, columns in self._unique.items():
+            key = self._key(columns, row)
+            if key is not None and key in self._lookup[name]:
+                return name, self._lookup[name][key]
+        return None
+
+    def insert(self, row: Dict[str, Any]):
+        self.rows.append(row)
+        self._add_keys(row)
+
+    def update(self, row: Dict[str, Any], values: Dict[str, Any]):
+        self._remove_keys(row)
+        row.update(values)
+        self._add_keys(row)
+
+    def remove(self, rows: List[Dict[str, Any]]):
+        removed = {id(row) for row in rows}
+        self.rows = [row for row in self.rows if id(row) not in removed]
+        self._reindex()
+
+    def alter_indexes(self):
+        """索引变化后重建查找表"""
+        self._reindex()
+
+    def version(self) -> tuple:
+        """与DatabaseManager.get_table_version相同的列和索引校验和"""
+        columns = [f'{name},{column_type},{position}'
+                   for position, (name, column_type) in enumerate(self.columns.items(), 1)]
+        indexes = [f'{name},{0 if parts[0][1] else 1},{seq},{part[0]}'
+                   for name, parts in self.indexes.items() for seq, part in enumerate(parts, 1)]
+        return tuple(f'{len(items)}:{sum(zlib.crc32(item.encode()) for item in items)}' for items in (columns, indexes))
+
+    def _reindex(self):
+        self._unique = self.unique_keys()
+        self._lookup = {name: {} for name in self._unique}
+        for row in self.rows:
+            self._add_keys(row)
+
+    def _key(self, columns, row):
+        values = tuple(row.get(column) for column in columns)
+        return None if None in values else values
+
+    def _add_keys(self, row):
+        for name, columns in self._unique.items():
+            key = self._key(columns, row)
+            if key is not None:
+                self._lookup[name][key] = row
+
+    def _remove_keys(self, row):
+        for name, columns in self._unique.items():
+            key = self._key(columns, row)
+            if key is not None and self._lookup[name].get(key) is row:
+                del self._lookup[name][key]
+
+class FakeServer:
+    """
+    模拟的MySQL服务器，语句之间串行执行，写入时的延迟在锁外，多个连接可以同时写入
+
+    Args:
+        row_delay: 写入每行的耗时（秒）
+        insert_delay: 每次写入的固定耗时（秒）
+        fail_on_batch: 第N次写入（从0开始，所有连接一起计数）失败
+        fail_commit_on: 第N次COMMIT（从0开始，所有连接一起计数）失败
+        max_allowed_packet: SELECT @@max_allowed_packet的返回值
+        duplicates: 批量导入校验时唯一索引的重复值组数
+        orphans: 批量导入校验时外键引用不存在的行数
+    """
+
+    def __init__(self, row_delay: float = 0.0, insert_delay: float = 0.0, fail_on_batch=None,
+                 fail_commit_on=None, max_allowed_packet: int = 64 * 1024 * 1024, duplicates: int = 0,
+                 orphans: int = 0):
+        self.tables: Dict[str, FakeTable] = {}
+        self.row_delay = row_delay
+        self.insert_delay = insert_delay
+        self.fail_on_batch = fail_on_batch
+        self.fail_insert = False  # 为True时所有写入都失败
+        self.fail_commit_on = fail_commit_on
+        self.max_allowed_packet = max_allowed_packet
+        self.duplicates = duplicates
+        self.orphans = orphans
+        self.on_insert = None  # 每次写入前调用 on_insert(表名, 行)
+        self.lock = threading.Lock()
+        self.inserting = threading.Event()  # 第一次写入时设置
+        self.connections: List['FakeConnection'] = []
+        self.statements: List[str] = []  # 执行过的语句（空白已合并）
+        self.batches = 0
+        self.commits = 0
+        self.active = 0  # 正在写入的连接数
+        self.max_active = 0
+        self.rows_sent: Dict[str, int] = {}  # 表名 -> 写入的行数
+        self.insert_sessions: List[Dict[str, Any]] = []  # 每次写入时连接的会话设置
+        self.loaded: List[List[str]] = []  # 每次LOAD DATA加载的文件行
+        self.files: List[str] = []  # LOAD DATA加载过的文件路径
+
+    def create_table(self, name: str, columns=None, rows=(), unique_keys=None, indexes=None,
+                     foreign_keys=()) -> 'FakeServer':
+        """创建表，unique_keys为 索引名 -> 列名列表 的简写，indexes为完整的索引定义；返回服务器本身以便连续调用"""
+        indexes = dict(indexes or {})
+        for index_name, index_columns in (unique_keys or {}).items():
+            indexes[index_name] = [(column, True, 'BTREE', None, 'A') for column in index_columns]
+        table = FakeTable(columns, indexes, foreign_keys)
+        for row in rows:
+            table.insert(dict(row))
+        self.tables[name] = table
+        return self
+
+    def rows(self, name: str) -> List[Dict[str, Any]]:
+        """表中的行"""
+        return self.tables[name].rows
+
+    def count(self, prefix: str) -> int:
+        """以prefix开头的语句执行过的次数"""
+        return sum(1 for sql in self.statements if sql.startswith(prefix))
+
+    def table(self, name: str) -> FakeTable:
+        """取出表，不存在时报错1146"""
+        if name not in self.tables:
+            raise ProgrammingError(1146, f"Table 'test.{name}' doesn't exist")
+        return self.tables[name]
+
+class FakeCursor:
+    """模拟的游标，只解释本项目发出的SQL"""
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.server = connection.server
+        self.max_stmt_length = 1024000
+        self.rows = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+    def execute(self, sql, params=None):
+        if self.connection.closed:
+            raise OperationalError(2006, "MySQL server has gone away")
+        sql = ' '.join(sql.split())
+        params = list(params or ())
+        self.rows = []
+        if sql.startswith('LOAD DATA'):
+            return self._load_data(sql, params[0])
+        with self.server.lock:
+            self.server.statements.append(sql)
+            result = self._dispatch(sql, params)
+        return len(self.rows) if result is None else result
+
+    def fetchone(self):
+        return self.rows[0] if self.rows else None
+
+    def fetchmany(self, size):
+        rows, self.rows = self.rows[:size], self.rows[size:]
+        return rows
+
+    def fetchall(self):
+        return self.fetchmany(len(self.rows))
+
+    def executemany(self, sql, rows):
+        server, connection = self.server, self.connection
+        table_name = re.match(r'INSERT INTO `(\w+)`', sql).group(1)
+        columns = re.findall(r'`(\w+)`', sql.split(' VALUES ')[0])[1:]
+        updates = None
+        if ' ON DUPLICATE KEY UPDATE ' in sql:
+            updates = dict(re.findall(r'`(\w+)` = (VALUES\(`\w+`\)|`\w+`)', sql.split(' ON DUPLICATE KEY UPDATE ')[1]))
+        with server.lock:
+            batch = server.batches
+            server.batches += 1
+            server.active += 1
+            server.max_active = max(server.max_active, server.active)
+            server.insert_sessions.append(dict(connection.session))
+        server.inserting.set()
+        try:
+            if server.on_insert is not None:
+                server.on_insert(table_name, rows)
+            time.sleep(server.insert_delay + server.row_delay * len(rows))
+            if batch == server.fail_on_batch or server.fail_insert:
+                raise OperationalError(2013, "Lost connection to MySQL server during query")
+            with server.lock:
+                table = server.table(table_name)
+                for values in rows:
+                    self._write(table, dict(zip(columns, values)), updates)
+                server.rows_sent[table_name] = server.rows_sent.get(table_name, 0) + len(rows)
+        finally:
+            with server.lock:
+                server.active -= 1
+        connection.batches.append((len(rows), self.max_stmt_length))
+        connection.rows.extend(rows)
+
+    def _write(self, table: FakeTable, row: Dict[str, Any], updates: Optional[Dict[str, str]], ignore=False) -> int:
+        """写入一行，键冲突时按updates更新（None表示报错），返回影响的行数"""
+        unknown = [column for column in row if table.columns and column not in table.columns]
+        if unknown:
+            raise OperationalError(1054, f"Unknown column '{unknown[0]}' in 'field list'")
+        conflict = table.find(row)
+        if conflict is None:
+            table.insert(row)
+            self.connection.log_undo(table, row, None)
+            return 1
+        index_name, existing = conflict
+        if ignore:
+            return 0
+        if updates is None:
+            raise IntegrityError(1062, f"Duplicate entry for key '{index_name}'")
+        values = {column: row[column] for column, value in updates.items() if value.startswith('VALUES')}
+        self.connection.log_undo(table, existing, {column: existing.get(column) for column in values})
+        table.update(existing, values)
+        return 2
+
+    def _dispatch(self, sql: str, params: List[Any]):
+        server, session = self.server, self.connection.session
+        if sql == 'SELECT @@max_allowed_packet':
+            self.rows = [(server.max_allowed_packet,)]
+        elif sql.startswith('SELECT @@SESSION.unique_checks'):
+            self.rows = [(session['unique_checks'], session['foreign_key_checks'], session['transaction_isolation'])]
+        elif sql == 'SET SESSION unique_checks = 0, foreign_key_checks = 0':
+            session.update(unique_checks=0, foreign_key_checks=0)
+        elif sql.startswith('SET SESSION TRANSACTION ISOLATION LEVEL'):
+            session['transaction_isolation'] = sql.rsplit('LEVEL ', 1)[1].replace(' ', '-')
+        elif sql.startswith('SET SESSION unique_checks = %s'):
+            if self.connection.fail_restore:
+                raise OperationalError(2013, "Lost connection to MySQL server during query")
+            session.update(zip(('unique_checks', 'foreign_key_checks', 'transaction_isolation'), params))
+        elif 'INFORMATION_SCHEMA' in sql:
+            self._information_schema(sql, params)
+        elif 'AS duplicates' in sql:
+            self.rows = [(server.duplicates,)]
+        elif 'LEFT JOIN' in sql:
+            self.rows = [(server.orphans,)]
+        elif sql.startswith('CREATE TABLE'):
+            self._create_table(sql)
+        elif sql.startswith('RENAME TABLE'):
+            tables = dict(server.tables)
+            # 按顺序逐对改名，整条语句要么全部成功要么全部失败
+            for old, new in re.findall(r'`(\w+)` TO `(\w+)`', sql):
+                if old not in tables:
+                    raise ProgrammingError(1146, f"Table 'test.{old}' doesn't exist")
+                if new in tables:
+                    raise OperationalError(1050, f"Table '{new}' already exists")
+                tables[new] = tables.pop(old)
+            server.tables = tables
+        elif sql.startswith('DROP TABLE'):
+            name = re.search(r'`(\w+)`', sql).group(1)
+            if 'IF EXISTS' not in sql:
+                server.table(name)
+            server.tables.pop(name, None)
+        elif sql.startswith('ALTER TABLE'):
+            self._alter_table(sql)
+        elif sql.startswith('SELECT MAX('):
+            column, name = re.findall(r'`(\w+)`', sql)
+            self.rows = [(self._max(server.table(name), column),)]
+        elif sql == 'SELECT LAST_INSERT_ID()':
+            self.rows = [(self.connection.last_insert_id,)]
+        elif 'LAST_INSERT_ID(next_id' in sql:
+            entry = self._sequence(sql, params[1])
+            if entry is None:
+                return 0
+            entry['next_id'] += params[0]
+            self.connection.last_insert_id = entry['next_id']
+            return 1
+        elif 'GREATEST(next_id' in sql:
+            entry = self._sequence(sql, params[1])
+            if entry is None:
+                return 0
+            entry['next_id'] = max(entry['next_id'], params[0])
+            return 1
+        elif sql.startswith('INSERT IGNORE INTO') and ' SELECT ' in sql:
+            # 用MAX(id)初始化id序列
+            sequence, column, name = re.findall(r'`(\w+)`', sql)
+            row = {'table_name': params[0], 'next_id': self._max(server.table(name), column) + 1}
+            return self._write(server.table(sequence), row, None, ignore=True)
+        elif sql.startswith('INSERT IGNORE INTO'):
+            match = re.match(r'INSERT IGNORE INTO `(\w+)` \((.*?)\) VALUES \((.*)\)$', sql)
+            row = dict(zip(self._names(match.group(2)), self._values(match.group(3), params)))
+            return self._write(server.table(match.group(1)), row, None, ignore=True)
+        elif sql.startswith('SELECT '):
+            match = re.match(r'SELECT (.*?) FROM `(\w+)`(?: WHERE (\w+) = %s)?$', sql)
+            columns = self._names(match.group(1))
+            self.rows = [tuple(row.get(column) for column in columns)
+                         for row in server.table(match.group(2)).rows
+                         if match.group(3) is None or row.get(match.group(3)) == params[0]]
+        elif sql.startswith('UPDATE '):
+            match = re.match(r'UPDATE `(\w+)` SET (.*?) WHERE (.*)$', sql)
+            assignments = [item.split(' = ', 1) for item in match.group(2).split(', ')]
+            conditions = [item.split(' = ', 1) for item in match.group(3).split(' AND ')]
+            values = self._values(', '.join(value for _, value in assignments + conditions), params)
+            updates = dict(zip([name for name, _ in assignments], values))
+            expected = dict(zip([name for name, _ in conditions], values[len(assignments):]))
+            matched = [row for row in server.table(match.group(1)).rows
+                       if all(row.get(column) == value for column, value in expected.items())]
+            for row in matched:
+                row.update(updates)
+            return len(matched)
+        return None
+
+    def _information_schema(self, sql: str, params: List[Any]):
+        server = self.server
+        name = params[1] if len(params) > 1 else None
+        table = server.tables.get(name)
+        if 'CRC32' in sql:
+            self.rows = [table.version() if table is not None else ('0:0', '0:0')]
+        elif 'INFORMATION_SCHEMA.TABLES' in sql:
+            self.rows = [(name,)] if table is not None else []
+        elif 'INFORMATION_SCHEMA.STATISTICS' in sql:
+            if table is not None:
+                self.rows = [(index_name, 0 if unique else 1, index_type, column, sub_part, collation)
+                             for index_name, parts in sorted(table.indexes.items())
+                             for column, unique, index_type, sub_part, collation in parts]
+        elif 'REFERENCED_TABLE_NAME = %s' in sql:
+            self.rows = [(other,) for other, other_table in server.tables.items()
+                         if any(fk[2] == name for fk in other_table.foreign_keys)]
+        elif 'INFORMATION_SCHEMA.KEY_COLUMN_USAGE' in sql:
+            if table is not None:
+                self.rows = list(table.foreign_keys)
+        elif 'INFORMATION_SCHEMA.COLUMNS' in sql:
+            if table is not None:
+                self.rows = [(column, column_type.split('(')[0], column_type)
+                             for column, column_type in table.columns.items()]
+
+    def _create_table(self, sql: str):
+        server = self.server
+        like = re.match(r'CREATE TABLE `(\w+)` LIKE `(\w+)`$', sql)
+        if like:
+            source = server.table(like.group(2))
+            if like.group(1) in server.tables:
+                raise OperationalError(1050, f"Table '{like.group(1)}' already exists")
+            server.tables[like.group(1)] = FakeTable(source.columns, source.indexes)
+            return
+        match = re.match(r'CREATE TABLE (IF NOT EXISTS )?`(\w+)` \((.*)\)', sql)
+        name = match.group(2)
+        if name in server.tables:
+            if match.group(1):
+                return
+            raise OperationalError(1050, f"Table '{name}' already exists")
+        columns, indexes = {}, {}
+        for definition in self._split(match.group(3)):
+            key = re.match(r'(UNIQUE )?KEY `(\w+)` \((.*)\)$', definition)
+            if key:
+                indexes[key.group(2)] = [(column, bool(key.group(1)), 'BTREE', None, 'A')
+                                         for column in self._names(key.group(3))]
+                continue
+            column, column_type = re.match(r'`(\w+)` (\S+)', definition).groups()
+            columns[column] = column_type
+            if 'PRIMARY KEY' in definition:
+                indexes['PRIMARY'] = [(column, True, 'BTREE', None, 'A')]
+        server.tables[name] = FakeTable(columns, indexes)
+
+    def _alter_table(self, sql: str):
+        match = re.match(r'ALTER TABLE `(\w+)` (.*)$', sql)
+        table = self.server.table(match.group(1))
+        for clause in self._split(match.group(2)):
+            drop = re.match(r'DROP INDEX `(\w+)`$', clause)
+            add = re.match(r'ADD (UNIQUE )?INDEX `(\w+)` \((.*)\)$', clause)
+            column = re.match(r'(ADD|DROP|RENAME) COLUMN `(\w+)`(?: (\S+)| TO `(\w+)`)?', clause)
+            if drop:
+                table.indexes.pop(drop.group(1))
+            elif add:
+                table.indexes[add.group(2)] = [
+                    (part, bool(add.group(1)), 'BTREE', int(sub_part) if sub_part else None, 'D' if desc else 'A')
+                    for part, sub_part, desc in re.findall(r'`(\w+)`(?:\((\d+)\))?( DESC)?', add.group(3))
+                ]
+            elif column:
+                action, name, column_type, new_name = column.groups()
+                if action == 'ADD':
+                    table.columns[name] = column_type
+                elif action == 'DROP':
+                    table.columns.pop(name)
+                else:
+                    table.columns = {new_name if key == name else key: value for key, value in table.columns.items()}
+        table.alter_indexes()
+
+    def _load_data(self, sql: str, path: str) -> int:
+        """读取LOAD DATA的临时文件，按\\t分列写入表，SET中的UNHEX(@变量)还原为bytes"""
+        server = self.server
+        table_name = re.search(r'INTO TABLE `(\w+)`', sql).group(1)
+        targets, assignments = re.search(r"\(([^()]*)\)(?: SET (.*))?$", sql).groups()
+        columns = [name.strip().strip('`') for name in targets.split(',')]
+        unhex = re.findall(r'`(\w+)` = UNHEX\(@(\w+)\)', assignments or '')
+        with open(path, encoding='utf-8') as f:
+            lines = f.read().split('\n')[:-1]
+        with server.lock:
+            server.statements.append(sql)
+            server.loaded.append(lines)
+            server.files.append(path)
+            table = server.table(table_name)
+            for line in lines:
+                values = [None if value == '\\N' else value for value in line.split('\t')]
+                row = dict(zip(columns, values))
+                for column, variable in unhex:
+                    value = row.pop('@' + variable)
+                    row[column] = None if value is None else bytes.fromhex(value)
+                self._write(table, row, None)
+        return len(lines)
+
+    def _sequence(self, sql: str, table_name: str) -> Optional[Dict[str, Any]]:
+        sequence = self.server.table(re.search(r'UPDATE `(\w+)`', sql).group(1))
+        return next((row for row in sequence.rows if row['table_name'] == table_name), None)
+
+    @staticmethod
+    def _max(table: FakeTable, column: str) -> int:
+        return max((int(row[column]) for row in table.rows if row.get(column) is not None), default=0)
+
+    @staticmethod
+    def _names(text: str) -> List[str]:
+        return [name.strip().strip('`') for name in text.split(',')]
+
+    @staticmethod
+    def _values(text: str, params: List[Any]) -> List[Any]:
+        """把VALUES或SET中的%s依次替换为参数，引号中的字面量去掉引号"""
+        params = iter(params)
+        return [next(params) if value == '%s' else value.strip("'") for value in (item.strip() for item in text.split(','))]
+
+    @staticmethod
+    def _split(text: str) -> List[str]:
+        """按不在括号中的逗号拆分"""
+        parts, depth, current = [], 0, ''
+        for char in text:
+            depth += (char == '(') - (char == ')')
+            if char == ',' and depth == 0:
+                parts.append(current.strip())
+                current = ''
+            else:
+                current += char
+        return parts + [current.strip()] if current.strip() else parts
+
+class FakeConnection:
+    """模拟的自动提交连接：begin之后的写入在rollback时撤销，每个连接有自己的会话设置和LAST_INSERT_ID"""
+
+    def __init__(self, server: FakeServer):
+        self.server = server
+        self.session = dict(DEFAULT_SESSION)
+        self.closed = False
+        self.fail_restore = False  # 为True时恢复会话设置失败
+        self.in_transaction = False
+        self.last_insert_id = 0
+        self.events: List[str] = []  # begin、commit和rollback
+        self.batches: List[tuple] = []  # 每次写入的(行数, 单条语句的字节上限)
+        self.rows: List[tuple] = []  # 本连接写入的行
+        self.committed_after = None  # 最后一次提交时服务器上已完成的写入次数
+        self._undo: List[tuple] = []
+        with server.lock:
+            server.connections.append(self)
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def begin(self):
+        self.events.append('begin')
+        self.in_transaction = True
+        self._undo = []
+
+    def commit(self):
+        with self.server.lock:
+            commit = self.server.commits
+            self.server.commits += 1
+            if commit == self.server.fail_commit_on:
+                raise OperationalError(2013, "Lost connection to MySQL server during query")
+            self.committed_after = self.server.batches
+        self.events.append('commit')
+        self.in_transaction = False
+        self._undo = []
+
+    def rollback(self):
+        if self.closed:
+            raise OperationalError(2006, "MySQL server has gone away")
+        if not self.in_transaction:
+            return
+        inserted: Dict[int, tuple] = {}  # id(表) -> (表, 新插入的行)
+        with self.server.lock:
+            for table, row, old_values in reversed(self._undo):
+                if old_values is None:
+                    inserted.setdefault(id(table), (table, []))[1].append(row)
+                else:
+                    table.update(row, old_values)
+            for table, rows in inserted.values():
+                table.remove(rows)
+        self.events.append('rollback')
+        self.in_transaction = False
+        self._undo = []
+
+    def log_undo(self, table: FakeTable, row: Dict[str, Any], old_values: Optional[Dict[str, Any]]):
+        """记录事务中的写入，old_values为None表示新插入的行"""
+        if self.in_transaction:
+            self._undo.append((table, row, old_values))
+
+    def ping(self, reconnect=False):
+        if self.closed:
+            raise OperationalError(2006, "MySQL server has gone away")
+
+    def show_warnings(self):
+        return ()
+
+    def close(self):
+        self.closed = True
+
+def create_db_manager(server: FakeServer) -> DatabaseManager:
+    """创建已连接到模拟服务器的DatabaseManager"""
+    db_manager = DatabaseManager()
+    db_manager.connection = FakeConnection(server)
+    return db_manager
+
+def create_pool(server: FakeServer, **kwargs) -> ConnectionPool:
+    """创建连接到模拟服务器的连接池，参数同ConnectionPool"""
+    return ConnectionPool(connection_factory=lambda: FakeConnection(server), **kwargs)
+
+def create_importer(server: FakeServer, **kwargs) -> ExcelToMySQL:
+    """创建通过连接池连接到模拟服务器的导入器，参数同ConnectionPool"""
+    return ExcelToMySQL(pool=create_pool(server, **kwargs))
+
+def write_csv(header: str, lines: List[str]) -> str:
+    """写入临时CSV文件，返回路径，由调用方删除"""
+    temp_file = tempfile.NamedTemporaryFile(mode='w', suffix='.csv', delete=False, encoding='utf-8')
+    temp_file.write(header + '\n' + ''.join(line + '\n' for line in lines))
+    temp_file.close()
+    return temp_file.name
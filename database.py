@@ -1,27 +1,223 @@
 import pymysql
 import logging
-from typing import List, Dict, Any
+import re
+import threading
+import time
+from collections import deque
+from typing import List, Dict, Any, Callable, Optional, Tuple
 from config import Config
+from bulk_insert import BulkInserter, LoadDataInserter
+from schema_cache import table_key_cache, table_structure_cache
+
+# 会改变表结构的DDL语句
+DDL_PATTERN = re.compile(r'^\s*(CREATE|ALTER|DROP|RENAME|TRUNCATE)\s', re.IGNORECASE)
+
+# DDL语句中表名之前的部分，list组表示之后是逗号（或RENAME的TO）分隔的多个表
+IDENTIFIER = r'(?:`(?:[^`]|``)+`|\w+)'
+DDL_TABLE_PREFIX = re.compile(
+    r'^\s*(?:(?:CREATE|ALTER)\s+(?:TEMPORARY\s+)?TABLE(?:\s+IF\s+NOT\s+EXISTS)?'
+    r'|TRUNCATE(?:\s+TABLE)?'
+    r'|(?P<list>DROP\s+(?:TEMPORARY\s+)?TABLES?(?:\s+IF\s+EXISTS)?|RENAME\s+TABLES?)'
+    rf'|(?:CREATE\s+(?:UNIQUE\s+|FULLTEXT\s+|SPATIAL\s+)?|DROP\s+)INDEX\s+{IDENTIFIER}\s+ON)\s',
+    re.IGNORECASE
+)
+QUALIFIED_NAME = re.compile(rf'\s*({IDENTIFIER})(?:\s*\.\s*({IDENTIFIER}))?')
+TABLE_SEPARATOR = re.compile(r'\s*(?:,|TO\b)', re.IGNORECASE)
+
+ER_NO_SUCH_TABLE = 1146  # MySQL错误码：表不存在
+
+def ddl_tables(sql: str) -> Optional[List[Tuple[Optional[str], str]]]:
+    """DDL语句改变结构的表，返回[(库名或None, 表名)]；不是针对表的DDL或无法识别时返回None"""
+    match = DDL_TABLE_PREFIX.match(sql)
+    if not match:
+        return None
+    tables = []
+    position = match.end()
+    while True:
+        name = QUALIFIED_NAME.match(sql, position)
+        if not name:
+            break
+        parts = [part[1:-1].replace('``', '`') if part.startswith('`') else part
+                 for part in name.groups() if part is not None]
+        tables.append((parts[0], parts[1]) if len(parts) == 2 else (None, parts[0]))
+        position = name.end()
+        separator = TABLE_SEPARATOR.match(sql, position) if match.group('list') else None
+        if not separator:
+            break
+        position = separator.end()
+    return tables or None
+
+def create_connection():
+    """按配置创建一个新的数据库连接"""
+    return pymysql.connect(
+        host=Config.DB_HOST,
+        port=Config.DB_PORT,
+        user=Config.DB_USER,
+        password=Config.DB_PASSWORD,
+        database=Config.DB_NAME,
+        charset=Config.DB_CHARSET,
+        autocommit=True,
+        local_infile=Config.DB_LOCAL_INFILE
+    )
+
+class ConnectionPool:
+    """线程安全的有界数据库连接池，借出时ping检查，回收空闲和过期的连接"""
+    
+    def __init__(self, max_size: int = Config.DB_POOL_SIZE,
+                 timeout: float = Config.DB_POOL_TIMEOUT,
+                 idle_timeout: float = Config.DB_POOL_IDLE_TIMEOUT,
+                 max_lifetime: float = Config.DB_POOL_MAX_LIFETIME,
+                 connection_factory: Callable[[], Any] = create_connection):
+        self.max_size = max_size
+        self.timeout = timeout
+        self.idle_timeout = idle_timeout
+        self.max_lifetime = max_lifetime
+        self.connection_factory = connection_factory
+        self.logger = logging.getLogger(__name__)
+        
+        self._condition = threading.Condition()
+        self._idle = deque()  # (连接, 创建时间, 最后归还时间)，右端是最近归还的连接
+        self._created_at: Dict[int, float] = {}  # id(连接) -> 创建时间
+        self._size = 0
+        self._closed = False
+    
+    def acquire(self, timeout: Optional[float] = None):
+        """借出一个可用连接，没有空闲连接且已达上限时等待"""
+        deadline = time.monotonic() + (self.timeout if timeout is None else timeout)
+        while True:
+            connection = None
+            with self._condition:
+                while True:
+                    if self._closed:
+                        raise RuntimeError("连接池已关闭")
+                    self._evict_expired()
+                    if self._idle:
+                        connection = self._idle.pop()[0]
+                        break
+                    if self._size < self.max_size:
+                        self._size += 1
+                        break
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise TimeoutError(f"等待数据库连接超时，连接池已满（{self.max_size}个）")
+                    self._condition.wait(remaining)
+            
+            if connection is None:
+                return self._create()
+            
+            # 借出前检查连接是否仍然可用，失效则丢弃后重试
+            if self._is_alive(connection):
+                return connection
+            self.logger.warning("连接池中的连接已失效，丢弃后重新获取")
+            self._discard(connection)
+    
+    def release(self, connection):
+        """归还连接，过期或状态异常的连接直接关闭"""
+        if connection is None:
+            return
+        now = time.monotonic()
+        created_at = self._created_at.get(id(connection), now)
+        reusable = not self._closed and now - created_at < self.max_lifetime
+        if reusable:
+            try:
+                # 回滚未提交的事务，避免把脏状态留给下一个使用者
+                connection.rollback()
+            except Exception:
+                reusable = False
+        
+        if not reusable:
+            self._discard(connection)
+            return
+        with self._condition:
+            self._idle.append((connection, created_at, now))
+            self._condition.notify()
+    
+    def close(self):
+        """关闭连接池和所有空闲连接"""
+        with self._condition:
+            self._closed = True
+            idle = [item[0] for item in self._idle]
+            self._idle.clear()
+            self._condition.notify_all()
+        for connection in idle:
+            self._discard(connection)
+        self.logger.info("数据库连接池已关闭")
+    
+    def stats(self) -> Dict[str, int]:
+        """连接池状态"""
+        with self._condition:
+            return {
+                'size': self._size,
+                'idle': len(self._idle),
+                'in_use': self._size - len(self._idle),
+                'max_size': self.max_size
+            }
+    
+    def _create(self):
+        """创建新连接，失败时释放占用的名额"""
+        try:
+            connection = self.connection_factory()
+        except Exception:
+            with self._condition:
+                self._size -= 1
+                self._condition.notify()
+            raise
+        self._created_at[id(connection)] = time.monotonic()
+        self.logger.info(f"连接池创建新连接，当前连接数: {self._size}")
+        return connection
+    
+    def _evict_expired(self):
+        """回收空闲超时或超过最长存活时间的连接（需持有锁）"""
+        now = time.monotonic()
+        kept = deque()
+        for item in self._idle:
+            connection, created_at, last_used = item
+            if now - last_used > self.idle_timeout or now - created_at > self.max_lifetime:
+                self._close_quietly(connection)
+                self._size -= 1
+            else:
+                kept.append(item)
+        self._idle = kept
+    
+    def _is_alive(self, connection) -> bool:
+        """ping检查连接是否可用"""
+        try:
+            connection.ping(reconnect=False)
+            return True
+        except Exception:
+            return False
+    
+    def _discard(self, connection):
+        """关闭连接并释放名额"""
+        self._close_quietly(connection)
+        with self._condition:
+            self._size -= 1
+            self._condition.notify()
+    
+    def _close_quietly(self, connection):
+        """关闭连接，忽略错误"""
+        self._created_at.pop(id(connection), None)
+        try:
+            connection.close()
+        except Exception:
+            pass
 
 class DatabaseManager:
     """数据库管理类"""
     
-    def __init__(self):
+    def __init__(self, pool: Optional[ConnectionPool] = None):
         self.connection = None
+        self.pool = pool
         self.logger = logging.getLogger(__name__)
     
     def connect(self) -> bool:
-        """连接数据库"""
-        try:
-            self.connection = pymysql.connect(
-                host=Config.DB_HOST,
-                port=Config.DB_PORT,
-                user=Config.DB_USER,
-                password=Config.DB_PASSWORD,
-                database=Config.DB_NAME,
-                charset=Config.DB_CHARSET,
-                autocommit=True
-            )
+        """连接数据库，配置了连接池时从池中借出连接"""
+        try:
+            if self.pool is not None:
+                self.connection = self.pool.acquire()
+                self.logger.info("从连接池获取数据库连接成功")
+                return True
+            self.connection = create_connection()
             self.logger.info("数据库连接成功")
             return True
         except Exception as e:
@@ -29,10 +225,32 @@ class DatabaseManager:
             return False
     
     def disconnect(self):
-        """断开数据库连接"""
+        """断开数据库连接，配置了连接池时归还连接"""
         if self.connection:
-            self.connection.close()
-            self.logger.info("数据库连接已断开")
+            if self.pool is not None:
+                self.pool.release(self.connection)
+                self.logger.info("数据库连接已归还连接池")
+            else:
+                self.connection.close()
+                self.logger.info("数据库连接已断开")
+            self.connection = None
+    
+    def connect_partitions(self, count: int) -> List['DatabaseManager']:
+        """
+        为并行写入另外借出最多count个连接，每个连接对应一个DatabaseManager
+        
+        连接池没有空闲名额时不等待，返回实际借到的连接（可能少于count），由调用方disconnect
+        """
+        managers = []
+        for _ in range(count):
+            manager = DatabaseManager(pool=self.pool)
+            try:
+                manager.connection = self.pool.acquire(timeout=0) if self.pool is not None else create_connection()
+            except Exception as e:
+                self.logger.warning(f"并行写入需要{count}个额外连接，只借到{len(managers)}个: {e}")
+                break
+            managers.append(manager)
+        return managers
     
     def execute_sql(self, sql: str, params: tuple | None = None) -> bool:
         """执行SQL语句"""
@@ -43,7 +261,13 @@ class DatabaseManager:
             with self.connection.cursor() as cursor:
                 cursor.execute(sql, params)
                 self.logger.info(f"SQL执行成功: {sql[:100]}...")
-                return True
+            # DDL使涉及的表的结构缓存失效，无法确定涉及哪些表时使当前数据库的缓存失效
+            if DDL_PATTERN.match(sql):
+                tables = ddl_tables(sql)
+                for database, table_name in tables or [(Config.DB_NAME, None)]:
+                    table_structure_cache.invalidate(database or Config.DB_NAME, table_name)
+                    table_key_cache.invalidate(database or Config.DB_NAME, table_name)
+            return True
         except Exception as e:
             self.logger.error(f"SQL执行失败: {e}")
             return False
@@ -76,25 +300,139 @@ class DatabaseManager:
         
         return self.execute_sql(create_sql)
     
+    def build_insert_sql(self, table_name: str, columns: List[str]) -> str:
+        """构建INSERT语句"""
+        columns_str = ', '.join([f"`{col}`" for col in columns])
+        placeholders = ', '.join(['%s'] * len(columns))
+        return f"INSERT INTO `{table_name}` ({columns_str}) VALUES ({placeholders})"
+    
+    def build_upsert_sql(self, table_name: str, columns: List[str], update_columns: List[str]) -> str:
+        """
+        构建INSERT ... ON DUPLICATE KEY UPDATE语句，主键或唯一索引冲突时更新update_columns中的列
+        
+        使用VALUES(列名)而不是MySQL 8.0.19的行别名写法：pymysql只把以ON DUPLICATE结尾的INSERT合并为多行语句
+        """
+        if update_columns:
+            updates = ', '.join([f"`{col}` = VALUES(`{col}`)" for col in update_columns])
+        else:
+            # 没有需要更新的列时把第一列赋值为它原来的值，冲突的行保持不变
+            updates = f"`{columns[0]}` = `{columns[0]}`"
+        return f"{self.build_insert_sql(table_name, columns)} ON DUPLICATE KEY UPDATE {updates}"
+    
     def insert_data(self, table_name: str, columns: List[str], data_list: List[tuple]) -> bool:
-        """插入数据"""
+        """插入数据，按字节大小分批并在事务中提交"""
         if not data_list:
             self.logger.warning("没有数据需要插入")
             return True
+        if not self.connection:
+            self.logger.error("数据库未连接")
+            return False
         
-        # 构建INSERT语句
-        columns_str = ', '.join([f"`{col}`" for col in columns])
-        placeholders = ', '.join(['%s'] * len(columns))
-        insert_sql = f"INSERT INTO `{table_name}` ({columns_str}) VALUES ({placeholders})"
+        inserter = BulkInserter(self, table_name, columns)
+        if not (inserter.insert(data_list) and inserter.finish()):
+            return False
+        self.logger.info(f"批量插入成功，共{inserter.rows_committed}条记录")
+        return True
+    
+    def upsert_data(self, table_name: str, columns: List[str], data_list: List[tuple],
+                    update_columns: Optional[List[str]] = None) -> bool:
+        """插入或更新数据，主键或唯一索引冲突时更新update_columns（默认为不属于任何键的列）"""
+        if not data_list:
+            self.logger.warning("没有数据需要插入")
+            return True
+        if not self.connection:
+            self.logger.error("数据库未连接")
+            return False
         
-        return self.execute_many(insert_sql, data_list)
+        if update_columns is None:
+            update_columns = self.default_update_columns(table_name, columns)
+        inserter = BulkInserter(self, table_name, columns, update_columns=update_columns)
+        if not (inserter.insert(data_list) and inserter.finish()):
+            return False
+        self.logger.info(f"批量插入或更新成功，共{inserter.rows_committed}条记录")
+        return True
     
-    def get_table_structure(self, table_name: str) -> Dict[str, str]:
-        """获取表结构"""
+    def default_update_columns(self, table_name: str, columns: List[str]) -> List[str]:
+        """upsert默认更新的列：不属于主键和任何唯一索引的列"""
+        key_columns = {col for key in self.get_unique_keys(table_name).values() for col in key}
+        return [col for col in columns if col not in key_columns]
+    
+    def load_data_infile(self, table_name: str, columns: List[str], data_list: List[tuple]) -> bool:
+        """通过LOAD DATA LOCAL INFILE导入数据，需要开启DB_LOCAL_INFILE"""
+        if not data_list:
+            self.logger.warning("没有数据需要插入")
+            return True
         if not self.connection:
             self.logger.error("数据库未连接")
-            return {}
+            return False
+        if not Config.DB_LOCAL_INFILE:
+            self.logger.error("未开启DB_LOCAL_INFILE，无法使用LOAD DATA LOCAL INFILE")
+            return False
         
+        loader = LoadDataInserter(self, table_name, columns)
+        if not (loader.insert(data_list) and loader.finish()):
+            return False
+        self.logger.info(f"LOAD DATA导入成功，共{loader.rows_committed}条记录")
+        return True
+    
+    def get_max_allowed_packet(self) -> int:
+        """获取服务器的max_allowed_packet，获取失败时按4MB处理"""
+        default_packet = 4 * 1024 * 1024
+        if not self.connection:
+            return default_packet
+        try:
+            with self.connection.cursor() as cursor:
+                cursor.execute("SELECT @@max_allowed_packet")
+                result = cursor.fetchone()
+                return int(result[0]) if result and result[0] else default_packet
+        except Exception as e:
+            self.logger.warning(f"获取max_allowed_packet失败，按4MB处理: {e}")
+            return default_packet
+    
+    def get_table_structure(self, table_name: str, use_cache: bool = True) -> Dict[str, str]:
+        """获取表结构，默认使用进程级缓存，缓存过期后按表的版本信息（见get_table_version）验证是否需要重新查询"""
+        if not self.connection:
+            self.logger.error("数据库未连接")
+            return {}
+        if not use_cache:
+            return self._query_table_structure(table_name)
+        return table_structure_cache.get(
+            Config.DB_NAME, table_name,
+            fetch_version=lambda: self.get_table_version(table_name),
+            fetch_structure=lambda: self._query_table_structure(table_name)
+        )
+    
+    def get_table_version(self, table_name: str) -> Any:
+        """
+        获取表的版本信息：列（名称、类型、位置）和索引的数量与CRC32校验和，表不存在时返回None
+
+        CREATE_TIME在INSTANT和INPLACE的ALTER后不变，UPDATE_TIME随数据修改变化，都不适合用于判断表结构
+        """
+        if not self.connection:
+            return None
+        try:
+            with self.connection.cursor() as cursor:
+                cursor.execute("""
+                    SELECT
+                        (SELECT CONCAT(COUNT(*), ':', COALESCE(SUM(CRC32(
+                                    CONCAT_WS(',', COLUMN_NAME, COLUMN_TYPE, ORDINAL_POSITION))), 0))
+                         FROM INFORMATION_SCHEMA.COLUMNS
+                         WHERE TABLE_SCHEMA = %s AND TABLE_NAME = %s),
+                        (SELECT CONCAT(COUNT(*), ':', COALESCE(SUM(CRC32(
+                                    CONCAT_WS(',', INDEX_NAME, NON_UNIQUE, SEQ_IN_INDEX, COLUMN_NAME))), 0))
+                         FROM INFORMATION_SCHEMA.STATISTICS
+                         WHERE TABLE_SCHEMA = %s AND TABLE_NAME = %s)
+                """, (Config.DB_NAME, table_name, Config.DB_NAME, table_name))
+                result = cursor.fetchone()
+                if not result or result[0] is None or str(result[0]).startswith('0:'):
+                    return None
+                return tuple(result)
+        except Exception as e:
+            self.logger.warning(f"获取表版本信息失败: {e}")
+            return None
+    
+    def _query_table_structure(self, table_name: str) -> Dict[str, str]:
+        """从INFORMATION_SCHEMA.COLUMNS查询表结构"""
         try:
             with self.connection.cursor() as cursor:
                 # 获取表结构信息
@@ -133,6 +471,121 @@ class DatabaseManager:
             self.logger.error(f"获取表结构失败: {e}")
             return {}
     
+    def get_table_indexes(self, table_name: str) -> Dict[str, Dict[str, Any]]:
+        """
+        从INFORMATION_SCHEMA.STATISTICS查询表的索引，查询失败时返回空字典
+        
+        返回 索引名 -> {'unique': 是否唯一, 'type': BTREE/FULLTEXT等, 'columns': [(列名, 前缀长度, 是否降序)]}，
+        函数索引的列名为None
+        """
+        if not self.connection:
+            self.logger.error("数据库未连接")
+            return {}
+        try:
+            with self.connection.cursor() as cursor:
+                cursor.execute("""
+                    SELECT INDEX_NAME, NON_UNIQUE, INDEX_TYPE, COLUMN_NAME, SUB_PART, COLLATION
+                    FROM INFORMATION_SCHEMA.STATISTICS
+                    WHERE TABLE_SCHEMA = %s AND TABLE_NAME = %s
+                    ORDER BY INDEX_NAME, SEQ_IN_INDEX
+                """, (Config.DB_NAME, table_name))
+                indexes: Dict[str, Dict[str, Any]] = {}
+                for index_name, non_unique, index_type, column_name, sub_part, collation in cursor.fetchall():
+                    index = indexes.setdefault(index_name, {
+                        'unique': not int(non_unique), 'type': index_type, 'columns': []
+                    })
+                    index['columns'].append((column_name, sub_part, collation == 'D'))
+                return indexes
+        except Exception as e:
+            self.logger.error(f"获取表 '{table_name}' 的索引失败: {e}")
+            return {}
+    
+    def get_unique_keys(self, table_name: str, use_cache: bool = True) -> Dict[str, List[str]]:
+        """
+        获取表的主键和唯一索引（索引名 -> 列名列表，主键在前），默认使用进程级缓存；
+        函数索引不能由导入的列确定，不包括在内
+        """
+        if not self.connection:
+            self.logger.error("数据库未连接")
+            return {}
+        
+        def fetch_keys() -> Dict[str, List[str]]:
+            keys = {}
+            for name, index in sorted(self.get_table_indexes(table_name).items(), key=lambda item: item[0] != 'PRIMARY'):
+                columns = [column for column, _, _ in index['columns']]
+                if index['unique'] and None not in columns:
+                    keys[name] = columns
+            return keys
+        
+        if not use_cache:
+            return fetch_keys()
+        return table_key_cache.get(
+            Config.DB_NAME, table_name,
+            fetch_version=lambda: self.get_table_version(table_name),
+            fetch_structure=fetch_keys
+        )
+    
+    def get_foreign_keys(self, table_name: str) -> Dict[str, Dict[str, Any]]:
+        """
+        从INFORMATION_SCHEMA.KEY_COLUMN_USAGE查询表的外键，查询失败时返回空字典
+        
+        返回 约束名 -> {'columns': [列名], 'referenced_table': 被引用的表, 'referenced_columns': [被引用的列]}
+        """
+        if not self.connection:
+            self.logger.error("数据库未连接")
+            return {}
+        try:
+            with self.connection.cursor() as cursor:
+                cursor.execute("""
+                    SELECT CONSTRAINT_NAME, COLUMN_NAME, REFERENCED_TABLE_NAME, REFERENCED_COLUMN_NAME
+                    FROM INFORMATION_SCHEMA.KEY_COLUMN_USAGE
+                    WHERE TABLE_SCHEMA = %s AND TABLE_NAME = %s AND REFERENCED_TABLE_NAME IS NOT NULL
+                    ORDER BY CONSTRAINT_NAME, ORDINAL_POSITION
+                """, (Config.DB_NAME, table_name))
+                foreign_keys: Dict[str, Dict[str, Any]] = {}
+                for constraint_name, column_name, referenced_table, referenced_column in cursor.fetchall():
+                    foreign_key = foreign_keys.setdefault(constraint_name, {
+                        'columns': [], 'referenced_table': referenced_table, 'referenced_columns': []
+                    })
+                    foreign_key['columns'].append(column_name)
+                    foreign_key['referenced_columns'].append(referenced_column)
+                return foreign_keys
+        except Exception as e:
+            self.logger.error(f"获取表 '{table_name}' 的外键失败: {e}")
+            return {}
+    
+    def get_referencing_tables(self, table_name: str) -> Optional[List[str]]:
+        """查询有外键引用该表的其他表，查询失败时返回None"""
+        if not self.connection:
+            self.logger.error("数据库未连接")
+            return None
+        try:
+            with self.connection.cursor() as cursor:
+                cursor.execute("""
+                    SELECT DISTINCT TABLE_NAME FROM INFORMATION_SCHEMA.KEY_COLUMN_USAGE
+                    WHERE REFERENCED_TABLE_SCHEMA = %s AND REFERENCED_TABLE_NAME = %s
+                """, (Config.DB_NAME, table_name))
+                return [row[0] for row in cursor.fetchall()]
+        except Exception as e:
+            self.logger.error(f"查询引用表 '{table_name}' 的外键失败: {e}")
+            return None
+    
+    def table_exists(self, table_name: str) -> Optional[bool]:
+        """从INFORMATION_SCHEMA.TABLES查询表是否存在，查询失败时返回None"""
+        if not self.connection:
+            self.logger.error("数据库未连接")
+            return None
+        try:
+            with self.connection.cursor() as cursor:
+                cursor.execute("""
+                    SELECT TABLE_NAME FROM INFORMATION_SCHEMA.TABLES
+                    WHERE TABLE_SCHEMA = %s AND TABLE_NAME = %s
+                """, (Config.DB_NAME, table_name))
+                return cursor.fetchone() is not None
+        except Exception as e:
+            self.logger.error(f"查询表 '{table_name}' 是否存在失败: {e}")
+            return None
+    
     def get_max_id(self, table_name: str, id_column: str = 'id') -> int:
         """获取表的最大id值，如果没有则返回0"""
         if not self.connection:
@@ -147,4 +600,96 @@ class DatabaseManager:
                 return int(max_id)
         except Exception as e:
             self.logger.error(f"获取表最大id失败: {e}")
-            return 0 
\ No newline at end of file
+            return 0
+
+    def reserve_id_range(self, table_name: str, count: int, id_column: str = 'id') -> Optional[int]:
+        """
+        从序列表原子地预留count个连续id，返回起始id，失败时返回None
+
+        通过 UPDATE ... SET next_id = LAST_INSERT_ID(next_id + count) 预留，行锁只持有到这条语句结束，
+        并发导入同一张表时各自拿到互不重叠的区间，无需重试。序列表不存在时先创建，序列第一次使用时用MAX(id)初始化。
+        必须在自动提交且没有打开事务的连接上调用，否则行锁会持有到事务结束。
+        """
+        if not self.connection:
+            self.logger.error("数据库未连接")
+            return None
+        if count <= 0:
+            return None
+        sequence_table = Config.ID_SEQUENCE_TABLE
+        try:
+            with self.connection.cursor() as cursor:
+                for _ in range(2):
+                    try:
+                        affected = cursor.execute(
+                            f"UPDATE `{sequence_table}` SET next_id = LAST_INSERT_ID(next_id + %s) "
+                            f"WHERE table_name = %s",
+                            (count, table_name)
+                        )
+                    except pymysql.err.ProgrammingError as e:
+                        # 新数据库上序列表还不存在，由_seed_id_sequence创建后重试
+                        if e.args[0] != ER_NO_SUCH_TABLE:
+                            raise
+                        affected = 0
+                    if affected:
+                        cursor.execute("SELECT LAST_INSERT_ID()")
+                        start_id = int(cursor.fetchone()[0]) - count
+                        self.logger.info(f"为表 '{table_name}' 预留id {start_id} - {start_id + count - 1}")
+                        return start_id
+                    self._seed_id_sequence(cursor, table_name, id_column)
+            self.logger.error(f"初始化表 '{table_name}' 的id序列失败")
+            return None
+        except Exception as e:
+            self.logger.error(f"预留id失败: {e}")
+            return None
+
+    def release_id_range(self, table_name: str, start_id: int, end_id: int) -> bool:
+        """
+        归还预留后没有用完的id [start_id, end_id)：序列仍停在end_id（之后没有其他预留）时退回到start_id，
+        否则这些id作废；返回是否归还成功
+        """
+        if not self.connection:
+            return False
+        try:
+            with self.connection.cursor() as cursor:
+                affected = cursor.execute(
+                    f"UPDATE `{Config.ID_SEQUENCE_TABLE}` SET next_id = %s "
+                    f"WHERE table_name = %s AND next_id = %s",
+                    (start_id, table_name, end_id)
+                )
+            return bool(affected)
+        except Exception as e:
+            self.logger.warning(f"归还id失败: {e}")
+            return False
+    
+    def advance_id_sequence(self, table_name: str, min_next_id: int) -> bool:
+        """Excel自带id时把序列推进到这些id之后，避免之后自动分配的id与其冲突"""
+        if not self.connection:
+            self.logger.error("数据库未连接")
+            return False
+        try:
+            with self.connection.cursor() as cursor:
+                cursor.execute(
+                    f"UPDATE `{Config.ID_SEQUENCE_TABLE}` SET next_id = GREATEST(next_id, %s) "
+                    f"WHERE table_name = %s",
+                    (min_next_id, table_name)
+                )
+            return True
+        except Exception as e:
+            self.logger.warning(f"更新id序列失败: {e}")
+            return False
+
+    def _seed_id_sequence(self, cursor, table_name: str, id_column: str):
+        """创建序列表并用表的MAX(id)初始化序列，并发初始化时只有第一条生效"""
+        sequence_table = Config.ID_SEQUENCE_TABLE
+        cursor.execute(f"""
+            CREATE TABLE IF NOT EXISTS `{sequence_table}` (
+                `table_name` VARCHAR(64) NOT NULL PRIMARY KEY,
+                `next_id` BIGINT NOT NULL
+            ) ENGINE=InnoDB
+        """)
+        cursor.execute(
+            f"INSERT IGNORE INTO `{sequence_table}` (table_name, next_id) "
+            f"SELECT %s, COALESCE(MAX(`{id_column}`), 0) + 1 FROM `{table_name}`",
+            (table_name,)
+        )
+        self.logger.info(f"已初始化表 '{table_name}' 的id序列") 
\ No newline at end of file
@@ -0,0 +1,138 @@
+import logging
+from typing import Callable, List, Optional
+import numpy as np
+import pandas as pd
+from table_swap import derived_table_name
+
+INDEX_SUFFIX = '__row_hashes'
+FETCH_ROWS = 100000  # 加载哈希索引时每次取出的行数
+
+def hash_index_table_name(table_name: str) -> str:
+    """目标表对应的行哈希索引表名"""
+    return derived_table_name(table_name, INDEX_SUFFIX)
+
+class RowHashIndex:
+    """
+    增量导入的行哈希索引：每张目标表对应一张 <表名>__row_hashes 侧表，
+    按键列的64位哈希保存上次导入时整行内容的64位哈希和自动分配的id（三列BIGINT UNSIGNED，每行24字节，id未知时为0）
+
+    导入前把索引整体加载为numpy数组，filter对每块数据向量化计算键和内容的哈希并批量查找，
+    只保留新增和内容有变化的行，需要自动生成id时有变化的行沿用记录的id，只为新增的行分配；
+    save在数据提交之后写回本次发送的行的哈希和id，
+    写回失败或中途退出只会使下次导入多发送一些行（upsert可以重复执行），不会漏掉变化。
+    文件中没有的行不会从目标表删除；目标表被其他方式修改后删除侧表即可全量重建
+    """
+
+    def __init__(self, db_manager, table_name: str, key_columns: List[str], hash_columns: List[str],
+                 excel_processor, id_allocator: Optional[Callable[[int], int]] = None):
+        """
+        Args:
+            db_manager: 已连接的DatabaseManager
+            table_name: 目标表
+            key_columns: 标识一行的列（主键或唯一索引的列）
+            hash_columns: 参与内容哈希的列（文件中映射到表的列）
+            excel_processor: 计算行哈希的ExcelProcessor
+            id_allocator: 表有id列时为新增的行分配id，id_allocator(行数)返回起始id（可选）
+        """
+        self.db_manager = db_manager
+        self.table_name = table_name
+        self.index_table = hash_index_table_name(table_name)
+        self.key_columns = list(key_columns)
+        self.hash_columns = list(hash_columns)
+        self.excel_processor = excel_processor
+        self.id_allocator = id_allocator
+        self.logger = logging.getLogger(__name__)
+        self._keys = pd.Index(np.empty(0, dtype=np.uint64))
+        self._hashes = np.empty(0, dtype=np.uint64)
+        self._ids = np.empty(0, dtype=np.uint64)
+        self._pending_keys: List[np.ndarray] = []  # 本次发送的行的键哈希、内容哈希和id，数据提交后写回
+        self._pending_hashes: List[np.ndarray] = []
+        self._pending_ids: List[np.ndarray] = []
+        self.rows_new = 0
+        self.rows_changed = 0
+        self.rows_unchanged = 0
+
+    def load(self) -> bool:
+        """创建（如果不存在）并加载哈希索引"""
+        if not self.db_manager.execute_sql(
+                f"CREATE TABLE IF NOT EXISTS `{self.index_table}` ("
+                f"`row_key` BIGINT UNSIGNED NOT NULL PRIMARY KEY, "
+                f"`row_hash` BIGINT UNSIGNED NOT NULL, "
+                f"`row_id` BIGINT UNSIGNED NOT NULL DEFAULT 0) ENGINE=InnoDB"):
+            return False
+        keys, hashes, ids = [], [], []
+        try:
+            with self.db_manager.connection.cursor() as cursor:
+                cursor.execute(f"SELECT `row_key`, `row_hash`, `row_id` FROM `{self.index_table}`")
+                while True:
+                    rows = cursor.fetchmany(FETCH_ROWS)
+                    if not rows:
+                        break
+                    block = np.array(rows, dtype=np.uint64).reshape(-1, 3)
+                    keys.append(block[:, 0])
+                    hashes.append(block[:, 1])
+                    ids.append(block[:, 2])
+        except Exception as e:
+            self.logger.error(f"加载行哈希索引 '{self.index_table}' 失败: {e}")
+            return False
+        if keys:
+            self._keys = pd.Index(np.concatenate(keys))
+            self._hashes = np.concatenate(hashes)
+            self._ids = np.concatenate(ids)
+        self.logger.info(f"已加载表 '{self.table_name}' 的行哈希索引，共{len(self._keys)}行")
+        return True
+
+    def filter(self, chunk: pd.DataFrame) -> pd.DataFrame:
+        """只保留新增和内容有变化的行，需要时为它们填入id，记录它们的哈希和id等待写回"""
+        keys = self.excel_processor.row_hashes(chunk, self.key_columns)
+        hashes = self.excel_processor.row_hashes(chunk, self.hash_columns)
+        positions = self._keys.get_indexer(keys)
+        known = positions >= 0
+        changed = known & (self._hashes[np.where(known, positions, 0)] != hashes) if len(self._hashes) else known
+        send = ~known | changed
+
+        self.rows_new += int((~known).sum())
+        self.rows_changed += int(changed.sum())
+        self.rows_unchanged += int(len(chunk) - send.sum())
+        chunk = chunk[send]
+        # 有变化的行沿用上次导入时记录的id，新增的行为0
+        ids = np.zeros(len(chunk), dtype=np.uint64)
+        if len(self._ids):
+            ids = np.where(known, self._ids[np.where(known, positions, 0)], np.uint64(0))[send]
+        if self.id_allocator is not None and self.excel_processor.needs_auto_id(chunk):
+            # 已在表中的行不更新id列，只为新增的行分配新id；没有记录id的已有行保持0，分配了也不会写入
+            new = ~known[send]
+            count = int(new.sum())
+            if count:
+                start_id = self.id_allocator(count)
+                ids[new] = np.arange(start_id, start_id + count, dtype=np.uint64)
+            chunk = self.excel_processor.set_auto_ids(chunk, ids.astype(np.int64))
+        self._pending_keys.append(keys[send])
+        self._pending_hashes.append(hashes[send])
+        self._pending_ids.append(ids)
+        return chunk
+
+    def save(self) -> bool:
+        """数据提交之后写回本次发送的行的哈希"""
+        if not self._pending_keys:
+            return True
+        keys = np.concatenate(self._pending_keys)
+        hashes = np.concatenate(self._pending_hashes)
+        ids = np.concatenate(self._pending_ids)
+        if not len(keys):
+            return True
+        rows = list(zip(keys.tolist(), hashes.tolist(), ids.tolist()))
+        if not self.db_manager.upsert_data(self.index_table, ['row_key', 'row_hash', 'row_id'], rows,
+                                           update_columns=['row_hash', 'row_id']):
+            self.logger.warning(f"写回行哈希索引失败，下次导入会重新发送这{len(rows)}行")
+            return False
+        self._pending_keys, self._pending_hashes, self._pending_ids = [], [], []
+        return True
+
+def drop_hash_index(db_manager, table_name: str) -> bool:
+    """删除目标表的行哈希索引，下次增量导入全量重建（以增量以外的模式写入目标表后调用）"""
+    index_table = hash_index_table_name(table_name)
+    # 大多数表从未增量导入过，先查询是否存在，避免每次写入后都执行一条DDL
+    if db_manager.table_exists(index_table) is False:
+        return True
+    return db_manager.execute_sql(f"DROP TABLE IF EXISTS `{index_table}`")
@@ -6,13 +6,17 @@ Excel到MySQL数据导入工具
 """
 
 import asyncio
+import functools
 import json
 import logging
 import sys
-from typing import Any, Dict, List, Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Union
 from pydantic import BaseModel, Field
 
-from excel_to_mysql import ExcelToMySQL
+from excel_to_mysql import CONNECTIONS_PER_IMPORT, ExcelToMySQL, ImportResult
+from database import DatabaseManager, ConnectionPool
+from schema_cache import table_structure_cache
 from config import Config
 from tools import get_tools_schema, get_tool_by_name
 
@@ -30,9 +34,55 @@ logger = logging.getLogger(__name__)
 class DifyMCPServer:
     """Dify兼容的MCP服务器"""
     
-    def __init__(self):
-        self.importer = ExcelToMySQL()
+    def __init__(self, import_workers: int = Config.MCP_IMPORT_WORKERS,
+                 import_queue_size: int = Config.MCP_IMPORT_QUEUE_SIZE):
+        # 连接池归服务器进程所有，所有工具调用共享已建立的连接；至少容纳同时执行的导入各自需要的连接
+        self.pool = ConnectionPool(max_size=max(Config.DB_POOL_SIZE, import_workers * CONNECTIONS_PER_IMPORT))
+        self.importer = ExcelToMySQL(pool=self.pool)
         self.tools_schema = get_tools_schema()
+        
+        # 导入是同步阻塞的，放到有界线程池中执行，避免阻塞事件循环
+        self.import_executor = ThreadPoolExecutor(max_workers=import_workers, thread_name_prefix='excel-import')
+        self.max_pending_imports = import_workers + import_queue_size
+        self.pending_imports = 0
+    
+    def close(self):
+        """等待正在执行的导入结束并关闭连接池"""
+        self.import_executor.shutdown(wait=True)
+        self.pool.close()
+    
+    async def handle_message(self, message: Any) -> Optional[Union[Dict[str, Any], List[Dict[str, Any]]]]:
+        """处理一条JSON-RPC消息，支持批量数组；通知（JSON-RPC 2.0且没有id）不返回响应"""
+        if isinstance(message, list):
+            if not message:
+                return self._error_response(None, -32600, "Invalid Request: empty batch")
+            # 批量请求并发处理，全部完成后按JSON-RPC规范一起返回
+            responses = await asyncio.gather(*(self._handle_single(item) for item in message))
+            responses = [response for response in responses if response is not None]
+            return responses or None
+        return await self._handle_single(message)
+    
+    async def _handle_single(self, request: Any) -> Optional[Dict[str, Any]]:
+        """处理单个请求，并在响应中带上请求的id"""
+        if not isinstance(request, dict) or not isinstance(request.get("method"), str):
+            request_id = request.get("id") if isinstance(request, dict) else None
+            return self._error_response(request_id, -32600, "Invalid Request")
+        
+        response = await self.handle_request(request)
+        if request.get("jsonrpc") == "2.0" and "id" not in request:
+            return None
+        return {"jsonrpc": "2.0", "id": request.get("id"), **response}
+    
+    def _error_response(self, request_id: Any, code: int, message: str) -> Dict[str, Any]:
+        """构造JSON-RPC错误响应"""
+        return {
+            "jsonrpc": "2.0",
+            "id": request_id,
+            "error": {
+                "code": code,
+                "message": message
+            }
+        }
     
     async def handle_request(self, request: Dict[str, Any]) -> Dict[str, Any]:
         """处理Dify请求"""
@@ -75,6 +125,8 @@ class DifyMCPServer:
         
         if tool_name == "import_excel_to_mysql":
             return await self.import_excel_to_mysql(tool_params)
+        elif tool_name == "import_excel_sheets_to_mysql":
+            return await self.import_excel_sheets_to_mysql(tool_params)
         elif tool_name == "get_table_structure":
             return await self.get_table_structure(tool_params)
         elif tool_name == "test_database_connection":
@@ -93,6 +145,10 @@ class DifyMCPServer:
             table_name = params.get("table_name")
             excel_url = params.get("excel_url")
             sheet_name = params.get("sheet_name")
+            engine = params.get("engine")
+            mode = params.get("mode") or "append"
+            update_columns = params.get("update_columns")
+            force = params.get("force", False)
             verbose = params.get("verbose", False)
             
             if not table_name or not excel_url:
@@ -103,50 +159,110 @@ class DifyMCPServer:
                     }
                 }
             
+            # 超过并发和排队上限时直接拒绝，避免任务无限堆积
+            if self.pending_imports >= self.max_pending_imports:
+                logger.warning(f"导入任务已满，拒绝导入: {excel_url}")
+                return {
+                    "result": {
+                        "success": False,
+                        "message": f"导入任务过多（{self.pending_imports}个正在执行或排队），请稍后重试"
+                    }
+                }
+            
             logger.info(f"开始导入Excel文件: {excel_url}")
             logger.info(f"目标表名: {table_name}")
             
             # 执行导入
-            success = self.importer.import_excel_to_mysql(
-                table_name=table_name,
-                excel_file_path=excel_url,
-                sheet_name=sheet_name
-            )
+            self.pending_imports += 1
+            try:
+                result = await self._run_import(
+                    table_name=table_name,
+                    excel_file_path=excel_url,
+                    sheet_name=sheet_name,
+                    engine=engine,
+                    mode=mode,
+                    update_columns=update_columns,
+                    idempotent=Config.IMPORT_LEDGER_ENABLED and not force
+                )
+            finally:
+                self.pending_imports -= 1
             
-            if success:
-                # 获取导入的记录数
-                imported_count = 0
-                try:
-                    with open('excel_to_mysql.log', 'r', encoding='utf-8') as f:
-                        lines = f.readlines()
-                        for line in reversed(lines):
-                            if '成功导入' in line and '条记录' in line:
-                                import re
-                                match = re.search(r'成功导入(\d+)条记录', line)
-                                if match:
-                                    imported_count = int(match.group(1))
-                                break
-                except:
-                    pass
-                
+            if result.success:
+                # 返回导入结果的全部字段，新增字段不需要在这里逐个复制
+                result_data = result.to_dict()
+                result_data["imported_count"] = result.rows_inserted
+                if not result.duplicate:
+                    result_data["message"] = f"成功导入Excel文件到表 '{table_name}'"
+                return {"result": result_data}
+            else:
                 return {
                     "result": {
-                        "success": True,
-                        "message": f"成功导入Excel文件到表 '{table_name}'",
-                        "imported_count": imported_count,
-                        "table_name": table_name
+                        "success": False,
+                        "message": f"导入失败: {result.message}"
                     }
                 }
-            else:
+                
+        except Exception as e:
+            logger.error(f"导入过程中发生错误: {e}")
+            return {
+                "result": {
+                    "success": False,
+                    "message": f"导入失败: {str(e)}"
+                }
+            }
+    
+    async def import_excel_sheets_to_mysql(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        """并行导入Excel的多个工作表"""
+        try:
+            excel_url = params.get("excel_url")
+            table_name = params.get("table_name")
+            sheet_tables = params.get("sheet_tables")
+            
+            if not excel_url or not (table_name or sheet_tables):
+                return {
+                    "error": {
+                        "code": -32602,
+                        "message": "Missing required parameters: excel_url and table_name or sheet_tables"
+                    }
+                }
+            
+            if self.pending_imports >= self.max_pending_imports:
+                logger.warning(f"导入任务已满，拒绝导入: {excel_url}")
                 return {
                     "result": {
                         "success": False,
-                        "message": "导入失败，请检查日志文件获取详细信息"
+                        "message": f"导入任务过多（{self.pending_imports}个正在执行或排队），请稍后重试"
                     }
                 }
+            
+            logger.info(f"开始并行导入Excel文件的多个工作表: {excel_url}")
+            
+            # 导入线程只负责等待，各工作表在独立的进程中解析和写入
+            self.pending_imports += 1
+            try:
+                importer = ExcelToMySQL(pool=self.pool)
+                loop = asyncio.get_running_loop()
+                result = await loop.run_in_executor(
+                    self.import_executor,
+                    functools.partial(importer.import_workbook_sheets, excel_url,
+                                      table_name=table_name, sheet_tables=sheet_tables)
+                )
+            finally:
+                self.pending_imports -= 1
+            
+            result_data = result.to_dict()
+            return {
+                "result": {
+                    "success": result.success,
+                    "message": result.message,
+                    "imported_count": result.rows_inserted,
+                    "timings": result_data["timings"],
+                    "sheets": result_data["sheets"]
+                }
+            }
                 
         except Exception as e:
-            logger.error(f"导入过程中发生错误: {e}")
+            logger.error(f"多工作表导入过程中发生错误: {e}")
             return {
                 "result": {
                     "success": False,
@@ -154,6 +270,33 @@ class DifyMCPServer:
                 }
             }
     
+    async def _run_import(self, **kwargs) -> ImportResult:
+        """在导入线程池中执行同步导入，每个任务使用独立的导入器，共享连接池"""
+        importer = ExcelToMySQL(pool=self.pool)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self.import_executor,
+            functools.partial(importer.import_excel_to_mysql, **kwargs)
+        )
+    
+    def _load_table_structure(self, table_name: str) -> Optional[Dict[str, str]]:
+        """从连接池借出连接查询表结构，连接失败时返回None"""
+        db_manager = DatabaseManager(pool=self.pool)
+        if not db_manager.connect():
+            return None
+        try:
+            return db_manager.get_table_structure(table_name)
+        finally:
+            db_manager.disconnect()
+    
+    def _check_connection(self) -> bool:
+        """从连接池借出连接，借出时会ping检查连接是否可用"""
+        db_manager = DatabaseManager(pool=self.pool)
+        if not db_manager.connect():
+            return False
+        db_manager.disconnect()
+        return True
+    
     async def get_table_structure(self, params: Dict[str, Any]) -> Dict[str, Any]:
         """获取表结构"""
         try:
@@ -167,7 +310,10 @@ class DifyMCPServer:
                     }
                 }
             
-            if not self.importer.db_manager.connect():
+            # 数据库查询在线程中执行，不阻塞事件循环
+            loop = asyncio.get_running_loop()
+            table_structure = await loop.run_in_executor(None, self._load_table_structure, table_name)
+            if table_structure is None:
                 return {
                     "result": {
                         "success": False,
@@ -175,9 +321,6 @@ class DifyMCPServer:
                     }
                 }
             
-            table_structure = self.importer.db_manager.get_table_structure(table_name)
-            self.importer.db_manager.disconnect()
-            
             if table_structure:
                 return {
                     "result": {
@@ -185,7 +328,8 @@ class DifyMCPServer:
                         "message": f"成功获取表 '{table_name}' 的结构",
                         "table_name": table_name,
                         "structure": table_structure,
-                        "column_count": len(table_structure)
+                        "column_count": len(table_structure),
+                        "cache_stats": table_structure_cache.stats()
                     }
                 }
             else:
@@ -208,8 +352,8 @@ class DifyMCPServer:
     async def test_database_connection(self, params: Dict[str, Any]) -> Dict[str, Any]:
         """测试数据库连接"""
         try:
-            if self.importer.db_manager.connect():
-                self.importer.db_manager.disconnect()
+            loop = asyncio.get_running_loop()
+            if await loop.run_in_executor(None, self._check_connection):
                 return {
                     "result": {
                         "success": True,
@@ -236,36 +380,63 @@ class DifyMCPServer:
                 }
             }
 
+def write_response(response: Any):
+    """输出响应到标准输出，每个响应一行"""
+    print(json.dumps(response, ensure_ascii=False))
+    sys.stdout.flush()
+
+async def serve(server: DifyMCPServer, read_line: Callable[[], Awaitable[str]],
+                write: Callable[[Any], None] = write_response):
+    """读取请求并为每条消息创建并发任务，哪个请求先完成就先输出哪个响应"""
+    tasks = set()
+    
+    async def process(line: str):
+        try:
+            message = json.loads(line)
+        except json.JSONDecodeError as e:
+            logger.error(f"解析请求失败: {e}")
+            write(server._error_response(None, -32700, f"Parse error: {str(e)}"))
+            return
+        try:
+            response = await server.handle_message(message)
+        except Exception as e:
+            logger.error(f"处理请求时发生错误: {e}")
+            request_id = message.get("id") if isinstance(message, dict) else None
+            response = server._error_response(request_id, -32603, f"Internal error: {str(e)}")
+        if response is not None:
+            write(response)
+    
+    while True:
+        line = await read_line()
+        if not line:
+            break
+        line = line.strip()
+        if not line:
+            continue
+        task = asyncio.create_task(process(line))
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+    
+    # 输入结束后等待未完成的请求
+    if tasks:
+        await asyncio.gather(*tasks)
+
 async def main():
     """主函数"""
     server = DifyMCPServer()
+    loop = asyncio.get_running_loop()
+    
+    async def read_stdin() -> str:
+        return await loop.run_in_executor(None, sys.stdin.readline)
     
     # 从标准输入读取请求
-    while True:
-        try:
-            line = await asyncio.get_event_loop().run_in_executor(None, sys.stdin.readline)
-            if not line:
-                break
-            
-            request = json.loads(line.strip())
-            response = await server.handle_request(request)
-            
-            # 输出响应到标准输出
-            print(json.dumps(response, ensure_ascii=False))
-            sys.stdout.flush()
-            
-        except KeyboardInterrupt:
-            break
-        except Exception as e:
-            logger.error(f"处理请求时发生错误: {e}")
-            error_response = {
-                "error": {
-                    "code": -32603,
-                    "message": f"Internal error: {str(e)}"
-                }
-            }
-            print(json.dumps(error_response, ensure_ascii=False))
-            sys.stdout.flush()
+    try:
+        await serve(server, read_stdin)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        # 等待导入结束并关闭连接池
+        server.close()
 
 if __name__ == "__main__":
     asyncio.run(main()) 
\ No newline at end of file
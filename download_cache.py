@@ -0,0 +1,272 @@
+import hashlib
+import json
+import logging
+import os
+import re
+import tempfile
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+from config import Config
+from file_formats import file_suffix
+from http_downloader import DownloadError, DownloadTooLargeError, HttpDownloader
+
+# URL没有扩展名时按Content-Type确定缓存文件的扩展名，导入时按扩展名识别格式
+_CONTENT_TYPE_SUFFIXES = {
+    'text/csv': '.csv',
+    'text/tab-separated-values': '.tsv',
+    'application/x-ndjson': '.jsonl',
+    'application/jsonl': '.jsonl',
+    'application/vnd.apache.parquet': '.parquet',
+    'application/vnd.ms-excel': '.xls',
+    'application/vnd.ms-excel.sheet.binary.macroenabled.12': '.xlsb',
+}
+
+@dataclass
+class CachedFile:
+    """缓存中的下载文件"""
+    path: str
+    sha256: str
+    size: int
+    status: str  # hit：未过期直接使用；revalidated：服务器返回304；downloaded：重新下载
+
+class DownloadCache:
+    """
+    按URL缓存下载文件的磁盘缓存，多个进程可以共用同一个目录
+
+    文件按内容的SHA-256保存（blobs/<sha256><扩展名>），内容相同的URL共用一个文件；
+    每个URL一个元数据文件（urls/<URL的SHA-256>.json）记录ETag、Last-Modified和验证时间。
+    有效期内直接使用缓存，过期后带If-None-Match/If-Modified-Since条件请求，服务器返回304时不重新下载；
+    总大小超过上限时按最近使用时间淘汰，正在使用的文件不会被淘汰
+    """
+
+    def __init__(self, cache_dir: str = Config.DOWNLOAD_CACHE_DIR,
+                 max_bytes: int = int(Config.DOWNLOAD_CACHE_MAX_MB * 1024 * 1024),
+                 ttl: float = Config.DOWNLOAD_CACHE_TTL,
+                 downloader: Optional[HttpDownloader] = None):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.downloader = downloader or HttpDownloader()
+        self.logger = logging.getLogger(__name__)
+        self._lock = threading.Lock()
+        self._url_locks: Dict[str, threading.Lock] = {}
+        self._pins: Dict[str, int] = {}  # 文件路径 -> 正在使用的次数
+        self._stats = {'hits': 0, 'revalidations': 0, 'downloads': 0, 'evictions': 0, 'errors': 0}
+
+    def fetch(self, url: str) -> CachedFile:
+        """
+        获取URL对应的本地文件，下载失败且没有缓存时抛出DownloadError
+
+        返回的文件在调用release之前不会被淘汰；同一个URL的并发请求只下载一次
+        """
+        key = hashlib.sha256(url.encode('utf-8')).hexdigest()
+        with self._url_lock(key):
+            entry = self._load_entry(key)
+            if entry is not None and not os.path.exists(entry['path']):
+                entry = None
+
+            if entry is not None and time.time() - entry['validated_at'] < entry['fresh_seconds']:
+                return self._use(entry, 'hit')
+
+            try:
+                return self._download(url, key, entry)
+            except Exception as e:
+                self._count('errors')
+                if entry is not None and not isinstance(e, DownloadTooLargeError):
+                    # 服务器不可用时使用缓存的旧版本
+                    self.logger.warning(f"重新验证失败，使用缓存的文件: {url}，{e}")
+                    return self._use(entry, 'hit')
+                self.logger.error(f"下载文件失败: {url}，{e}")
+                if isinstance(e, DownloadError):
+                    raise
+                raise DownloadError(str(e)) from e
+
+    def release(self, cached: Optional[CachedFile]):
+        """使用完缓存文件，之后允许淘汰"""
+        if cached is None:
+            return
+        with self._lock:
+            count = self._pins.get(cached.path, 0) - 1
+            if count > 0:
+                self._pins[cached.path] = count
+            else:
+                self._pins.pop(cached.path, None)
+
+    def stats(self) -> Dict[str, Any]:
+        """缓存命中统计"""
+        with self._lock:
+            return dict(self._stats)
+
+    def clear(self):
+        """删除所有缓存文件并清空统计"""
+        for directory in ('urls', 'blobs'):
+            path = os.path.join(self.cache_dir, directory)
+            if not os.path.isdir(path):
+                continue
+            for name in os.listdir(path):
+                try:
+                    os.remove(os.path.join(path, name))
+                except OSError:
+                    pass
+        with self._lock:
+            for name in self._stats:
+                self._stats[name] = 0
+
+    def _download(self, url: str, key: str, entry: Optional[Dict[str, Any]]) -> CachedFile:
+        """带条件请求头下载，服务器返回304时使用缓存"""
+        headers = {}
+        if entry is not None:
+            if entry.get('etag'):
+                headers['If-None-Match'] = entry['etag']
+            if entry.get('last_modified'):
+                headers['If-Modified-Since'] = entry['last_modified']
+
+        blobs_dir = os.path.join(self.cache_dir, 'blobs')
+        os.makedirs(blobs_dir, exist_ok=True)
+        download = self.downloader.download_sync(url, headers, temp_dir=blobs_dir)
+        if download.not_modified:
+            if entry is None:
+                raise DownloadError("服务器返回304，但没有缓存的文件")
+            entry['validated_at'] = time.time()
+            entry['fresh_seconds'] = self._fresh_seconds(download.headers)
+            self._save_entry(key, entry)
+            self.logger.info(f"文件未修改，使用缓存: {url}")
+            return self._use(entry, 'revalidated')
+
+        suffix = file_suffix(url) or self._suffix_from_content_type(download.headers.get('Content-Type'))
+        path = os.path.join(blobs_dir, download.sha256 + suffix)
+        try:
+            if os.path.exists(path):
+                # 内容与已缓存的文件相同，不再保存一份
+                download.discard()
+            elif download.path is not None:
+                os.replace(download.path, path)
+            else:
+                self._write_atomic(path, download.data)
+        finally:
+            download.discard()
+
+        entry = {
+            'url': url,
+            'path': path,
+            'sha256': download.sha256,
+            'size': download.size,
+            'etag': download.headers.get('ETag'),
+            'last_modified': download.headers.get('Last-Modified'),
+            'validated_at': time.time(),
+            'fresh_seconds': self._fresh_seconds(download.headers),
+        }
+        self._save_entry(key, entry)
+        self._count('downloads')
+        self.logger.info(f"已下载并缓存文件: {url}，{download.size}字节，SHA-256: {download.sha256}")
+        cached = self._use(entry, 'downloaded')
+        self._evict()
+        return cached
+
+    def _write_atomic(self, path: str, data: bytes):
+        """先写入临时文件再重命名，其他进程不会读到写了一半的文件"""
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.part')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(temp_path, path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+    def _use(self, entry: Dict[str, Any], status: str) -> CachedFile:
+        """标记文件正在使用，并更新最近使用时间"""
+        with self._lock:
+            self._pins[entry['path']] = self._pins.get(entry['path'], 0) + 1
+            if status == 'hit':
+                self._stats['hits'] += 1
+            elif status == 'revalidated':
+                self._stats['revalidations'] += 1
+        try:
+            os.utime(entry['path'])
+        except OSError:
+            pass
+        return CachedFile(path=entry['path'], sha256=entry['sha256'], size=entry['size'], status=status)
+
+    def _evict(self):
+        """总大小超过上限时按最近使用时间删除文件，正在使用的文件保留"""
+        blobs_dir = os.path.join(self.cache_dir, 'blobs')
+        files = []
+        for name in os.listdir(blobs_dir):
+            if name.endswith('.part'):
+                continue
+            path = os.path.join(blobs_dir, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in files)
+        if total <= self.max_bytes:
+            return
+        with self._lock:
+            pinned = set(self._pins)
+        for _, size, path in sorted(files):
+            if total <= self.max_bytes:
+                break
+            if path in pinned:
+                continue
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            self._count('evictions')
+            self.logger.info(f"下载缓存超过上限，已删除: {path}")
+
+    def _fresh_seconds(self, headers) -> float:
+        """响应的有效期：服务器要求每次验证时为0，有max-age时使用max-age，否则使用配置的有效期"""
+        cache_control = (headers.get('Cache-Control') or '').lower()
+        if 'no-cache' in cache_control or 'no-store' in cache_control:
+            return 0.0
+        match = re.search(r'max-age=(\d+)', cache_control)
+        if match:
+            return float(match.group(1))
+        return self.ttl
+
+    def _suffix_from_content_type(self, content_type: Optional[str]) -> str:
+        """按Content-Type确定扩展名，无法确定时按xlsx处理"""
+        media_type = (content_type or '').split(';', 1)[0].strip().lower()
+        return _CONTENT_TYPE_SUFFIXES.get(media_type, '.xlsx')
+
+    def _url_lock(self, key: str) -> threading.Lock:
+        """每个URL一把锁，同一个URL的并发请求排队，只有第一个请求下载"""
+        with self._lock:
+            return self._url_locks.setdefault(key, threading.Lock())
+
+    def _entry_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, 'urls', key + '.json')
+
+    def _load_entry(self, key: str) -> Optional[Dict[str, Any]]:
+        """读取URL的元数据，不存在或损坏时返回None"""
+        try:
+            with open(self._entry_path(key), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _save_entry(self, key: str, entry: Dict[str, Any]):
+        """原子地写入URL的元数据，其他进程不会读到写了一半的文件"""
+        path = self._entry_path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.part')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(entry, f, ensure_ascii=False)
+        os.replace(temp_path, path)
+
+    def _count(self, name: str):
+        """累加统计计数"""
+        with self._lock:
+            self._stats[name] += 1
+
+# 进程内共享的下载缓存
+download_cache = DownloadCache()
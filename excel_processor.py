@@ -1,7 +1,54 @@
+import numpy as np
 import pandas as pd
+import decimal
+import importlib
+import io
+import json
 import logging
-from typing import List, Dict, Any, Tuple
+import numbers
+import openpyxl
+import posixpath
+import warnings
+import zipfile
+from xml.etree import ElementTree
+from openpyxl.utils.cell import column_index_from_string
+from typing import List, Dict, Any, Tuple, Iterator, Callable
 from config import Config
+from reader_engines import ReaderEngine, select_engine
+from file_formats import detect_file_format, is_parquet_available, open_text
+from urllib.request import urlopen
+
+def _local_name(tag: str) -> str:
+    """去掉XML标签或属性名的命名空间"""
+    return tag.rsplit('}', 1)[-1]
+
+def _to_text(value: Any) -> Any:
+    """字符串列中的数字转换为文本，整数值的浮点数不带小数部分；其他值不变"""
+    if isinstance(value, (bool, np.bool_)) or not isinstance(value, numbers.Number):
+        return value
+    if isinstance(value, numbers.Integral):
+        return str(int(value))
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+def _to_decimal(value: Any) -> decimal.Decimal | None:
+    """转换为Decimal，浮点数按最短表示转换（0.1而不是0.1000000000000000055...），无法转换时返回None"""
+    if isinstance(value, decimal.Decimal):
+        return value
+    if isinstance(value, (bool, np.bool_)):
+        return None
+    try:
+        if isinstance(value, numbers.Integral):
+            return decimal.Decimal(int(value))
+        if isinstance(value, float):
+            return decimal.Decimal(repr(value)) if np.isfinite(value) else None
+        if isinstance(value, str):
+            converted = decimal.Decimal(value.strip())
+            return converted if converted.is_finite() else None
+    except decimal.InvalidOperation:
+        return None
+    return None
 
 class ExcelProcessor:
     """Excel数据处理类"""
@@ -9,15 +56,19 @@ class ExcelProcessor:
     def __init__(self):
         self.logger = logging.getLogger(__name__)
     
-    def read_excel(self, file_path: str, sheet_name: str | None = None) -> pd.DataFrame | None:
-        """读取Excel文件"""
+    def read_excel(self, file_path: str, sheet_name: str | None = None,
+                   table_structure: Dict[str, str] | None = None,
+                   engine: str = 'auto') -> pd.DataFrame | None:
+        """读取Excel文件，提供表结构时只读取表中存在的列，并按列类型转换数据类型"""
         try:
             # 读取Excel文件，第一行作为列名，从第二行开始读取数据
             result = pd.read_excel(
                 file_path,
                 sheet_name=sheet_name,
                 header=0,  # 第一行作为列名
-                skiprows=0  # 不跳过任何行，让pandas自动处理
+                skiprows=0,  # 不跳过任何行，让pandas自动处理
+                usecols=(lambda col: col in table_structure) if table_structure else None,
+                engine=None if engine == 'auto' else engine
             )
             
             # 如果sheet_name为None，pandas会返回第一个工作表
@@ -27,6 +78,9 @@ class ExcelProcessor:
             else:
                 df = result
                 
+            if table_structure:
+                df = self.apply_dtype_hints(df, self.get_dtype_hints(table_structure))
+            
             self.logger.info(f"成功读取Excel文件: {file_path}")
             # 打印Excel文件中的列名
             self.logger.info(f"Excel文件中的列名: {list(df.columns)}")
@@ -42,60 +96,569 @@ class ExcelProcessor:
             self.logger.error(f"读取Excel文件失败: {e}")
             return None
     
+    def read_chunks(self, file_path: str, sheet_name: str | None = None,
+                    chunk_size: int = Config.EXCEL_CHUNK_SIZE,
+                    table_structure: Dict[str, str] | None = None,
+                    engine: str = 'auto') -> Iterator[pd.DataFrame]:
+        """
+        按文件格式（见file_formats）分块读取数据文件，产出的DataFrame与read_excel_chunks一致
+        
+        CSV、TSV、JSONL和Parquet没有工作表，忽略sheet_name和engine
+        """
+        file_format = detect_file_format(file_path)
+        if file_format in ('csv', 'tsv'):
+            yield from self.read_delimited_chunks(file_path, '\t' if file_format == 'tsv' else ',',
+                                                  chunk_size, table_structure)
+        elif file_format == 'jsonl':
+            yield from self.read_jsonl_chunks(file_path, chunk_size, table_structure)
+        elif file_format == 'parquet':
+            yield from self.read_parquet_chunks(file_path, chunk_size, table_structure)
+        else:
+            yield from self.read_excel_chunks(file_path, sheet_name, chunk_size, table_structure, engine)
+    
+    def read_delimited_chunks(self, file_path: str, sep: str = ',',
+                              chunk_size: int = Config.EXCEL_CHUNK_SIZE,
+                              table_structure: Dict[str, str] | None = None) -> Iterator[pd.DataFrame]:
+        """
+        用pandas的C解析器分块读取CSV/TSV（chunk_size<=0时整个文件作为一块）
+        
+        所有列先按文本读取，只有空字段视为空值，再按表结构的列类型转换，
+        避免"00123"这样的编码被当作数字、"NA"被当作空值
+        """
+        options = dict(
+            sep=sep,
+            dtype=str,
+            keep_default_na=False,
+            na_values=[''],
+            encoding=Config.CSV_ENCODING,
+            usecols=(lambda col: col in table_structure) if table_structure else None,
+        )
+        dtype_hints = self.get_dtype_hints(table_structure) if table_structure else {}
+        file_type = 'TSV' if sep == '\t' else 'CSV'
+        self.logger.info(f"开始分块读取{file_type}文件: {file_path}，每块{chunk_size}行")
+        try:
+            if chunk_size <= 0:
+                yield self._finish_chunk(pd.read_csv(file_path, **options), dtype_hints)
+                return
+            with pd.read_csv(file_path, chunksize=chunk_size, **options) as reader:
+                for chunk in reader:
+                    yield self._finish_chunk(chunk, dtype_hints)
+        except pd.errors.EmptyDataError:
+            self.logger.warning(f"文件为空: {file_path}")
+    
+    def read_jsonl_chunks(self, file_path: str, chunk_size: int = Config.EXCEL_CHUNK_SIZE,
+                          table_structure: Dict[str, str] | None = None) -> Iterator[pd.DataFrame]:
+        """
+        逐行解析JSON Lines文件（每行一个JSON对象），按固定行数分块产出DataFrame
+        
+        列由第一块中出现的键确定，之后的块缺少的键为空值、多出的键忽略；
+        值保持JSON中的类型（大整数不会变成浮点数），嵌套的对象和数组序列化为JSON字符串
+        """
+        dtype_hints = self.get_dtype_hints(table_structure) if table_structure else {}
+        columns = None
+        buffer = []
+        self.logger.info(f"开始分块读取JSONL文件: {file_path}，每块{chunk_size}行")
+        with open_text(file_path, 'utf-8-sig') as source:
+            for line_number, line in enumerate(source, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError as e:
+                    raise ValueError(f"第{line_number}行不是有效的JSON: {e}")
+                if not isinstance(record, dict):
+                    raise ValueError(f"第{line_number}行不是JSON对象")
+                buffer.append(record)
+                if 0 < chunk_size <= len(buffer):
+                    if columns is None:
+                        columns = self._jsonl_columns(buffer, table_structure)
+                    yield self._finish_chunk(self._jsonl_frame(buffer, columns), dtype_hints)
+                    buffer = []
+        if buffer:
+            if columns is None:
+                columns = self._jsonl_columns(buffer, table_structure)
+            yield self._finish_chunk(self._jsonl_frame(buffer, columns), dtype_hints)
+    
+    def _jsonl_columns(self, records: List[dict], table_structure: Dict[str, str] | None) -> List[str]:
+        """按键第一次出现的顺序确定列，提供表结构时只保留表中存在的列"""
+        columns = list(dict.fromkeys(key for record in records for key in record))
+        if table_structure:
+            columns = [column for column in columns if column in table_structure]
+        return columns
+    
+    def _jsonl_frame(self, records: List[dict], columns: List[str]) -> pd.DataFrame:
+        """把JSON对象列表转换为DataFrame，嵌套值转换为JSON字符串"""
+        df = pd.DataFrame(records, columns=columns, dtype=object)
+        for position in range(df.shape[1]):
+            series = df.iloc[:, position]
+            nested = series.map(lambda value: isinstance(value, (dict, list)))
+            if nested.any():
+                df.isetitem(position, series.where(
+                    ~nested, series[nested].map(lambda value: json.dumps(value, ensure_ascii=False))
+                ))
+        return df
+    
+    def read_parquet_chunks(self, file_path: str, chunk_size: int = Config.EXCEL_CHUNK_SIZE,
+                            table_structure: Dict[str, str] | None = None) -> Iterator[pd.DataFrame]:
+        """
+        用pyarrow按行组分批读取Parquet文件（chunk_size<=0时整个文件作为一块）
+        
+        列式存储只解码表中存在的列，值已经带有类型，不需要再从文本推断
+        """
+        parquet_file = self._open_parquet(file_path)
+        try:
+            columns = list(parquet_file.schema_arrow.names)
+            if table_structure:
+                columns = [column for column in columns if column in table_structure]
+            dtype_hints = self.get_dtype_hints(table_structure) if table_structure else {}
+            self.logger.info(f"开始分批读取Parquet文件: {file_path}，共{parquet_file.metadata.num_rows}行")
+            if chunk_size <= 0:
+                yield self._finish_chunk(parquet_file.read(columns=columns).to_pandas(), dtype_hints)
+                return
+            for batch in parquet_file.iter_batches(batch_size=chunk_size, columns=columns):
+                yield self._finish_chunk(batch.to_pandas(), dtype_hints)
+        finally:
+            parquet_file.close()
+    
+    def _open_parquet(self, file_path: str):
+        """打开Parquet文件；元数据在文件末尾，URL需要先完整下载到内存"""
+        if not is_parquet_available():
+            raise ValueError("读取Parquet文件需要安装pyarrow")
+        parquet = importlib.import_module('pyarrow.parquet')
+        if file_path.startswith(('http://', 'https://')):
+            with urlopen(file_path) as response:
+                return parquet.ParquetFile(io.BytesIO(response.read()))
+        return parquet.ParquetFile(file_path)
+    
+    def _finish_chunk(self, chunk: pd.DataFrame, dtype_hints: Dict[str, str]) -> pd.DataFrame:
+        """跳过整行为空的行（与Excel读取一致），再按类型提示转换"""
+        if len(chunk) and chunk.shape[1]:
+            blank_rows = chunk.isna().all(axis=1)
+            if blank_rows.any():
+                chunk = chunk[~blank_rows].reset_index(drop=True)
+        return self.apply_dtype_hints(chunk, dtype_hints)
+    
+    def read_excel_chunks(self, file_path: str, sheet_name: str | None = None,
+                          chunk_size: int = Config.EXCEL_CHUNK_SIZE,
+                          table_structure: Dict[str, str] | None = None,
+                          engine: str = 'auto') -> Iterator[pd.DataFrame]:
+        """
+        流式读取Excel文件，按固定行数分块产出DataFrame（chunk_size<=0时整表作为一块）
+        
+        本地文件使用读取引擎逐行读取（见reader_engines，engine为auto时按文件类型和大小自动选择）；
+        提供表结构时只保留表中存在的列（不会插入的列不构造DataFrame、不清理、不转换），
+        并按MySQL列类型转换每块的数据类型
+        """
+        reader = None
+        if not file_path.startswith(('http://', 'https://')):
+            reader = select_engine(file_path, engine)
+        if reader is None:
+            # URL或没有可用读取引擎的文件，退回pandas整表读取后再分块
+            if chunk_size > 0:
+                self.logger.info(f"文件不支持流式读取，改为整表读取后分块: {file_path}")
+            df = self.read_excel(file_path, sheet_name, table_structure, engine)
+            if df is None:
+                raise ValueError(f"读取Excel文件失败: {file_path}")
+            if chunk_size <= 0:
+                yield df
+                return
+            for start in range(0, len(df), chunk_size):
+                yield df.iloc[start:start + chunk_size]
+            return
+        
+        rows = self._iter_sheet_rows(reader, file_path, sheet_name, table_structure)
+        try:
+            columns = next(rows, None)
+            if columns is None:
+                self.logger.warning(f"工作表为空: {file_path}")
+                return
+            self.logger.info(f"开始使用{reader.name}引擎流式读取Excel文件: {file_path}，每块{chunk_size}行")
+            self.logger.info(f"读取的列: {columns}")
+            dtype_hints = self.get_dtype_hints(table_structure) if table_structure else {}
+            
+            buffer = []
+            total_rows = 0
+            for row in rows:
+                # 跳过整行为空的行，与pandas的行为保持一致
+                if all(value is None for value in row):
+                    continue
+                buffer.append(row)
+                if 0 < chunk_size <= len(buffer):
+                    total_rows += len(buffer)
+                    yield self.apply_dtype_hints(pd.DataFrame.from_records(buffer, columns=columns), dtype_hints)
+                    buffer = []
+            if buffer:
+                total_rows += len(buffer)
+                yield self.apply_dtype_hints(pd.DataFrame.from_records(buffer, columns=columns), dtype_hints)
+            
+            self.logger.info(f"流式读取完成，共{total_rows}行数据")
+        finally:
+            rows.close()
+    
+    def _iter_sheet_rows(self, reader: ReaderEngine, file_path: str, sheet_name: str | None = None,
+                         table_structure: Dict[str, str] | None = None) -> Iterator[Any]:
+        """
+        用读取引擎逐行读取工作表，先产出要读取的列名，再产出只包含这些列的值元组，工作表为空时不产出任何内容
+        
+        提供表结构时只保留表中存在的列（列投影），openpyxl引擎只解析这些列的单元格
+        """
+        selected = []
+        
+        def select_columns(header: tuple) -> List[int]:
+            columns = self._normalize_header(header)
+            positions = list(range(len(columns)))
+            if table_structure:
+                positions = [i for i, col in enumerate(columns) if col in table_structure]
+                if len(positions) < len(columns):
+                    self.logger.info(f"列投影：只读取表中存在的{len(positions)}/{len(columns)}列")
+            selected.append([columns[i] for i in positions])
+            return positions
+        
+        rows = reader.iter_rows(file_path, sheet_name, select_columns)
+        try:
+            first_row = next(rows, None)
+            if not selected:
+                return
+            yield selected[0]
+            if first_row is not None:
+                yield first_row
+                yield from rows
+        finally:
+            rows.close()
+    
+    def probe_header(self, file_path: str, sheet_name: str | None = None) -> List[Any] | None:
+        """
+        只读取工作表的第一行（表头），不解析任何数据行，无法读取时返回None
+        
+        xlsx直接流式解析压缩包中的工作表XML，读到第一行就停止；共享字符串表也只读取到表头用到的位置，
+        大文件也能在毫秒级完成。CSV/TSV只解析第一行，Parquet读取文件元数据中的列名；
+        JSONL每行的键可以不同，无法只凭第一行判断，返回None。其他格式退回pandas的nrows=0
+        """
+        if file_path.startswith(('http://', 'https://')):
+            return None
+        file_format = detect_file_format(file_path)
+        if file_format == 'jsonl':
+            return None
+        try:
+            if file_format in ('csv', 'tsv'):
+                df = pd.read_csv(file_path, sep='\t' if file_format == 'tsv' else ',', nrows=0,
+                                 encoding=Config.CSV_ENCODING)
+                return list(df.columns)
+            if file_format == 'parquet':
+                parquet_file = self._open_parquet(file_path)
+                try:
+                    return list(parquet_file.schema_arrow.names)
+                finally:
+                    parquet_file.close()
+            if file_path.lower().endswith(('.xlsx', '.xlsm')):
+                header = self._probe_xlsx_header(file_path, sheet_name)
+            else:
+                reader = select_engine(file_path)
+                if reader is None:
+                    df = pd.read_excel(file_path, sheet_name=sheet_name or 0, nrows=0)
+                    return list(df.columns)
+                # 读取引擎读到表头后不选择任何列，立即停止
+                headers = []
+                rows = reader.iter_rows(file_path, sheet_name, lambda row: headers.append(row) or [])
+                next(rows, None)
+                rows.close()
+                if not headers:
+                    return []
+                header = headers[0]
+        except Exception as e:
+            self.logger.warning(f"读取表头失败: {e}")
+            return None
+        return self._normalize_header(header)
+    
+    def find_missing_columns(self, columns: List[Any], table_structure: Dict[str, str]) -> List[str]:
+        """检查表结构中的列是否都在Excel表头中，返回缺少的列；没有id列时会自动生成，不算缺少"""
+        missing_columns = [column for column in table_structure if column not in columns]
+        if 'id' in missing_columns and not any(str(col).lower() in ['id', 'id_', '_id'] for col in columns):
+            missing_columns.remove('id')
+        return missing_columns
+    
+    def _probe_xlsx_header(self, file_path: str, sheet_name: str | None) -> tuple:
+        """从xlsx压缩包中读取工作表的第一个非空行（与流式读取相同，开头的空行不作为表头）"""
+        with zipfile.ZipFile(file_path) as archive:
+            sheet_path = self._find_sheet_path(archive, sheet_name)
+            
+            cells = []  # (列号, 类型, 值)
+            with archive.open(sheet_path) as source:
+                for _, element in ElementTree.iterparse(source):
+                    tag = _local_name(element.tag)
+                    if tag == 'c':
+                        coordinate = element.get('r')
+                        column = column_index_from_string(coordinate.rstrip('0123456789')) if coordinate \
+                            else (cells[-1][0] + 1 if cells else 1)
+                        data_type = element.get('t', 'n')
+                        if data_type == 'inlineStr':
+                            value = ''.join(node.text or '' for node in element.iter() if _local_name(node.tag) == 't')
+                        else:
+                            value = next((node.text for node in element if _local_name(node.tag) == 'v'), None)
+                        cells.append((column, data_type, value))
+                    elif tag == 'row':
+                        if any(value not in (None, '') for _, _, value in cells):
+                            break
+                        # 没有值的行（只有格式）跳过，继续找表头
+                        cells = []
+                        element.clear()
+            
+            # 只读取表头用到的共享字符串
+            string_indexes = [int(value) for _, data_type, value in cells if data_type == 's' and value is not None]
+            shared_strings = self._read_shared_strings(archive, max(string_indexes)) if string_indexes else []
+        
+        header = [None] * (cells[-1][0] if cells else 0)
+        for column, data_type, value in cells:
+            if value is None:
+                continue
+            if data_type == 's':
+                value = shared_strings[int(value)]
+            elif data_type == 'n':
+                value = float(value) if '.' in value or 'E' in value.upper() else int(value)
+            elif data_type == 'b':
+                value = value == '1'
+            header[column - 1] = value
+        return tuple(header)
+    
+    def _find_sheet_path(self, archive: zipfile.ZipFile, sheet_name: str | None) -> str:
+        """根据workbook.xml和关系文件找到工作表XML在压缩包中的路径"""
+        workbook = ElementTree.fromstring(archive.read('xl/workbook.xml'))
+        sheets = [node for node in workbook.iter() if _local_name(node.tag) == 'sheet']
+        if sheet_name:
+            sheets = [node for node in sheets if node.get('name') == sheet_name]
+        if not sheets:
+            raise ValueError(f"工作表不存在: {sheet_name}")
+        relation_id = next(value for key, value in sheets[0].attrib.items() if _local_name(key) == 'id')
+        
+        relations = ElementTree.fromstring(archive.read('xl/_rels/workbook.xml.rels'))
+        target = next(node.get('Target') for node in relations.iter() if node.get('Id') == relation_id)
+        return target.lstrip('/') if target.startswith('/') else posixpath.normpath(posixpath.join('xl', target))
+    
+    def _read_shared_strings(self, archive: zipfile.ZipFile, max_index: int) -> List[str]:
+        """流式读取共享字符串表，读到max_index为止"""
+        strings = []
+        with archive.open('xl/sharedStrings.xml') as source:
+            for _, element in ElementTree.iterparse(source):
+                if _local_name(element.tag) != 'si':
+                    continue
+                # 富文本由多个<r><t>组成，拼接所有文本（不含拼音标注<rPh>）
+                texts = []
+                for child in element:
+                    if _local_name(child.tag) == 't':
+                        texts.append(child.text or '')
+                    elif _local_name(child.tag) == 'r':
+                        texts.extend(node.text or '' for node in child if _local_name(node.tag) == 't')
+                strings.append(''.join(texts))
+                element.clear()
+                if len(strings) > max_index:
+                    break
+        return strings
+    
+    def estimate_row_count(self, file_path: str, sheet_name: str | None = None) -> int | None:
+        """根据xlsx工作表的维度信息估算数据行数（不含表头），只读取工作表XML的开头，无法估算时返回None"""
+        if file_path.startswith(('http://', 'https://')):
+            return None
+        if detect_file_format(file_path) == 'parquet':
+            # Parquet元数据中记录了准确的行数
+            try:
+                parquet_file = self._open_parquet(file_path)
+                try:
+                    return parquet_file.metadata.num_rows
+                finally:
+                    parquet_file.close()
+            except Exception as e:
+                self.logger.warning(f"读取Parquet行数失败: {e}")
+                return None
+        if not file_path.lower().endswith(('.xlsx', '.xlsm')):
+            return None
+        try:
+            with zipfile.ZipFile(file_path) as archive:
+                with archive.open(self._find_sheet_path(archive, sheet_name)) as source:
+                    for _, element in ElementTree.iterparse(source, events=('start',)):
+                        tag = _local_name(element.tag)
+                        if tag == 'dimension':
+                            last_cell = element.get('ref', '').split(':')[-1]
+                            max_row = int(last_cell.lstrip('ABCDEFGHIJKLMNOPQRSTUVWXYZ$') or 0)
+                            return max(max_row - 1, 0) if max_row else None
+                        if tag == 'sheetData':
+                            return None
+        except Exception as e:
+            self.logger.warning(f"估算Excel行数失败: {e}")
+        return None
+    
+    def list_sheet_names(self, file_path: str) -> List[str]:
+        """获取Excel文件中所有工作表的名称，xlsx使用只读模式，不读取单元格数据"""
+        if not file_path.startswith(('http://', 'https://')) and file_path.lower().endswith(('.xlsx', '.xlsm')):
+            workbook = openpyxl.load_workbook(file_path, read_only=True)
+            try:
+                return list(workbook.sheetnames)
+            finally:
+                workbook.close()
+        with pd.ExcelFile(file_path) as excel_file:
+            return [str(name) for name in excel_file.sheet_names]
+    
+    def get_dtype_hints(self, table_structure: Dict[str, str]) -> Dict[str, str]:
+        """
+        把MySQL列类型映射为读取时使用的pandas类型
+        
+        整数映射为可空的Int64，浮点数映射为float64，日期时间映射为datetime64；
+        decimal映射为Decimal（不经过浮点数，保留精确的小数），字符串类型映射为文本（保留前导零等原始内容）
+        """
+        hints = {}
+        for column, mysql_type in table_structure.items():
+            base_type = str(mysql_type).lower().split('(', 1)[0].strip()
+            if base_type in ('tinyint', 'smallint', 'mediumint', 'int', 'integer', 'bigint'):
+                hints[column] = 'Int64'
+            elif base_type in ('float', 'double', 'real'):
+                hints[column] = 'float64'
+            elif base_type in ('date', 'datetime', 'timestamp'):
+                hints[column] = 'datetime64[ns]'
+            elif base_type in ('decimal', 'numeric'):
+                hints[column] = 'decimal'
+            elif base_type in ('char', 'varchar', 'tinytext', 'text', 'mediumtext', 'longtext'):
+                hints[column] = 'str'
+        return hints
+    
+    def apply_dtype_hints(self, df: pd.DataFrame, dtype_hints: Dict[str, str]) -> pd.DataFrame:
+        """按类型提示原地转换列类型，只在转换不丢失数据（不产生新的空值、整数列没有小数）时转换"""
+        if df is None or df.empty or not dtype_hints:
+            return df
+        for position, column in enumerate(df.columns):
+            dtype = dtype_hints.get(column)
+            if dtype is None:
+                continue
+            series = df.iloc[:, position]
+            if str(series.dtype) == dtype:
+                continue
+            try:
+                if dtype == 'str':
+                    # 文本列（CSV按文本读取）不需要转换，只转换数字等其他值
+                    if pd.api.types.infer_dtype(series, skipna=True) in ('string', 'empty'):
+                        continue
+                    converted = series.astype(object).map(_to_text, na_action='ignore')
+                elif dtype == 'decimal':
+                    converted = series.astype(object).map(_to_decimal, na_action='ignore')
+                elif dtype == 'datetime64[ns]':
+                    # 只转换文本和日期对象组成的列，数值按时间戳解释会得到错误的日期
+                    if pd.api.types.is_datetime64_any_dtype(series.dtype) or \
+                            pd.api.types.infer_dtype(series, skipna=True) not in ('string', 'date', 'datetime'):
+                        continue
+                    with warnings.catch_warnings():
+                        warnings.simplefilter('ignore', UserWarning)
+                        converted = pd.to_datetime(series, errors='coerce')
+                else:
+                    converted = pd.to_numeric(series, errors='coerce')
+                    if dtype == 'Int64' and not (converted.dropna() % 1 == 0).all():
+                        continue
+                    # 含空值的整数列会先转为浮点数，超过2**53的整数（如CSV中的雪花id）改为逐个按原值转换，避免丢失精度
+                    if dtype == 'Int64' and pd.api.types.is_float_dtype(converted.dtype) and \
+                            converted.abs().max() >= 2 ** 53:
+                        converted = pd.Series(
+                            pd.array([None if pd.isna(value) else int(value) for value in series], dtype='Int64'),
+                            index=series.index
+                        )
+                    converted = converted.astype(dtype)
+            except (TypeError, ValueError, OverflowError):
+                continue
+            # 有无法转换的值时保持原样，由MySQL按列类型处理
+            if (converted.isna() & series.notna()).any():
+                continue
+            df.isetitem(position, converted)
+        return df
+    
+    def _normalize_header(self, header: tuple) -> List[Any]:
+        """按pandas的规则处理表头：去掉末尾空列，空列名命名为Unnamed，重复列名加序号"""
+        header = list(header)
+        while header and header[-1] is None:
+            header.pop()
+        
+        columns = []
+        seen: Dict[Any, int] = {}
+        for i, name in enumerate(header):
+            if name is None:
+                name = f"Unnamed: {i}"
+            if name in seen:
+                seen[name] += 1
+                name = f"{name}.{seen[name]}"
+            else:
+                seen[name] = 0
+            columns.append(name)
+        return columns
+    
     def add_auto_id_column(self, df: pd.DataFrame, start_id: int = 1) -> pd.DataFrame:
         """如果Excel没有id列，自动添加自增长的id列，支持自定义起始id"""
         if df is None or df.empty:
             return df
         
         # 检查是否存在id列（不区分大小写）
-        id_columns = [col for col in df.columns if str(col).lower() in ['id', 'id_', '_id']]
+        id_columns = self._find_id_columns(df)
         
         if not id_columns:
             # 没有id列，添加自增长的id列
-            df_with_id = df.copy()
-            id_values = pd.Series(range(start_id, start_id + len(df_with_id)), index=df_with_id.index)
-            df_with_id.insert(0, 'id', id_values)
             self.logger.info(f"Excel文件没有id列，已自动添加自增长的id列，起始值为{start_id}")
-            return df_with_id
+            return self.set_auto_ids(df, range(start_id, start_id + len(df)))
+        elif self.needs_auto_id(df):
+            # id列全为空，重新编号
+            self.logger.info(f"Excel文件的id列 '{id_columns[0]}' 为空，已重新编号，起始值为{start_id}")
+            return self.set_auto_ids(df, range(start_id, start_id + len(df)))
         else:
-            # 已有id列，检查是否需要重新编号
-            id_col = id_columns[0]
-            is_empty = df[id_col].isna().all() or (df[id_col].astype(str).str.strip() == '').all()
-            if is_empty:
-                # id列全为空，重新编号
-                df_with_id = df.copy()
-                id_values = pd.Series(range(start_id, start_id + len(df_with_id)), index=df_with_id.index)
-                df_with_id[id_col] = id_values
-                self.logger.info(f"Excel文件的id列 '{id_col}' 为空，已重新编号，起始值为{start_id}")
-                return df_with_id
-            else:
-                # id列有值，保持原样
-                self.logger.info(f"Excel文件已有id列 '{id_col}'，保持原值")
-                return df
+            # id列有值，保持原样
+            self.logger.info(f"Excel文件已有id列 '{id_columns[0]}'，保持原值")
+            return df
+    
+    def set_auto_ids(self, df: pd.DataFrame, ids) -> pd.DataFrame:
+        """按顺序填入给定的id：没有id列时添加为第一列，否则覆盖第一个id列（用于needs_auto_id为真的块）"""
+        df_with_id = df.copy()
+        id_values = pd.Series(ids, index=df_with_id.index)
+        id_columns = self._find_id_columns(df)
+        if id_columns:
+            df_with_id[id_columns[0]] = id_values
+        else:
+            df_with_id.insert(0, 'id', id_values)
+        return df_with_id
+    
+    def needs_auto_id(self, df: pd.DataFrame) -> bool:
+        """判断add_auto_id_column是否会生成id：没有id列，或id列全为空"""
+        if df is None or df.empty:
+            return False
+        id_columns = self._find_id_columns(df)
+        if not id_columns:
+            return True
+        id_col = id_columns[0]
+        return bool(df[id_col].isna().all() or (df[id_col].astype(str).str.strip() == '').all())
+    
+    def _find_id_columns(self, df: pd.DataFrame) -> List[str]:
+        """查找id列（不区分大小写）"""
+        return [col for col in df.columns if str(col).lower() in ['id', 'id_', '_id']]
     
     def clean_data(self, df: pd.DataFrame) -> pd.DataFrame:
-        """清理数据，处理空字符"""
+        """清理数据，将空字符串和只包含空白的字符串置为空值（原地修改，NaN在转换为元组时统一处理为None）"""
         if df is None or df.empty:
             return df
         
-        # 复制数据框避免修改原始数据
-        cleaned_df = df.copy()
-        
-        # 处理空字符和空值
-        for column in cleaned_df.columns:
-            # 将空字符串转换为None
-            cleaned_df[column] = cleaned_df[column].replace('', None)
+        # 按位置遍历，列名重复时也能正确处理
+        for position in range(df.shape[1]):
+            series = df.iloc[:, position]
+            
+            # 数值、日期、布尔列不可能包含空字符串，直接跳过
+            if not (pd.api.types.is_object_dtype(series.dtype) or pd.api.types.is_string_dtype(series.dtype)):
+                continue
             
-            # 将只包含空格的字符串转换为None
-            cleaned_df[column] = cleaned_df[column].apply(
-                lambda x: None if isinstance(x, str) and x.strip() == '' else x
+            # 先对列做一次哈希去重，只对不重复的值判断是否为空白字符串，再通过编码映射回每一行
+            codes, uniques = pd.factorize(series)
+            blank_uniques = np.fromiter(
+                (isinstance(value, str) and not value.strip() for value in uniques),
+                dtype=bool, count=len(uniques)
             )
+            if not blank_uniques.any():
+                continue
             
-            # 处理NaN值
-            cleaned_df[column] = cleaned_df[column].where(pd.notna(cleaned_df[column]), None)
+            # 编码-1表示原本就是空值，映射到末尾的False
+            blank_mask = np.append(blank_uniques, False)[codes]
+            df.isetitem(position, series.mask(blank_mask))
         
-        self.logger.info(f"数据清理完成，共处理{len(cleaned_df)}行数据")
-        return cleaned_df
+        self.logger.info(f"数据清理完成，共处理{len(df)}行数据")
+        return df
     
     def validate_data_types(self, df: pd.DataFrame, table_structure: Dict[str, str]) -> bool:
         """验证数据类型是否与表结构匹配"""
@@ -147,21 +710,53 @@ class ExcelProcessor:
     
     def convert_to_tuples(self, df: pd.DataFrame, columns: List[str]) -> List[tuple]:
         """将DataFrame转换为元组列表"""
+        data_tuples = [row for batch in self.iter_tuple_batches(df, columns) for row in batch]
+        self.logger.info(f"成功转换{len(data_tuples)}行数据为元组格式")
+        return data_tuples
+    
+    def iter_tuple_batches(self, df: pd.DataFrame, columns: List[str],
+                           batch_size: int = Config.DB_BATCH_SIZE) -> Iterator[List[tuple]]:
+        """按列将DataFrame转换为元组，分批产出，NaN统一转换为None"""
         if df is None or df.empty:
-            return []
+            return
         
         # 确保列的顺序与传入的columns参数一致
         df_subset = df[columns]
         
-        # 转换为元组列表
-        data_tuples = []
-        for _, row in df_subset.iterrows():
-            # 将每行转换为元组，处理None值
-            row_tuple = tuple(None if pd.isna(value) else value for value in row)
-            data_tuples.append(row_tuple)
+        # 每列只计算一次空值掩码，得到普通Python对象组成的列
+        column_values = []
+        for position in range(df_subset.shape[1]):
+            series = df_subset.iloc[:, position]
+            if pd.api.types.is_datetime64_any_dtype(series.dtype):
+                # 直接转换为datetime，比逐个构造Timestamp快，pymysql也能原生处理
+                values = np.asarray(series.dt.to_pydatetime(), dtype=object)
+            else:
+                values = series.to_numpy(dtype=object)
+            null_mask = series.isna().to_numpy()
+            if null_mask.any():
+                values = np.where(null_mask, None, values)
+            column_values.append(values.tolist())
         
-        self.logger.info(f"成功转换{len(data_tuples)}行数据为元组格式")
-        return data_tuples
+        # 按行拼接各列，每批只生成batch_size行的元组
+        batch_size = batch_size if batch_size > 0 else len(df_subset)
+        for start in range(0, len(df_subset), batch_size):
+            end = start + batch_size
+            yield list(zip(*(values[start:end] for values in column_values)))
+    
+    def row_hashes(self, df: pd.DataFrame, columns: List[str]) -> np.ndarray:
+        """
+        按指定的列向量化计算每行内容的64位哈希（uint64数组）
+        
+        值先统一转换为文本、空值统一为同一个标记，同一行在不同块中列类型不同（如某块整列为空）时哈希也相同；
+        各列的哈希按列的顺序组合。不按类别去重（categorize=False），大多数值不重复时快几倍
+        """
+        hashes = np.full(len(df), 0x345678, dtype=np.uint64)
+        for column in columns:
+            series = df[column]
+            values = series.astype(str).to_numpy(dtype=object)
+            values[series.isna().to_numpy()] = '\0'
+            hashes = (hashes ^ pd.util.hash_array(values, categorize=False)) * np.uint64(1000003)
+        return hashes
     
     def get_column_names(self, df: pd.DataFrame) -> List[str]:
         """获取列名列表"""
@@ -172,8 +767,16 @@ class ExcelProcessor:
     def process_excel_file(self, file_path: str, table_structure: Dict[str, str], 
                           sheet_name: str | None = None, start_id: int = 1) -> Tuple[List[str], List[tuple]] | None:
         """处理Excel文件的完整流程，支持自定义id起始值"""
-        # 读取Excel文件
-        df = self.read_excel(file_path, sheet_name)
+        # 先只读表头检查列，列不匹配时不再读取数据
+        header = self.probe_header(file_path, sheet_name)
+        if header is not None:
+            missing_columns = self.find_missing_columns(header, table_structure)
+            if missing_columns:
+                self.logger.error(f"以下列在Excel中不存在: {missing_columns}")
+                return None
+        
+        # 读取Excel文件，只读取表中存在的列
+        df = self.read_excel(file_path, sheet_name, table_structure)
         if df is None:
             return None
         
@@ -193,4 +796,46 @@ class ExcelProcessor:
         # 转换为元组列表
         data_tuples = self.convert_to_tuples(cleaned_df, columns)
         
-        return columns, data_tuples 
\ No newline at end of file
+        return columns, data_tuples
+    
+    def process_excel_file_chunks(self, file_path: str, table_structure: Dict[str, str],
+                                  sheet_name: str | None = None, start_id: int = 1,
+                                  chunk_size: int = Config.EXCEL_CHUNK_SIZE,
+                                  batch_size: int = Config.DB_BATCH_SIZE,
+                                  id_allocator: Callable[[int], int] | None = None,
+                                  engine: str = 'auto',
+                                  row_filter: Callable[[pd.DataFrame], pd.DataFrame] | None = None
+                                  ) -> Iterator[Tuple[List[str], List[tuple]]]:
+        """
+        分块处理Excel文件（或CSV、TSV、JSONL、Parquet文件，见read_chunks），逐批产出(列名, 元组列表)
+        
+        需要自动生成id时，提供了id_allocator则每块调用id_allocator(行数)获取起始id，
+        否则从start_id开始在块之间连续编号；
+        row_filter（可选）在分配id之前过滤每块的行（如增量导入只保留新增和有变化的行），过滤掉的行不占用id
+        """
+        next_id = start_id
+        validated = False
+        for chunk in self.read_chunks(file_path, sheet_name, chunk_size, table_structure, engine):
+            if row_filter is not None and not chunk.empty:
+                chunk = row_filter(chunk)
+            if chunk.empty:
+                continue
+            
+            # 添加自动id列（如果需要）
+            if id_allocator is not None and self.needs_auto_id(chunk):
+                next_id = id_allocator(len(chunk))
+            chunk_with_id = self.add_auto_id_column(chunk, start_id=next_id)
+            next_id += len(chunk_with_id)
+            
+            # 只在第一块验证列名，所有块的列名相同
+            if not validated:
+                if not self.validate_data_types(chunk_with_id, table_structure):
+                    raise ValueError("Excel列与表结构不匹配")
+                validated = True
+            
+            # 清理数据
+            cleaned_df = self.clean_data(chunk_with_id)
+            
+            columns = self.get_column_names(cleaned_df)
+            for batch in self.iter_tuple_batches(cleaned_df, columns, batch_size):
+                yield columns, batch
\ No newline at end of file
@@ -1,16 +1,147 @@
 import logging
+import multiprocessing
 import os
-from typing import Dict, List, Optional
-from database import DatabaseManager
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field, fields, asdict
+from typing import Any, Dict, List, Optional, Set, Tuple
+from database import DatabaseManager, ConnectionPool
+from bulk_insert import IMPORT_MODES, LOAD_METHODS, ParallelInserter, create_inserter
+from bulk_mode import BulkLoadSession
 from excel_processor import ExcelProcessor
+from reader_engines import ENGINES, select_engine
+from file_formats import detect_file_format, is_parquet_available
+from download_cache import CachedFile, download_cache
+from http_downloader import DownloadError
+from id_allocator import IdAllocator
+from pipeline import PipelineCancelled, StagePipeline
+from table_swap import StagingTable, restore_backup
+from delta_index import RowHashIndex, drop_hash_index
+from import_ledger import ImportLedger, file_sha256
 from config import Config
 
+@dataclass
+class ImportResult:
+    """Excel导入结果"""
+    success: bool = False
+    table_name: str = ''
+    rows_inserted: int = 0
+    columns: List[str] = field(default_factory=list)
+    timings: Dict[str, float] = field(default_factory=dict)  # 各阶段耗时（秒）
+    id_start: Optional[int] = None
+    id_end: Optional[int] = None
+    load_method: str = ''  # 实际使用的导入方式：insert 或 load_data
+    reader_engine: str = ''  # 实际使用的读取引擎，pandas表示由pandas整表读取
+    file_format: str = ''  # 文件格式：excel、csv、tsv、jsonl 或 parquet
+    download_status: str = ''  # URL的下载缓存状态：hit、revalidated 或 downloaded，本地文件为空
+    source_sha256: str = ''  # 源文件内容的SHA-256
+    partitions: List[Dict[str, Any]] = field(default_factory=list)  # 并行写入时每个分区的状态和行数
+    bulk_mode: bool = False  # 是否使用了批量导入模式
+    violations: List[str] = field(default_factory=list)  # 批量导入模式下导入后校验发现的约束问题
+    mode: str = 'append'  # 导入模式：append、replace、upsert 或 delta
+    backup_table: str = ''  # 替换模式下保留的旧表
+    upsert_keys: List[str] = field(default_factory=list)  # upsert模式下文件包含全部列的主键或唯一索引
+    rows_skipped: int = 0  # 增量模式下内容没有变化、没有发送的行数
+    duplicate: bool = False  # 相同的导入已完成过，返回的是导入记录中保存的结果
+    message: str = ''
+    
+    def __bool__(self) -> bool:
+        """兼容旧的布尔返回值"""
+        return self.success
+    
+    def add_timing(self, stage: str, seconds: float):
+        """累加某个阶段的耗时"""
+        self.timings[stage] = self.timings.get(stage, 0.0) + seconds
+    
+    def record_rows(self, columns: List[str], data_tuples: List[tuple]):
+        """记录一批已插入的数据，更新行数、列名和id范围"""
+        if not data_tuples:
+            return
+        self.rows_inserted += len(data_tuples)
+        if not self.columns:
+            self.columns = list(columns)
+        
+        id_index = next((i for i, col in enumerate(columns) if str(col).lower() == 'id'), None)
+        if id_index is None:
+            return
+        try:
+            ids = [int(row[id_index]) for row in data_tuples if row[id_index] is not None]
+        except (TypeError, ValueError):
+            return
+        if ids:
+            self.id_start = min(ids) if self.id_start is None else min(self.id_start, min(ids))
+            self.id_end = max(ids) if self.id_end is None else max(self.id_end, max(ids))
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """转换为可JSON序列化的字典"""
+        data = asdict(self)
+        data['columns'] = [str(col) for col in self.columns]
+        data['timings'] = {stage: round(seconds, 4) for stage, seconds in self.timings.items()}
+        return data
+
+@dataclass
+class WorkbookImportResult:
+    """多工作表导入结果，每个工作表单独导入、单独提交"""
+    success: bool = False
+    rows_inserted: int = 0
+    sheets: Dict[str, ImportResult] = field(default_factory=dict)  # 工作表名 -> 导入结果
+    timings: Dict[str, float] = field(default_factory=dict)
+    message: str = ''
+    
+    def __bool__(self) -> bool:
+        return self.success
+    
+    def add_sheet(self, sheet_name: str, result: ImportResult):
+        """记录一个工作表的导入结果"""
+        self.sheets[sheet_name] = result
+        if result.success:
+            self.rows_inserted += result.rows_inserted
+    
+    def failed_sheets(self) -> List[str]:
+        """导入失败的工作表"""
+        return [name for name, result in self.sheets.items() if not result.success]
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """转换为可JSON序列化的字典"""
+        return {
+            'success': self.success,
+            'rows_inserted': self.rows_inserted,
+            'message': self.message,
+            'timings': {stage: round(seconds, 4) for stage, seconds in self.timings.items()},
+            'sheets': {name: result.to_dict() for name, result in self.sheets.items()}
+        }
+
+# 一次导入占用的连接数：写入数据的连接，以及导入记录和id分配共用的连接（并行写入的分区连接只在连接池有空闲时借出）
+CONNECTIONS_PER_IMPORT = 2
+
+# 多工作表导入时工作进程内的连接池，同一进程处理的多个工作表复用连接
+_worker_pool: Optional[ConnectionPool] = None
+
+def _init_sheet_worker():
+    """工作进程初始化：创建进程内连接池（写入数据和分配id各用一个连接）"""
+    global _worker_pool
+    _worker_pool = ConnectionPool(max_size=2)
+
+def _import_sheet(table_name: str, file_path: str, table_structure: Dict[str, str],
+                  sheet_name: str, chunk_size: Optional[int], load_method: str,
+                  engine: Optional[str] = None) -> ImportResult:
+    """在工作进程中解析并导入一个工作表"""
+    importer = ExcelToMySQL(pool=_worker_pool)
+    return importer.import_excel_to_mysql(
+        table_name, file_path, table_structure=table_structure, sheet_name=sheet_name,
+        chunk_size=chunk_size, load_method=load_method, engine=engine
+    )
+
+
 class ExcelToMySQL:
     """Excel到MySQL数据导入主类"""
     
-    def __init__(self):
-        self.db_manager = DatabaseManager()
+    def __init__(self, pool: Optional[ConnectionPool] = None):
+        self.db_manager = DatabaseManager(pool=pool)
         self.excel_processor = ExcelProcessor()
+        self.download_cache = download_cache
+        self._cancel_event = threading.Event()
         self.logger = logging.getLogger(__name__)
         self._setup_logging()
     
@@ -27,70 +158,632 @@ class ExcelToMySQL:
     
     def import_excel_to_mysql(self, table_name: str, excel_file_path: str, 
                              table_structure: Optional[Dict[str, str]] = None, 
-                             sheet_name: Optional[str] = None) -> bool:
+                             sheet_name: Optional[str] = None,
+                             chunk_size: Optional[int] = None,
+                             load_method: str = 'auto',
+                             engine: Optional[str] = None,
+                             insert_workers: Optional[int] = None,
+                             bulk_mode: Optional[bool] = None,
+                             mode: str = 'append',
+                             update_columns: Optional[List[str]] = None,
+                             idempotent: bool = False) -> ImportResult:
         """
-        将Excel数据导入MySQL数据库
+        将Excel数据导入MySQL数据库，也支持CSV、TSV、JSONL和Parquet文件（按扩展名识别，见file_formats）
         
         Args:
             table_name: 表名
-            excel_file_path: Excel文件路径或URL
+            excel_file_path: 数据文件路径或URL
             table_structure: 表结构字典（可选，如果不提供则从数据库获取）
-            sheet_name: 工作表名称（可选）
+            sheet_name: 工作表名称（可选，只用于Excel）
+            chunk_size: 流式读取每块行数（可选，默认使用Config.EXCEL_CHUNK_SIZE，0表示整表读取）
+            load_method: 导入方式，insert为批量INSERT，load_data为LOAD DATA LOCAL INFILE，
+                         auto在开启DB_LOCAL_INFILE且行数超过DB_LOAD_DATA_MIN_ROWS时使用load_data
+            engine: Excel读取引擎（可选，默认使用Config.EXCEL_ENGINE），auto按文件类型和大小自动选择
+            insert_workers: 并行写入的连接数（可选，默认使用Config.DB_INSERT_WORKERS），
+                            预计行数低于Config.DB_PARALLEL_MIN_ROWS时使用单连接
+            bulk_mode: 是否使用批量导入模式（可选，默认使用Config.DB_BULK_MODE），导入期间关闭唯一性和外键检查，
+                       导入后恢复并校验，校验发现的问题记录在结果的violations中
+            mode: 导入模式，append追加到表中，replace写入按表结构创建的临时表，全部写完后原子地替换整张表，
+                  旧表保留为 <表名>__old（见table_swap），批量导入模式下校验发现问题时不替换；
+                  upsert按主键或唯一索引插入或更新（INSERT ... ON DUPLICATE KEY UPDATE），文件必须包含某个键的全部列；
+                  delta在upsert的基础上按行内容哈希跳过与上次导入相同的行（见delta_index），只发送新增和有变化的行
+            update_columns: upsert模式下键冲突时更新的列（可选），默认为不属于任何键的列
+            idempotent: 是否使用导入记录（见import_ledger）：相同内容的文件以相同选项导入同一张表已完成时
+                        直接返回之前的结果，相同的导入正在进行时等待其完成；MCP工具默认开启（Config.IMPORT_LEDGER_ENABLED）
         
         Returns:
-            bool: 导入是否成功
+            ImportResult: 导入结果，布尔值表示导入是否成功
         """
+        result = ImportResult(table_name=table_name, mode=mode)
+        total_start = time.perf_counter()
+        self._cancel_event.clear()
+        inserter = None
+        partition_dbs: List[DatabaseManager] = []
+        bulk_session = None
+        staging = None
+        row_index = None
+        ledger = None
+        id_allocator = None
+        download = None
+        cached = None
         try:
             # 验证参数
             if not self._validate_parameters(table_name, excel_file_path):
-                return False
+                return self._fail(result, "参数验证失败")
+            if mode not in IMPORT_MODES:
+                return self._fail(result, f"不支持的导入模式: {mode}，可选: {', '.join(IMPORT_MODES)}")
+            
+            # URL在后台线程中通过下载缓存获取本地文件，同时连接数据库和获取表结构；
+            # 本地文件在连接数据库之前确定导入方式和读取引擎
+            if excel_file_path.startswith(('http://', 'https://')):
+                download = self._start_download(excel_file_path, result)
+            else:
+                error = self._prepare_source(result, excel_file_path, sheet_name, load_method, engine)
+                if error:
+                    return self._fail(result, error)
+            
+            # 导入记录：相同内容的文件以相同选项导入同一张表已完成时直接返回之前的结果，正在导入时等待其完成。
+            # 在连接数据库之前获取，等待的调用只占用导入记录的一个连接；需要文件内容的哈希，URL先等待下载完成
+            if idempotent:
+                if download is not None:
+                    cached, error = self._await_download(download, result, sheet_name, load_method, engine)
+                    if error:
+                        return self._fail(result, error)
+                    excel_file_path = cached.path
+                stage_start = time.perf_counter()
+                if not result.source_sha256:
+                    result.source_sha256 = file_sha256(excel_file_path)
+                ledger = ImportLedger(DatabaseManager(pool=self.db_manager.pool))
+                previous = ledger.acquire(result.source_sha256, table_name, sheet_name,
+                                          {'mode': mode, 'update_columns': update_columns})
+                result.add_timing('ledger', time.perf_counter() - stage_start)
+                if previous is not None:
+                    result = self._previous_result(previous, result)
+                    return result
+                if not ledger.claimed:
+                    return self._fail(result, ledger.error)
             
             # 连接数据库
-            if not self.db_manager.connect():
-                return False
+            stage_start = time.perf_counter()
+            connected = self.db_manager.connect()
+            result.add_timing('connect', time.perf_counter() - stage_start)
             
             # 如果没有提供表结构，从数据库获取
-            if table_structure is None:
+            if connected and table_structure is None:
+                stage_start = time.perf_counter()
                 table_structure = self.db_manager.get_table_structure(table_name)
-                if not table_structure:
-                    self.logger.error(f"无法获取表 '{table_name}' 的结构")
-                    return False
-                self.logger.info(f"从数据库获取到表结构: {table_structure}")
+                result.add_timing('table_structure', time.perf_counter() - stage_start)
+                if table_structure:
+                    self.logger.info(f"从数据库获取到表结构: {table_structure}")
+            
+            # 等待下载完成，之后与本地文件一样流式读取
+            if download is not None and cached is None:
+                cached, error = self._await_download(download, result, sheet_name, load_method, engine)
+                if error:
+                    return self._fail(result, error)
+                excel_file_path = cached.path
             
-            # 获取数据库当前最大id
-            max_id = 0
+            if not connected:
+                return self._fail(result, "数据库连接失败")
+            if not table_structure:
+                return self._fail(result, f"无法获取表 '{table_name}' 的结构")
+            
+            # 解析数据之前先只读表头检查列，列不匹配的文件直接拒绝
+            stage_start = time.perf_counter()
+            header = self.excel_processor.probe_header(excel_file_path, sheet_name)
+            result.add_timing('header_probe', time.perf_counter() - stage_start)
+            if header is not None:
+                missing_columns = self.excel_processor.find_missing_columns(header, table_structure)
+                if missing_columns:
+                    return self._fail(result, f"Excel列与表结构不匹配，缺少列: {missing_columns}")
+            
+            # upsert和增量模式：确认文件能按主键或唯一索引匹配已有的行；LOAD DATA不支持按列更新，使用批量INSERT
+            upsert = mode in ('upsert', 'delta')
+            if upsert:
+                file_columns = header if header is not None else list(table_structure)
+                error, update_columns = self._plan_upsert(result, table_name, file_columns, update_columns)
+                if error:
+                    return self._fail(result, error)
+                if result.load_method == 'load_data':
+                    self.logger.info("upsert模式不支持LOAD DATA，使用批量INSERT")
+                    result.load_method = 'insert'
+            
+            expected_rows = self.excel_processor.estimate_row_count(excel_file_path, sheet_name)
+            
+            # 需要自动生成id时从序列表预留id，并发导入同一张表不会分配到重复的id；
+            # upsert和增量模式中已存在的行不使用新id，不按预计行数预留整块
             id_column = None
             for col in table_structure:
                 if col.lower() == 'id':
                     id_column = col
                     break
             if id_column:
-                max_id = self.db_manager.get_max_id(table_name, id_column)
-            start_id = max_id + 1
+                reserve_rows = None if upsert else expected_rows
+                # 使用导入记录时与其共用独立于导入事务的连接，一次导入最多占用CONNECTIONS_PER_IMPORT个连接
+                if ledger is not None:
+                    id_allocator = IdAllocator(ledger.db_manager, table_name, id_column,
+                                               expected_rows=reserve_rows, lock=ledger.lock)
+                else:
+                    id_allocator = IdAllocator(DatabaseManager(pool=self.db_manager.pool), table_name, id_column,
+                                               expected_rows=reserve_rows)
+            
+            # 增量模式：加载上次导入的行哈希，解析时只保留新增和内容有变化的行，只为新增的行分配id
+            if mode == 'delta':
+                key_columns = self.db_manager.get_unique_keys(table_name)[result.upsert_keys[0]]
+                hash_columns = [col for col in table_structure if col in file_columns]
+                row_index = RowHashIndex(
+                    self.db_manager, table_name, key_columns, hash_columns, self.excel_processor,
+                    id_allocator=self._timed_reserve(id_allocator, result) if id_allocator else None
+                )
+                stage_start = time.perf_counter()
+                loaded = row_index.load()
+                result.add_timing('load_hashes', time.perf_counter() - stage_start)
+                if not loaded:
+                    return self._fail(result, "加载行哈希索引失败")
 
-            # 处理Excel文件
-            result = self.excel_processor.process_excel_file(excel_file_path, table_structure, sheet_name, start_id=start_id)
-            if result is None:
-                self.logger.error("处理Excel文件失败")
-                return False
+            if chunk_size is None:
+                chunk_size = Config.EXCEL_CHUNK_SIZE
             
-            columns, data_tuples = result
+            # 替换模式：数据写入临时表，没有读取方，提交后再换入；id仍按目标表的序列分配
+            write_table = table_name
+            if mode == 'replace':
+                staging = StagingTable(self.db_manager, table_name)
+                stage_start = time.perf_counter()
+                error = staging.create()
+                result.add_timing('create_staging', time.perf_counter() - stage_start)
+                if error:
+                    return self._fail(result, error)
+                write_table = staging.staging_name
             
-            # 插入数据
-            if not self.db_manager.insert_data(table_name, columns, data_tuples):
-                self.logger.error("插入数据失败")
-                return False
+            # 批量导入模式：数据量很大时先删除普通二级索引，写入连接上的检查在创建插入器后关闭
+            use_bulk_mode = bulk_mode if bulk_mode is not None else Config.DB_BULK_MODE
+            if use_bulk_mode and upsert:
+                # 关闭unique_checks后InnoDB可能不检查二级唯一索引的冲突，ON DUPLICATE KEY UPDATE无法可靠地匹配已有的行
+                self.logger.warning("upsert模式不使用批量导入模式")
+                use_bulk_mode = False
+            if use_bulk_mode:
+                try:
+                    bulk_session = BulkLoadSession(self.db_manager, write_table)
+                except ValueError as e:
+                    return self._fail(result, str(e))
+                result.bulk_mode = True
+                if (Config.DB_BULK_DROP_INDEX_MIN_ROWS > 0 and expected_rows is not None
+                        and expected_rows >= Config.DB_BULK_DROP_INDEX_MIN_ROWS):
+                    stage_start = time.perf_counter()
+                    bulk_session.drop_secondary_indexes()
+                    result.add_timing('drop_indexes', time.perf_counter() - stage_start)
             
-            self.logger.info(f"成功导入{len(data_tuples)}条记录到表 '{table_name}'")
-            return True
+            # 解析在流水线的后台线程中进行，转换出的批次经有界队列交给当前线程插入，
+            # 插入等待数据库响应时解析继续进行（chunk_size为0时整表读取）
+            pipeline = StagePipeline(
+                lambda: self.excel_processor.process_excel_file_chunks(
+                    excel_file_path, table_structure, sheet_name, chunk_size=chunk_size,
+                    id_allocator=self._timed_reserve(id_allocator, result) if id_allocator else None,
+                    engine=result.reader_engine if result.reader_engine in ENGINES else 'auto',
+                    row_filter=row_index.filter if row_index is not None else None
+                ),
+                cancel_event=self._cancel_event, name=f"parse-{table_name}"
+            )
+            try:
+                for columns, data_tuples in pipeline:
+                    # 插入数据，整个导入共用一个插入器（单连接时一个事务，并行时每个分区一个事务）
+                    if inserter is None:
+                        upsert_columns = [col for col in update_columns if col in columns] if upsert else None
+                        inserter = self._create_inserter(write_table, columns, result.load_method,
+                                                         insert_workers, expected_rows, partition_dbs,
+                                                         update_columns=upsert_columns)
+                        if bulk_session is not None and not bulk_session.apply([self.db_manager] + partition_dbs):
+                            inserter.abort()
+                            return self._fail(result, "启用批量导入模式失败")
+                    stage_start = time.perf_counter()
+                    inserted = inserter.insert(data_tuples)
+                    result.add_timing('insert', time.perf_counter() - stage_start)
+                    if not inserted:
+                        return self._fail(result, f"插入数据失败，已提交{inserter.rows_committed}条记录")
+                    result.record_rows(columns, data_tuples)
+            except PipelineCancelled:
+                rows_committed = 0
+                if inserter is not None:
+                    inserter.abort()
+                    rows_committed = inserter.rows_committed
+                return self._fail(result, f"导入已取消，已提交{rows_committed}条记录")
+            finally:
+                # 插入失败时停止解析，等待解析线程结束后再记录各阶段耗时
+                pipeline.close()
+                self._record_pipeline_timings(pipeline, result)
+            
+            # 提交剩余数据
+            if inserter is not None:
+                stage_start = time.perf_counter()
+                committed = inserter.finish()
+                result.add_timing('commit', time.perf_counter() - stage_start)
+                if not committed:
+                    return self._fail(result, f"提交数据失败，已提交{inserter.rows_committed}条记录")
+            
+            # 批量导入模式：恢复会话设置、重建索引，再校验导入期间没有检查的约束
+            if bulk_session is not None:
+                stage_start = time.perf_counter()
+                restored = bulk_session.restore()
+                result.add_timing('restore', time.perf_counter() - stage_start)
+                if not restored:
+                    return self._fail(result, f"已提交{result.rows_inserted}条记录，但恢复会话设置或重建索引失败，详见日志")
+                stage_start = time.perf_counter()
+                result.violations = bulk_session.verify()
+                result.add_timing('verify', time.perf_counter() - stage_start)
             
+            # 替换模式：数据完整且校验通过后，一条RENAME TABLE原子地换入临时表
+            if staging is not None:
+                if result.rows_inserted == 0:
+                    return self._fail(result, f"文件中没有数据，未替换表 '{table_name}'")
+                if result.violations:
+                    return self._fail(result, f"临时表校验发现约束问题，未替换表 '{table_name}': {'；'.join(result.violations)}")
+                stage_start = time.perf_counter()
+                swapped = staging.swap()
+                result.add_timing('swap', time.perf_counter() - stage_start)
+                if not swapped:
+                    return self._fail(result, f"替换表 '{table_name}' 失败，表中数据保持不变")
+                result.backup_table = staging.backup_name
+            
+            # 增量模式：数据提交后写回本次发送的行的哈希，写回失败只会使下次多发送这些行
+            if row_index is not None:
+                result.rows_skipped = row_index.rows_unchanged
+                stage_start = time.perf_counter()
+                row_index.save()
+                result.add_timing('save_hashes', time.perf_counter() - stage_start)
+            
+            # Excel自带id时推进序列，避免之后自动分配的id与其冲突
+            if id_column and result.id_end is not None:
+                self.db_manager.advance_id_sequence(table_name, result.id_end + 1)
+            
+            result.success = True
+            result.message = f"成功导入{result.rows_inserted}条记录到表 '{table_name}'"
+            if result.upsert_keys:
+                result.message += f"（按 {', '.join(result.upsert_keys)} 插入或更新）"
+            if row_index is not None:
+                result.message += (f"（新增{row_index.rows_new}条，更新{row_index.rows_changed}条，"
+                                   f"跳过{row_index.rows_unchanged}条未变化的记录）")
+            if result.backup_table:
+                result.message += f"（已替换整张表，旧数据保留在 '{result.backup_table}'）"
+            if result.violations:
+                result.message += f"，校验发现约束问题: {'；'.join(result.violations)}"
+            self.logger.info(result.message)
+            return result
+        
         except Exception as e:
-            self.logger.error(f"导入过程中发生错误: {e}")
-            return False
+            if inserter is not None:
+                inserter.abort()
+            return self._fail(result, f"导入过程中发生错误: {e}")
         finally:
             # 断开数据库连接
+            if isinstance(inserter, ParallelInserter):
+                result.partitions = inserter.manifest()
+            if bulk_session is not None:
+                # 失败时同样恢复会话设置和索引，之后才归还连接
+                bulk_session.restore()
+            for partition_db in partition_dbs:
+                partition_db.disconnect()
+            if staging is not None:
+                # 没有换入的临时表在失败时删除
+                staging.discard()
+            if mode != 'delta' and inserter is not None and inserter.rows_committed:
+                # 追加、upsert和替换写入的行不在行哈希索引中，索引不再对应表中的数据，删除后下次增量导入全量重建
+                drop_hash_index(self.db_manager, table_name)
+            if id_allocator is not None:
+                # 预计行数来自工作表维度信息，可能远大于实际行数，没有用到的id归还给序列
+                id_allocator.release()
+                if ledger is None:
+                    # 与导入记录共用的连接由ledger.close归还
+                    id_allocator.close()
+            if download is not None and cached is None:
+                # 提前返回时等待后台下载结束，再释放下载的文件
+                try:
+                    cached = download.result()
+                except Exception:
+                    pass
+            self.download_cache.release(cached)
+            self.db_manager.disconnect()
+            result.add_timing('total', time.perf_counter() - total_start)
+            if ledger is not None:
+                # 保存结果后相同的调用直接返回它，失败的导入允许重试
+                ledger.finish(result.to_dict())
+                ledger.close()
+    
+    def _create_inserter(self, table_name: str, columns: List[str], load_method: str,
+                         insert_workers: Optional[int], expected_rows: Optional[int],
+                         partition_dbs: List[DatabaseManager], update_columns: Optional[List[str]] = None):
+        """
+        创建插入器：并行写入的连接数大于1且数据量足够大时，另外借出连接创建多分区的并行插入器，
+        借出的连接加入partition_dbs由调用方归还；连接池没有空闲连接时减少分区数
+        """
+        if update_columns is not None:
+            # 同一个键的多行分到不同分区时更新顺序不确定，并发更新唯一索引也容易死锁，upsert使用单连接
+            return create_inserter(self.db_manager, table_name, columns, load_method, update_columns=update_columns)
+        workers = insert_workers if insert_workers is not None else Config.DB_INSERT_WORKERS
+        if workers > 1 and expected_rows is not None and expected_rows < Config.DB_PARALLEL_MIN_ROWS:
+            self.logger.info(f"预计{expected_rows}行数据，少于{Config.DB_PARALLEL_MIN_ROWS}行，使用单连接写入")
+            workers = 1
+        if workers > 1:
+            partition_dbs.extend(self.db_manager.connect_partitions(workers - 1))
+        if not partition_dbs:
+            return create_inserter(self.db_manager, table_name, columns, load_method)
+        self.logger.info(f"使用{len(partition_dbs) + 1}个连接并行写入表 '{table_name}'")
+        return ParallelInserter([self.db_manager] + partition_dbs, table_name, columns, load_method)
+    
+    def _previous_result(self, data: Dict[str, Any], result: ImportResult) -> ImportResult:
+        """用导入记录中保存的结果构造返回值，不再解析和插入"""
+        known_fields = {item.name for item in fields(ImportResult)}
+        previous = ImportResult(**{key: value for key, value in data.items() if key in known_fields})
+        previous.duplicate = True
+        previous.timings = result.timings
+        previous.message = f"相同的文件已经导入过，没有重复导入（之前的结果: {previous.message}）"
+        self.logger.info(previous.message)
+        return previous
+    
+    def _plan_upsert(self, result: ImportResult, table_name: str, file_columns: List[Any],
+                     update_columns: Optional[List[str]]) -> Tuple[str, List[str]]:
+        """
+        检查upsert模式能否按键匹配已有的行并记录使用的键，返回(错误信息, 键冲突时更新的列)；
+        默认更新文件中不属于任何键的列，自动生成的id等不在文件中的列不会覆盖已有的值
+        """
+        keys = self.db_manager.get_unique_keys(table_name)
+        if not keys:
+            return f"表 '{table_name}' 没有主键或唯一索引，不能使用upsert模式", []
+        file_columns = [str(col) for col in file_columns]
+        result.upsert_keys = [name for name, columns in keys.items() if all(col in file_columns for col in columns)]
+        if not result.upsert_keys:
+            return f"文件中没有表 '{table_name}' 的主键或唯一索引的全部列，无法匹配已有的行: {keys}", []
+        if update_columns is None:
+            key_columns = {col for columns in keys.values() for col in columns}
+            update_columns = [col for col in file_columns if col not in key_columns]
+        else:
+            unknown_columns = [col for col in update_columns if col not in file_columns]
+            if unknown_columns:
+                return f"要更新的列不在文件中: {unknown_columns}", []
+        self.logger.info(f"upsert模式按 {result.upsert_keys} 匹配已有的行，更新列: {update_columns}")
+        return '', list(update_columns)
+    
+    def restore_previous_table(self, table_name: str) -> bool:
+        """撤销替换模式的导入：用保留的旧表换回目标表，换下来的表成为新的旧表"""
+        if not self.db_manager.connect():
+            self.logger.error("数据库连接失败")
+            return False
+        try:
+            return restore_backup(self.db_manager, table_name)
+        finally:
             self.db_manager.disconnect()
     
+    def cancel(self):
+        """取消正在进行的导入：停止解析和插入，回滚未提交的数据"""
+        self._cancel_event.set()
+    
+    def _prepare_source(self, result: ImportResult, excel_file_path: str, sheet_name: Optional[str],
+                        load_method: str, engine: Optional[str]) -> str:
+        """确定导入方式、文件格式和读取引擎并记录到结果中，不可用时返回错误信息"""
+        # 确定导入方式
+        result.load_method = self._choose_load_method(load_method, excel_file_path, sheet_name)
+        if not result.load_method:
+            return f"不支持的导入方式: {load_method}"
+        
+        # 确定文件格式和读取引擎
+        result.file_format = detect_file_format(excel_file_path) or 'excel'
+        try:
+            result.reader_engine = self._choose_reader_engine(
+                engine or Config.EXCEL_ENGINE, excel_file_path, result.file_format
+            )
+        except ValueError as e:
+            return str(e)
+        return ''
+    
+    def _await_download(self, download: Future, result: ImportResult, sheet_name: Optional[str],
+                        load_method: str, engine: Optional[str]) -> Tuple[Optional[CachedFile], str]:
+        """等待后台下载完成并记录下载结果，再确定导入方式和读取引擎，返回(下载的文件, 错误信息)"""
+        try:
+            cached = download.result()
+        except DownloadError as e:
+            return None, f"下载文件失败: {e}"
+        result.download_status = cached.status
+        result.source_sha256 = cached.sha256
+        return cached, self._prepare_source(result, cached.path, sheet_name, load_method, engine)
+    
+    def _start_download(self, url: str, result: ImportResult) -> Future:
+        """在后台线程中通过下载缓存获取URL，耗时计入download阶段"""
+        future: Future = Future()
+        
+        def run():
+            stage_start = time.perf_counter()
+            try:
+                cached = self.download_cache.fetch(url)
+            except BaseException as e:
+                result.add_timing('download', time.perf_counter() - stage_start)
+                future.set_exception(e)
+                return
+            result.add_timing('download', time.perf_counter() - stage_start)
+            future.set_result(cached)
+        
+        threading.Thread(target=run, name='download', daemon=True).start()
+        return future
+    
+    def _record_pipeline_timings(self, pipeline: StagePipeline, result: ImportResult):
+        """
+        把流水线的统计计入导入耗时：process为解析耗时，parse_wait为解析等待插入的时间（背压），
+        insert_wait为插入等待解析的时间；两者重叠进行，总耗时接近较慢的阶段而不是两者之和
+        """
+        stats = pipeline.stats()
+        result.add_timing('process', stats['produce_seconds'])
+        result.add_timing('parse_wait', stats['producer_wait_seconds'])
+        result.add_timing('insert_wait', stats['consumer_wait_seconds'])
+    
+    def _timed_reserve(self, id_allocator: IdAllocator, result: ImportResult):
+        """包装id分配，把耗时计入id_reserve阶段"""
+        def reserve(count: int) -> int:
+            stage_start = time.perf_counter()
+            try:
+                return id_allocator.reserve(count)
+            finally:
+                result.add_timing('id_reserve', time.perf_counter() - stage_start)
+        return reserve
+    
+    def import_workbook_sheets(self, excel_file_path: str, table_name: Optional[str] = None,
+                               sheet_tables: Optional[Dict[str, str]] = None,
+                               table_structure: Optional[Dict[str, str]] = None,
+                               chunk_size: Optional[int] = None,
+                               load_method: str = 'auto',
+                               workers: Optional[int] = None,
+                               engine: Optional[str] = None) -> WorkbookImportResult:
+        """
+        并行导入Excel文件的多个工作表，每个工作表在独立的进程中解析，通过该进程连接池中的连接写入
+        
+        每个工作表是一次独立的导入（单独的事务），某个工作表失败不影响其他工作表，
+        失败的工作表记录在结果的sheets中。导入同一张表时id由序列表分配，不会重复。
+        
+        Args:
+            excel_file_path: Excel文件路径或URL（URL只下载一次）
+            table_name: 所有工作表导入到同一张表（与sheet_tables二选一）
+            sheet_tables: 工作表名到表名的映射，只导入映射中的工作表
+            table_structure: 表结构（可选，只在所有工作表导入同一张表时使用）
+            chunk_size: 流式读取每块行数（可选）
+            load_method: 导入方式，同import_excel_to_mysql
+            workers: 并行进程数（可选，默认使用Config.IMPORT_SHEET_WORKERS，0表示CPU核数）
+            engine: 读取引擎，同import_excel_to_mysql
+        
+        Returns:
+            WorkbookImportResult: 汇总的导入结果
+        """
+        result = WorkbookImportResult()
+        total_start = time.perf_counter()
+        cached = None
+        try:
+            if not sheet_tables and not (table_name and table_name.strip()):
+                return self._fail(result, "必须指定table_name或sheet_tables")
+            
+            # URL先通过下载缓存获取本地文件，避免每个工作进程各自下载
+            file_path = excel_file_path
+            if excel_file_path.startswith(('http://', 'https://')):
+                stage_start = time.perf_counter()
+                try:
+                    cached = self.download_cache.fetch(excel_file_path)
+                except DownloadError as e:
+                    return self._fail(result, f"下载Excel文件失败: {e}")
+                finally:
+                    result.timings['download'] = time.perf_counter() - stage_start
+                file_path = cached.path
+            elif not self._validate_parameters(table_name or next(iter(sheet_tables.values())), file_path):
+                return self._fail(result, "参数验证失败")
+            if detect_file_format(file_path) != 'excel':
+                return self._fail(result, f"只有Excel文件包含多个工作表: {excel_file_path}")
+            
+            sheet_names = self.excel_processor.list_sheet_names(file_path)
+            if sheet_tables:
+                missing_sheets = [name for name in sheet_tables if name not in sheet_names]
+                if missing_sheets:
+                    return self._fail(result, f"Excel文件中不存在工作表: {missing_sheets}")
+                jobs = list(sheet_tables.items())
+            else:
+                jobs = [(name, table_name) for name in sheet_names]
+            
+            # 表结构在主进程中获取一次，传给各工作进程
+            structures = self._load_table_structures(
+                {table for _, table in jobs}, None if sheet_tables else table_structure
+            )
+            if structures is None:
+                return self._fail(result, "无法获取目标表的结构")
+            
+            workers = workers if workers is not None else Config.IMPORT_SHEET_WORKERS
+            workers = max(1, min(workers or os.cpu_count() or 1, len(jobs)))
+            self.logger.info(f"开始并行导入{len(jobs)}个工作表，使用{workers}个进程")
+            
+            # 使用spawn启动工作进程，避免在多线程的服务进程中fork
+            sheet_results: Dict[str, ImportResult] = {}
+            with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'),
+                                     initializer=_init_sheet_worker) as executor:
+                futures = {
+                    executor.submit(_import_sheet, table, file_path, structures[table],
+                                    sheet, chunk_size, load_method, engine): (sheet, table)
+                    for sheet, table in jobs
+                }
+                for future in as_completed(futures):
+                    sheet, table = futures[future]
+                    try:
+                        sheet_results[sheet] = future.result()
+                    except Exception as e:
+                        sheet_results[sheet] = ImportResult(table_name=table, message=f"工作表导入进程异常: {e}")
+                    self.logger.info(f"工作表 '{sheet}' 导入结束: {sheet_results[sheet].message}")
+            
+            # 按工作簿中的顺序汇总
+            for sheet, _ in jobs:
+                result.add_sheet(sheet, sheet_results[sheet])
+            
+            failed_sheets = result.failed_sheets()
+            if failed_sheets:
+                return self._fail(result, f"{len(failed_sheets)}个工作表导入失败: {failed_sheets}，"
+                                          f"其余工作表共导入{result.rows_inserted}条记录")
+            result.success = True
+            result.message = f"成功导入{len(jobs)}个工作表，共{result.rows_inserted}条记录"
+            self.logger.info(result.message)
+            return result
+            
+        except Exception as e:
+            return self._fail(result, f"多工作表导入过程中发生错误: {e}")
+        finally:
+            self.download_cache.release(cached)
+            result.timings['total'] = time.perf_counter() - total_start
+    
+    def _load_table_structures(self, table_names: Set[str],
+                               table_structure: Optional[Dict[str, str]] = None) -> Optional[Dict[str, Dict[str, str]]]:
+        """获取多张表的结构，任意一张表获取失败时返回None"""
+        if table_structure is not None and len(table_names) == 1:
+            return {next(iter(table_names)): table_structure}
+        if not self.db_manager.connect():
+            return None
+        try:
+            structures = {}
+            for name in table_names:
+                structures[name] = self.db_manager.get_table_structure(name)
+                if not structures[name]:
+                    self.logger.error(f"无法获取表 '{name}' 的结构")
+                    return None
+            return structures
+        finally:
+            self.db_manager.disconnect()
+    
+    def _choose_reader_engine(self, engine: str, excel_file_path: str, file_format: str = 'excel') -> str:
+        """确定实际使用的读取引擎名称，指定的引擎不可用时抛出ValueError；engine只对Excel文件有效"""
+        if file_format == 'parquet':
+            if not is_parquet_available():
+                raise ValueError("读取Parquet文件需要安装pyarrow")
+            return 'pyarrow'
+        if file_format == 'jsonl':
+            return 'json'
+        if file_format != 'excel':
+            return 'pandas'
+        reader = select_engine(excel_file_path, engine)
+        return reader.name if reader is not None else 'pandas'
+    
+    def _choose_load_method(self, load_method: str, excel_file_path: str, sheet_name: Optional[str]) -> str:
+        """确定实际使用的导入方式，不可用时返回空字符串"""
+        if load_method not in LOAD_METHODS:
+            return ''
+        if load_method == 'load_data' and not Config.DB_LOCAL_INFILE:
+            self.logger.error("未开启DB_LOCAL_INFILE，无法使用LOAD DATA LOCAL INFILE")
+            return ''
+        if load_method != 'auto':
+            return load_method
+        
+        if not Config.DB_LOCAL_INFILE:
+            return 'insert'
+        row_count = self.excel_processor.estimate_row_count(excel_file_path, sheet_name)
+        if row_count is not None and row_count >= Config.DB_LOAD_DATA_MIN_ROWS:
+            self.logger.info(f"预计{row_count}行数据，使用LOAD DATA LOCAL INFILE导入")
+            return 'load_data'
+        return 'insert'
+    
+    def _fail(self, result, message: str):
+        """记录错误并返回失败的导入结果"""
+        self.logger.error(message)
+        result.success = False
+        result.message = message
+        return result
+    
     def import_markdown_to_mysql(self, table_name: str, table_structure: Dict[str, str],
                                 columns: list, data_rows: list) -> bool:
         """
@@ -157,8 +850,9 @@ class ExcelToMySQL:
             return False
         
         # 验证文件扩展名
-        if not excel_file_path.lower().endswith(('.xlsx', '.xls')):
-            self.logger.error("文件必须是Excel格式 (.xlsx 或 .xls)")
+        if detect_file_format(excel_file_path) is None:
+            self.logger.error("文件必须是Excel (.xlsx、.xlsm、.xls、.xlsb)、CSV (.csv)、TSV (.tsv)、"
+                              "JSONL (.jsonl) 或 Parquet (.parquet) 格式，文本格式可以是.gz/.bz2/.xz压缩文件")
             return False
         
         return True
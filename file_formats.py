@@ -0,0 +1,79 @@
+import bz2
+import gzip
+import importlib.util
+import io
+import lzma
+import posixpath
+from contextlib import ExitStack, contextmanager
+from typing import Dict, Iterator, Optional, TextIO
+from urllib.parse import urlparse
+from urllib.request import urlopen
+
+# 文件格式 -> 扩展名
+FORMAT_EXTENSIONS: Dict[str, tuple] = {
+    'excel': ('.xlsx', '.xlsm', '.xls', '.xlsb'),
+    'csv': ('.csv',),
+    'tsv': ('.tsv', '.tab'),
+    'jsonl': ('.jsonl', '.ndjson'),
+    'parquet': ('.parquet', '.pq'),
+}
+
+# 文本格式可以是压缩文件，按扩展名自动解压
+COMPRESSION_OPENERS = {
+    '.gz': gzip.GzipFile,
+    '.bz2': bz2.BZ2File,
+    '.xz': lzma.LZMAFile,
+}
+COMPRESSION_EXTENSIONS = tuple(COMPRESSION_OPENERS)
+_TEXT_FORMATS = ('csv', 'tsv', 'jsonl')
+
+def _path_of(file_path: str) -> str:
+    """本地路径原样返回，URL只取路径部分（去掉查询参数）"""
+    if file_path.startswith(('http://', 'https://')):
+        return urlparse(file_path).path
+    return file_path
+
+def detect_file_format(file_path: str) -> Optional[str]:
+    """按扩展名识别文件格式，不支持的格式返回None"""
+    path = _path_of(file_path).lower()
+    root, extension = posixpath.splitext(path)
+    compressed = extension in COMPRESSION_EXTENSIONS
+    if compressed:
+        extension = posixpath.splitext(root)[1]
+    for file_format, extensions in FORMAT_EXTENSIONS.items():
+        if extension in extensions:
+            if compressed and file_format not in _TEXT_FORMATS:
+                return None
+            return file_format
+    return None
+
+def file_suffix(file_path: str) -> str:
+    """文件的完整扩展名（包括压缩扩展名，如.csv.gz），下载到临时文件时保留格式"""
+    path = _path_of(file_path)
+    root, extension = posixpath.splitext(path)
+    if extension.lower() in COMPRESSION_EXTENSIONS:
+        return posixpath.splitext(root)[1] + extension
+    return extension
+
+def supported_extensions() -> tuple:
+    """所有支持的扩展名"""
+    return tuple(extension for extensions in FORMAT_EXTENSIONS.values() for extension in extensions)
+
+def is_parquet_available() -> bool:
+    """是否安装了读取Parquet需要的pyarrow"""
+    return importlib.util.find_spec('pyarrow') is not None
+
+@contextmanager
+def open_text(file_path: str, encoding: str = 'utf-8') -> Iterator[TextIO]:
+    """以文本方式流式打开本地文件或URL，压缩文件边读边解压"""
+    extension = posixpath.splitext(_path_of(file_path).lower())[1]
+    opener = COMPRESSION_OPENERS.get(extension)
+    with ExitStack() as stack:
+        if file_path.startswith(('http://', 'https://')):
+            source = stack.enter_context(urlopen(file_path))
+        else:
+            source = stack.enter_context(open(file_path, 'rb'))
+        if opener is not None:
+            # 解压对象不会关闭传入的文件对象，由ExitStack一起关闭
+            source = stack.enter_context(opener(fileobj=source) if extension == '.gz' else opener(source))
+        yield stack.enter_context(io.TextIOWrapper(source, encoding=encoding))
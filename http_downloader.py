@@ -0,0 +1,313 @@
+import asyncio
+import concurrent.futures
+import hashlib
+import io
+import logging
+import os
+import re
+import tempfile
+from dataclasses import dataclass
+from email.message import Message
+from typing import Dict, List, Optional, Tuple
+from urllib.error import HTTPError, URLError
+from urllib.request import HTTPHandler, HTTPSHandler, Request, build_opener
+from config import Config
+
+class DownloadError(Exception):
+    """下载失败"""
+
+class DownloadTooLargeError(DownloadError):
+    """文件超过允许的最大字节数"""
+
+@dataclass
+class DownloadResult:
+    """
+    下载结果
+
+    不超过内存阈值的文件内容在data中；更大的文件写入path指向的临时文件，由调用方移动或删除。
+    服务器返回304时not_modified为True，没有内容
+    """
+    status: int
+    headers: Message
+    size: int = 0
+    sha256: str = ''
+    data: Optional[bytes] = None
+    path: Optional[str] = None
+    parts: int = 0  # 使用的Range请求数，0表示普通的整体下载
+    not_modified: bool = False
+
+    def discard(self):
+        """删除临时文件"""
+        if self.path and os.path.exists(self.path):
+            os.remove(self.path)
+        self.path = None
+
+class _ReadTimeoutMixin:
+    """连接使用请求的timeout（连接超时），连接建立后把套接字超时改为读取超时"""
+
+    read_timeout: Optional[float] = None
+
+    def do_open(self, http_class, req, **kwargs):
+        read_timeout = self.read_timeout
+
+        class Connection(http_class):
+            def connect(self):
+                super().connect()
+                self.sock.settimeout(read_timeout)
+
+        return super().do_open(Connection, req, **kwargs)
+
+class _HTTPHandler(_ReadTimeoutMixin, HTTPHandler):
+    pass
+
+class _HTTPSHandler(_ReadTimeoutMixin, HTTPSHandler):
+    pass
+
+class _SpoolTarget:
+    """
+    下载内容的写入目标：预计大小不超过阈值时写入内存，否则写入临时文件；
+    大小未知时先写入内存，超过阈值后转存到临时文件
+    """
+
+    def __init__(self, size: Optional[int], spool_bytes: int, temp_dir: Optional[str]):
+        self.spool_bytes = spool_bytes
+        self.temp_dir = temp_dir
+        self.path: Optional[str] = None
+        self.fd: Optional[int] = None
+        self.buffer: Optional[bytearray] = None
+        self.memory: Optional[io.BytesIO] = None
+        self.size = 0
+        if size is not None and size <= spool_bytes:
+            self.buffer = bytearray(size)
+        elif size is not None:
+            self._open_file()
+            os.ftruncate(self.fd, size)
+        else:
+            self.memory = io.BytesIO()
+
+    def _open_file(self):
+        if self.temp_dir:
+            os.makedirs(self.temp_dir, exist_ok=True)
+        self.fd, self.path = tempfile.mkstemp(dir=self.temp_dir, suffix='.part')
+
+    def write_at(self, offset: int, data: bytes):
+        """在指定位置写入（并行的Range请求各自写入自己的区间）"""
+        if self.buffer is not None:
+            self.buffer[offset:offset + len(data)] = data
+        else:
+            os.pwrite(self.fd, data, offset)
+        self.size = max(self.size, offset + len(data))
+
+    def append(self, data: bytes):
+        """顺序写入（大小未知的整体下载）"""
+        if self.memory is not None:
+            self.memory.write(data)
+            if self.memory.tell() > self.spool_bytes:
+                # 超过内存阈值，转存到临时文件
+                self._open_file()
+                os.write(self.fd, self.memory.getvalue())
+                self.memory = None
+            self.size += len(data)
+            return
+        self.write_at(self.size, data)
+
+    def finish(self, result: DownloadResult):
+        """把内容或临时文件交给下载结果，并计算SHA-256"""
+        result.size = self.size
+        if self.fd is None:
+            result.data = bytes(self.buffer) if self.buffer is not None else self.memory.getvalue()
+            result.sha256 = hashlib.sha256(result.data).hexdigest()
+            return
+        os.close(self.fd)
+        self.fd = None
+        digest = hashlib.sha256()
+        with open(self.path, 'rb') as f:
+            for block in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(block)
+        result.path = self.path
+        result.sha256 = digest.hexdigest()
+
+    def discard(self):
+        """下载失败时删除临时文件"""
+        if self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
+        if self.path and os.path.exists(self.path):
+            os.remove(self.path)
+
+class HttpDownloader:
+    """
+    异步HTTP下载器
+
+    第一个请求带Range头只请求第一段：服务器返回206时从Content-Range得到总大小，其余各段并行请求
+    （带If-Range，文件在下载过程中变化时不会拼接出错误的内容）；服务器不支持Range时返回200，按整体流式下载。
+    Content-Length或Content-Range超过max_bytes时在读取内容之前拒绝，大小未知时读取超过max_bytes立即停止。
+    阻塞的HTTP请求在线程中执行，不阻塞事件循环
+    """
+
+    def __init__(self, max_bytes: int = int(Config.DOWNLOAD_MAX_MB * 1024 * 1024),
+                 parallel: int = Config.DOWNLOAD_PARALLEL,
+                 part_bytes: int = int(Config.DOWNLOAD_PART_MB * 1024 * 1024),
+                 spool_bytes: int = int(Config.DOWNLOAD_SPOOL_MB * 1024 * 1024),
+                 connect_timeout: float = Config.DOWNLOAD_CONNECT_TIMEOUT,
+                 read_timeout: float = Config.DOWNLOAD_READ_TIMEOUT,
+                 retries: int = 2):
+        self.max_bytes = max_bytes
+        self.parallel = max(1, parallel)
+        self.part_bytes = max(1, part_bytes)
+        self.spool_bytes = spool_bytes
+        self.connect_timeout = connect_timeout
+        self.retries = retries
+        self.logger = logging.getLogger(__name__)
+        http_handler, https_handler = _HTTPHandler(), _HTTPSHandler()
+        http_handler.read_timeout = https_handler.read_timeout = read_timeout
+        self._opener = build_opener(http_handler, https_handler)
+
+    def download_sync(self, url: str, headers: Optional[Dict[str, str]] = None,
+                      temp_dir: Optional[str] = None) -> DownloadResult:
+        """在同步代码中下载；当前线程已有运行中的事件循环时在新线程中运行"""
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(self.download(url, headers, temp_dir))
+        with concurrent.futures.ThreadPoolExecutor(max_workers=1) as executor:
+            return executor.submit(asyncio.run, self.download(url, headers, temp_dir)).result()
+
+    async def download(self, url: str, headers: Optional[Dict[str, str]] = None,
+                       temp_dir: Optional[str] = None) -> DownloadResult:
+        """
+        下载url，headers为额外的请求头（如条件请求的If-None-Match）
+
+        大文件的临时文件创建在temp_dir中，与目标位置在同一个文件系统时可以直接重命名
+        """
+        request_headers = dict(headers or {})
+        request_headers['Range'] = f"bytes=0-{self.part_bytes - 1}"
+        try:
+            response = await asyncio.to_thread(self._open, url, request_headers)
+        except HTTPError as e:
+            if e.code == 304:
+                e.close()
+                return DownloadResult(status=304, headers=e.headers, not_modified=True)
+            if e.code == 416:
+                # 空文件不能请求第一个字节，改为普通请求
+                e.close()
+                request_headers.pop('Range')
+                response = await asyncio.to_thread(self._open, url, request_headers)
+            else:
+                raise DownloadError(f"HTTP {e.code}: {e.reason}")
+        except (URLError, OSError) as e:
+            raise DownloadError(f"请求失败: {e}")
+
+        result = DownloadResult(status=response.status, headers=response.headers)
+        try:
+            total = self._total_size(response)
+            if total is not None and self.max_bytes > 0 and total > self.max_bytes:
+                raise DownloadTooLargeError(f"文件大小{total}字节，超过上限{self.max_bytes}字节")
+            target = _SpoolTarget(total, self.spool_bytes, temp_dir)
+        except BaseException:
+            response.close()
+            raise
+
+        try:
+            if response.status == 206:
+                first = await asyncio.to_thread(self._read_range, response, 0, min(self.part_bytes, total))
+                target.write_at(0, first)
+                ranges = [(start, min(start + self.part_bytes, total) - 1)
+                          for start in range(self.part_bytes, total, self.part_bytes)]
+                result.parts = 1 + len(ranges)
+                if ranges:
+                    validator = response.headers.get('ETag') or response.headers.get('Last-Modified')
+                    if validator is None:
+                        self.logger.warning(f"服务器没有返回ETag或Last-Modified，无法保证分段下载的一致性: {url}")
+                    await self._download_ranges(url, ranges, validator, target)
+            else:
+                await asyncio.to_thread(self._read_stream, response, target)
+                if total is not None and target.size != total:
+                    raise DownloadError(f"内容不完整，收到{target.size}/{total}字节")
+            target.finish(result)
+        except BaseException:
+            target.discard()
+            raise
+        finally:
+            response.close()
+        self.logger.info(f"下载完成: {url}，{result.size}字节，{result.parts or 1}个请求")
+        return result
+
+    async def _download_ranges(self, url: str, ranges: List[Tuple[int, int]],
+                               validator: Optional[str], target: _SpoolTarget):
+        """并行下载其余各段，同时进行的请求数不超过parallel"""
+        semaphore = asyncio.Semaphore(self.parallel)
+
+        async def fetch(start: int, end: int):
+            async with semaphore:
+                data = await asyncio.to_thread(self._fetch_range, url, start, end, validator)
+                target.write_at(start, data)
+
+        tasks = [asyncio.create_task(fetch(start, end)) for start, end in ranges]
+        try:
+            await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+
+    def _open(self, url: str, headers: Dict[str, str]):
+        """发出请求，timeout为连接超时"""
+        return self._opener.open(Request(url, headers=headers), timeout=self.connect_timeout)
+
+    def _fetch_range(self, url: str, start: int, end: int, validator: Optional[str]) -> bytes:
+        """下载一段，失败时重试"""
+        headers = {'Range': f"bytes={start}-{end}"}
+        if validator:
+            headers['If-Range'] = validator
+        for attempt in range(self.retries + 1):
+            try:
+                with self._open(url, headers) as response:
+                    if response.status != 206:
+                        raise DownloadError(f"文件在下载过程中发生变化或服务器不再支持Range（HTTP {response.status}）")
+                    content_range = self._parse_content_range(response.headers.get('Content-Range'))
+                    if content_range is None or content_range[0] != start:
+                        raise DownloadError(f"服务器返回的区间不正确: {response.headers.get('Content-Range')}")
+                    return self._read_range(response, start, end - start + 1)
+            except DownloadError:
+                raise
+            except Exception as e:
+                if attempt == self.retries:
+                    raise DownloadError(f"下载区间{start}-{end}失败: {e}")
+                self.logger.warning(f"下载区间{start}-{end}失败，重试: {e}")
+
+    def _read_range(self, response, start: int, length: int) -> bytes:
+        """读取一段的全部内容并检查长度"""
+        data = response.read(length)
+        if len(data) != length:
+            raise DownloadError(f"区间{start}起只收到{len(data)}/{length}字节")
+        return data
+
+    def _read_stream(self, response, target: _SpoolTarget):
+        """顺序读取整体响应，超过max_bytes时停止"""
+        while True:
+            block = response.read(1024 * 1024)
+            if not block:
+                break
+            target.append(block)
+            if self.max_bytes > 0 and target.size > self.max_bytes:
+                raise DownloadTooLargeError(f"已下载{target.size}字节，超过上限{self.max_bytes}字节")
+
+    def _total_size(self, response) -> Optional[int]:
+        """206时从Content-Range得到文件总大小，200时使用Content-Length，未知时返回None"""
+        if response.status == 206:
+            content_range = self._parse_content_range(response.headers.get('Content-Range'))
+            if content_range is None or content_range[2] is None:
+                raise DownloadError(f"无法解析Content-Range: {response.headers.get('Content-Range')}")
+            return content_range[2]
+        length = response.headers.get('Content-Length')
+        return int(length) if length and length.isdigit() else None
+
+    def _parse_content_range(self, value: Optional[str]) -> Optional[Tuple[int, int, Optional[int]]]:
+        """解析"bytes 起-止/总大小"，返回(起, 止, 总大小)"""
+        match = re.match(r'bytes\s+(\d+)-(\d+)/(\d+|\*)', value or '')
+        if not match:
+            return None
+        total = None if match.group(3) == '*' else int(match.group(3))
+        return int(match.group(1)), int(match.group(2)), total
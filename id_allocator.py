@@ -0,0 +1,59 @@
+import logging
+import threading
+from typing import Optional
+
+class IdAllocator:
+    """导入时的自动id分配器：在独立的自动提交连接上从序列表预留连续id块，用完再预留下一块"""
+
+    def __init__(self, db_manager, table_name: str, id_column: str = 'id',
+                 expected_rows: Optional[int] = None, lock: Optional[threading.Lock] = None):
+        """
+        Args:
+            db_manager: 分配id使用的自动提交DatabaseManager，不能与写入数据的连接共用，
+                        否则序列行锁会持有到导入事务提交；可以与导入记录共用
+            table_name: 表名
+            id_column: id列名
+            expected_rows: 预计行数，第一次预留时按该行数预留整块，使一次导入的id尽量连续
+            lock: 与其他线程共用db_manager时串行使用连接的锁（可选）
+        """
+        self.db_manager = db_manager
+        self.table_name = table_name
+        self.id_column = id_column
+        self.expected_rows = expected_rows or 0
+        self.lock = lock or threading.Lock()
+        self.logger = logging.getLogger(__name__)
+        self.next_id = 0  # 当前块中下一个可用id
+        self.block_end = 0  # 当前块的结束位置（不含）
+        self.assigned = 0  # 已分配的id数
+
+    def reserve(self, count: int) -> int:
+        """分配count个连续id，返回起始id；当前块不够时预留新块，剩余部分作废"""
+        if self.block_end - self.next_id < count:
+            size = max(count, self.expected_rows - self.assigned)
+            with self.lock:
+                if self.db_manager.connection is None and not self.db_manager.connect():
+                    raise RuntimeError("分配id失败: 数据库连接失败")
+                start_id = self.db_manager.reserve_id_range(self.table_name, size, self.id_column)
+            if start_id is None:
+                raise RuntimeError(f"为表 '{self.table_name}' 分配id失败")
+            self.next_id = start_id
+            self.block_end = start_id + size
+        start_id = self.next_id
+        self.next_id += count
+        self.assigned += count
+        return start_id
+
+    def release(self):
+        """导入结束时归还当前块中没有用到的id（预计行数偏大或导入提前结束时），其他导入已在之后预留时无法归还"""
+        if self.block_end <= self.next_id or self.db_manager.connection is None:
+            return
+        with self.lock:
+            released = self.db_manager.release_id_range(self.table_name, self.next_id, self.block_end)
+        if released:
+            self.logger.info(f"已归还表 '{self.table_name}' 没有用到的id {self.next_id} - {self.block_end - 1}")
+        self.block_end = self.next_id
+
+    def close(self):
+        """释放分配id使用的连接"""
+        self.db_manager.disconnect()
+        self.db_manager.connection = None
@@ -0,0 +1,190 @@
+import hashlib
+import json
+import logging
+import threading
+import time
+import uuid
+from typing import Any, Dict, Optional
+from config import Config
+
+POLL_SECONDS = 0.5  # 等待正在进行的相同导入时查询的间隔
+
+def file_sha256(file_path: str) -> str:
+    """分块计算本地文件内容的SHA-256"""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def ledger_key(content_sha256: str, table_name: str, sheet_name: Optional[str], options: Dict[str, Any]) -> str:
+    """导入记录的键：文件内容、目标表、工作表和影响导入结果的选项共同决定"""
+    identity = json.dumps([content_sha256, table_name, sheet_name, options], sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(identity.encode('utf-8')).hexdigest()
+
+class ImportLedger:
+    """
+    导入记录：按(文件SHA-256, 表名, 工作表, 选项)记录每次导入的状态和结果，避免重试时重复导入同一个文件
+
+    acquire先用INSERT IGNORE抢占记录：抢到的调用方执行导入，结束后由finish保存结果；
+    记录已完成时直接返回保存的结果；记录正在导入时等待它完成，而不是再导入一次；
+    记录失败或导入进程失去心跳（超过IMPORT_LEDGER_STALE_SECONDS没有更新）时由等待方接手重新导入。
+    导入期间后台线程定期更新心跳时间，心跳使用各进程本地的时间，各服务器的时钟需要大致同步
+    """
+
+    _ensured_tables = set()  # 本进程已确认存在的记录表
+    _ensure_lock = threading.Lock()
+
+    def __init__(self, db_manager, table: str = Config.IMPORT_LEDGER_TABLE,
+                 wait_seconds: float = Config.IMPORT_LEDGER_WAIT_SECONDS,
+                 stale_seconds: float = Config.IMPORT_LEDGER_STALE_SECONDS):
+        """
+        Args:
+            db_manager: 专用于导入记录的DatabaseManager（未连接，自动提交），不能与写入数据的连接共用，
+                        否则记录要等到导入事务提交后才对其他调用方可见
+            table: 记录表名
+            wait_seconds: 等待相同导入完成的最长时间
+            stale_seconds: 正在导入的记录超过该时间没有心跳时视为已中断
+        """
+        self.db_manager = db_manager
+        self.table = table
+        self.wait_seconds = wait_seconds
+        self.stale_seconds = stale_seconds
+        self.logger = logging.getLogger(__name__)
+        self.key = ''
+        self.owner = uuid.uuid4().hex
+        self.claimed = False  # 是否由本次调用执行导入
+        self.waited = False  # 是否等待过相同的导入
+        self.error = ''
+        self.lock = threading.Lock()  # 心跳线程、调用方和共用连接的IdAllocator串行使用连接
+        self._stop_heartbeat = threading.Event()
+        self._heartbeat: Optional[threading.Thread] = None
+
+    def acquire(self, content_sha256: str, table_name: str, sheet_name: Optional[str],
+                options: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        抢占导入记录；相同的导入已完成时返回保存的结果（to_dict格式），否则返回None：
+        claimed为True表示由调用方执行导入，为False表示出错或等待超时（原因见error）
+        """
+        self.key = ledger_key(content_sha256, table_name, sheet_name, options)
+        try:
+            if self.db_manager.connection is None and not self.db_manager.connect():
+                self.error = "导入记录连接数据库失败"
+                return None
+            self._ensure_table()
+            deadline = time.monotonic() + self.wait_seconds
+            while True:
+                with self.lock, self.db_manager.connection.cursor() as cursor:
+                    inserted = cursor.execute(
+                        f"INSERT IGNORE INTO `{self.table}` "
+                        f"(ledger_key, content_sha256, table_name, sheet_name, options, status, owner, heartbeat_at) "
+                        f"VALUES (%s, %s, %s, %s, %s, 'running', %s, %s)",
+                        (self.key, content_sha256, table_name, sheet_name or '',
+                         json.dumps(options, sort_keys=True, ensure_ascii=False), self.owner, time.time())
+                    )
+                    if inserted:
+                        self._claim()
+                        return None
+                    cursor.execute(
+                        f"SELECT status, owner, result, heartbeat_at FROM `{self.table}` WHERE ledger_key = %s",
+                        (self.key,)
+                    )
+                    # 记录在两条语句之间被删除时下一轮重新插入
+                    row = cursor.fetchone()
+                    status, owner, result, heartbeat_at = row if row is not None else (None, None, None, 0)
+                    if status == 'completed':
+                        self.logger.info(f"文件已导入过表 '{table_name}'，返回之前的结果")
+                        return json.loads(result)
+                    # 上次导入失败或已中断时接手，多个等待方中只有一个能更新成功
+                    if status == 'failed' or (status == 'running' and time.time() - float(heartbeat_at) > self.stale_seconds):
+                        taken = cursor.execute(
+                            f"UPDATE `{self.table}` SET status = 'running', owner = %s, heartbeat_at = %s "
+                            f"WHERE ledger_key = %s AND owner = %s AND status = %s",
+                            (self.owner, time.time(), self.key, owner, status)
+                        )
+                        if taken:
+                            self.logger.info(f"接手{'失败' if status == 'failed' else '已中断'}的导入，重新导入表 '{table_name}'")
+                            self._claim()
+                            return None
+                if time.monotonic() >= deadline:
+                    self.error = f"相同文件正在导入表 '{table_name}'，等待{self.wait_seconds:.0f}秒后仍未完成"
+                    return None
+                if not self.waited:
+                    self.logger.info(f"相同文件正在导入表 '{table_name}'，等待其完成")
+                    self.waited = True
+                time.sleep(POLL_SECONDS)
+        except Exception as e:
+            self.logger.error(f"查询导入记录失败: {e}")
+            self.error = f"查询导入记录失败: {e}"
+            return None
+
+    def finish(self, result: Dict[str, Any]):
+        """保存导入结果：成功时记录为completed，之后相同的调用直接返回该结果；失败时记录为failed，允许重试"""
+        if not self.claimed:
+            return
+        self._stop()
+        status = 'completed' if result.get('success') else 'failed'
+        try:
+            with self.lock, self.db_manager.connection.cursor() as cursor:
+                cursor.execute(
+                    f"UPDATE `{self.table}` SET status = %s, result = %s, heartbeat_at = %s "
+                    f"WHERE ledger_key = %s AND owner = %s",
+                    (status, json.dumps(result, ensure_ascii=False, default=str), time.time(), self.key, self.owner)
+                )
+        except Exception as e:
+            self.logger.error(f"保存导入记录失败: {e}")
+        self.claimed = False
+
+    def close(self):
+        """停止心跳并释放连接"""
+        self._stop()
+        self.db_manager.disconnect()
+        self.db_manager.connection = None
+
+    def _claim(self):
+        """记录由本次调用执行导入，启动心跳线程"""
+        self.claimed = True
+        self._heartbeat = threading.Thread(target=self._run_heartbeat, name=f"ledger-{self.key[:8]}", daemon=True)
+        self._heartbeat.start()
+
+    def _run_heartbeat(self):
+        """导入期间定期更新心跳时间，等待方据此判断导入是否已中断"""
+        while not self._stop_heartbeat.wait(self.stale_seconds / 3):
+            try:
+                with self.lock, self.db_manager.connection.cursor() as cursor:
+                    cursor.execute(
+                        f"UPDATE `{self.table}` SET heartbeat_at = %s WHERE ledger_key = %s AND owner = %s",
+                        (time.time(), self.key, self.owner)
+                    )
+            except Exception as e:
+                self.logger.warning(f"更新导入记录心跳失败: {e}")
+
+    def _stop(self):
+        """停止心跳线程"""
+        self._stop_heartbeat.set()
+        if self._heartbeat is not None:
+            self._heartbeat.join()
+            self._heartbeat = None
+
+    def _ensure_table(self):
+        """创建记录表，每个进程只执行一次"""
+        with ImportLedger._ensure_lock:
+            if (Config.DB_NAME, self.table) in ImportLedger._ensured_tables:
+                return
+            with self.db_manager.connection.cursor() as cursor:
+                cursor.execute(f"""
+                    CREATE TABLE IF NOT EXISTS `{self.table}` (
+                        `ledger_key` CHAR(64) NOT NULL PRIMARY KEY,
+                        `content_sha256` CHAR(64) NOT NULL,
+                        `table_name` VARCHAR(64) NOT NULL,
+                        `sheet_name` VARCHAR(255) NOT NULL,
+                        `options` TEXT NOT NULL,
+                        `status` VARCHAR(16) NOT NULL,
+                        `owner` CHAR(32) NOT NULL,
+                        `heartbeat_at` DOUBLE NOT NULL,
+                        `result` LONGTEXT NULL,
+                        `created_at` TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+                        KEY `idx_content` (`content_sha256`)
+                    ) ENGINE=InnoDB
+                """)
+            ImportLedger._ensured_tables.add((Config.DB_NAME, self.table))
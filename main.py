@@ -7,30 +7,25 @@ Excel到MySQL数据导入工具
 
 import argparse
 import sys
-import tempfile
-import os
-import shutil
 from typing import Dict
 from urllib.parse import urlparse
-from urllib.request import urlopen
 from excel_to_mysql import ExcelToMySQL
+from download_cache import download_cache
+from http_downloader import DownloadError
 
 def download_excel_file(url: str) -> str:
     """
-    下载Excel文件到临时目录，返回本地文件路径
+    通过下载缓存获取Excel文件，返回本地文件路径（缓存中的文件，不要删除）
+
+    同一个URL在有效期内重复运行不会再次下载，过期后服务器返回304时也不会重新下载
     """
     try:
-        with urlopen(url) as response:
-            if response.status != 200:
-                print(f"下载失败，HTTP状态码: {response.status}")
-                return ''
-            suffix = '.xlsx' if url.lower().endswith('.xlsx') else '.xls'
-            with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp_file:
-                shutil.copyfileobj(response, tmp_file)
-                return tmp_file.name
-    except Exception as e:
+        cached = download_cache.fetch(url)
+    except DownloadError as e:
         print(f"下载Excel文件失败: {e}")
         return ''
+    print(f"下载缓存: {cached.status}，SHA-256: {cached.sha256}")
+    return cached.path
 
 def get_table_structure_from_db(table_name: str) -> Dict[str, str]:
     """
@@ -67,11 +62,12 @@ def main():
 使用示例:
   python main.py -t users -f https://example.com/users.xlsx
   python main.py -t products -f https://example.com/products.xlsx -w "Sheet1"
+  python main.py -t events -f https://example.com/events.csv.gz
         """
     )
     
     parser.add_argument('-t', '--table', required=True, help='表名')
-    parser.add_argument('-f', '--file', required=True, help='Excel文件URL')
+    parser.add_argument('-f', '--file', required=True, help='Excel文件URL（也支持CSV、TSV、JSONL、Parquet）')
     parser.add_argument('-w', '--worksheet', help='工作表名称（可选）')
     parser.add_argument('-v', '--verbose', action='store_true', help='显示详细日志')
     
@@ -96,9 +92,6 @@ def main():
     table_structure = get_table_structure_from_db(args.table)
     if not table_structure:
         print(f"无法获取表 '{args.table}' 的结构，请确保表已存在")
-        # 清理临时文件
-        if os.path.exists(local_file_path):
-            os.remove(local_file_path)
         sys.exit(1)
     
     print(f"表结构: {table_structure}")
@@ -112,22 +105,18 @@ def main():
     if args.worksheet:
         print(f"工作表: {args.worksheet}")
     
-    success = importer.import_excel_to_mysql(
+    result = importer.import_excel_to_mysql(
         table_name=args.table,
         table_structure=table_structure,
         excel_file_path=local_file_path,
         sheet_name=args.worksheet
     )
     
-    # 清理临时文件
-    if os.path.exists(local_file_path):
-        os.remove(local_file_path)
-        print(f"已删除临时文件: {local_file_path}")
-    
-    if success:
-        print("✅ 数据导入成功!")
+    if result.success:
+        print(f"✅ 数据导入成功! 共导入{result.rows_inserted}条记录")
+        print(f"各阶段耗时: {result.to_dict()['timings']}")
     else:
-        print("❌ 数据导入失败!")
+        print(f"❌ 数据导入失败! {result.message}")
         sys.exit(1)
 
 def example_usage():
@@ -14,6 +14,8 @@ from typing import Any, Dict, List, Optional
 from pydantic import BaseModel, Field
 
 from excel_to_mysql import ExcelToMySQL
+from database import DatabaseManager, ConnectionPool
+from schema_cache import table_structure_cache
 from config import Config
 
 # 设置日志
@@ -32,6 +34,10 @@ class ImportExcelRequest(BaseModel):
     table_name: str = Field(..., description="目标数据库表名")
     excel_url: str = Field(..., description="Excel文件的URL地址")
     sheet_name: Optional[str] = Field(None, description="工作表名称（可选）")
+    engine: Optional[str] = Field(None, description="Excel读取引擎（可选），auto按文件类型和大小自动选择")
+    mode: str = Field("append", description="导入模式，append追加数据，replace原子地替换整张表并保留旧表，upsert按主键或唯一索引插入或更新，delta只发送新增和有变化的行")
+    update_columns: Optional[List[str]] = Field(None, description="upsert模式下键冲突时更新的列（可选），默认更新不属于任何键的列")
+    force: bool = Field(False, description="忽略导入记录，即使相同的文件已经导入过也重新导入")
     verbose: bool = Field(False, description="是否显示详细日志")
 
 class ImportExcelResponse(BaseModel):
@@ -41,12 +47,30 @@ class ImportExcelResponse(BaseModel):
     imported_count: Optional[int] = Field(None, description="导入的记录数")
     table_name: Optional[str] = Field(None, description="表名")
     columns: Optional[List[str]] = Field(None, description="导入的列名")
+    timings: Optional[Dict[str, float]] = Field(None, description="各阶段耗时（秒）")
+    id_start: Optional[int] = Field(None, description="导入数据的起始id")
+    id_end: Optional[int] = Field(None, description="导入数据的结束id")
+    load_method: Optional[str] = Field(None, description="实际使用的导入方式：insert 或 load_data")
+    file_format: Optional[str] = Field(None, description="识别出的文件格式：excel、csv、tsv、jsonl 或 parquet")
+    reader_engine: Optional[str] = Field(None, description="实际使用的读取引擎")
+    download_status: Optional[str] = Field(None, description="URL的下载缓存状态：hit、revalidated 或 downloaded")
+    source_sha256: Optional[str] = Field(None, description="源文件内容的SHA-256")
+    partitions: Optional[List[Dict[str, Any]]] = Field(None, description="并行写入时每个分区的状态和行数")
+    bulk_mode: Optional[bool] = Field(None, description="是否使用了批量导入模式")
+    violations: Optional[List[str]] = Field(None, description="批量导入模式下导入后校验发现的约束问题")
+    mode: Optional[str] = Field(None, description="导入模式：append、replace、upsert 或 delta")
+    backup_table: Optional[str] = Field(None, description="替换模式下保留的旧表")
+    upsert_keys: Optional[List[str]] = Field(None, description="upsert模式下使用的主键或唯一索引")
+    rows_skipped: Optional[int] = Field(None, description="增量模式下内容没有变化、没有发送的行数")
+    duplicate: Optional[bool] = Field(None, description="相同的文件已经导入过，返回的是之前的结果")
 
 class MCPExcelToMySQLServer:
     """MCP Excel到MySQL导入服务器"""
     
     def __init__(self):
-        self.importer = ExcelToMySQL()
+        # 连接池归服务器进程所有，所有工具调用共享已建立的连接
+        self.pool = ConnectionPool()
+        self.importer = ExcelToMySQL(pool=self.pool)
     
     async def import_excel_to_mysql(self, request: ImportExcelRequest) -> ImportExcelResponse:
         """
@@ -63,40 +87,27 @@ class MCPExcelToMySQLServer:
             logger.info(f"目标表名: {request.table_name}")
             
             # 执行导入
-            success = self.importer.import_excel_to_mysql(
+            result = self.importer.import_excel_to_mysql(
                 table_name=request.table_name,
                 excel_file_path=request.excel_url,
-                sheet_name=request.sheet_name
+                sheet_name=request.sheet_name,
+                engine=request.engine,
+                mode=request.mode,
+                update_columns=request.update_columns,
+                idempotent=Config.IMPORT_LEDGER_ENABLED and not request.force
             )
             
-            if success:
-                # 获取导入的记录数（这里简化处理，实际可以从日志中解析）
-                imported_count = 0
-                try:
-                    with open('excel_to_mysql.log', 'r', encoding='utf-8') as f:
-                        lines = f.readlines()
-                        for line in reversed(lines):
-                            if '成功导入' in line and '条记录' in line:
-                                # 解析记录数
-                                import re
-                                match = re.search(r'成功导入(\d+)条记录', line)
-                                if match:
-                                    imported_count = int(match.group(1))
-                                break
-                except:
-                    pass
-                
-                return ImportExcelResponse(
-                    success=True,
-                    message=f"成功导入Excel文件到表 '{request.table_name}'",
-                    imported_count=imported_count,
-                    table_name=request.table_name,
-                    columns=None
-                )
+            if result.success:
+                # 响应由导入结果的全部字段构造，新增字段只需要在ImportExcelResponse中声明
+                result_data = result.to_dict()
+                result_data['imported_count'] = result.rows_inserted
+                if not result.duplicate:
+                    result_data['message'] = f"成功导入Excel文件到表 '{request.table_name}'"
+                return ImportExcelResponse(**result_data)
             else:
                 return ImportExcelResponse(
                     success=False,
-                    message="导入失败，请检查日志文件获取详细信息",
+                    message=f"导入失败: {result.message}",
                     imported_count=None,
                     table_name=None,
                     columns=None
@@ -123,14 +134,17 @@ class MCPExcelToMySQLServer:
             Dict: 表结构信息
         """
         try:
-            if not self.importer.db_manager.connect():
+            db_manager = DatabaseManager(pool=self.pool)
+            if not db_manager.connect():
                 return {
                     "success": False,
                     "message": "数据库连接失败"
                 }
             
-            table_structure = self.importer.db_manager.get_table_structure(table_name)
-            self.importer.db_manager.disconnect()
+            try:
+                table_structure = db_manager.get_table_structure(table_name)
+            finally:
+                db_manager.disconnect()
             
             if table_structure:
                 return {
@@ -138,7 +152,8 @@ class MCPExcelToMySQLServer:
                     "message": f"成功获取表 '{table_name}' 的结构",
                     "table_name": table_name,
                     "structure": table_structure,
-                    "column_count": len(table_structure)
+                    "column_count": len(table_structure),
+                    "cache_stats": table_structure_cache.stats()
                 }
             else:
                 return {
@@ -161,8 +176,9 @@ class MCPExcelToMySQLServer:
             Dict: 连接测试结果
         """
         try:
-            if self.importer.db_manager.connect():
-                self.importer.db_manager.disconnect()
+            db_manager = DatabaseManager(pool=self.pool)
+            if db_manager.connect():
+                db_manager.disconnect()
                 return {
                     "success": True,
                     "message": "数据库连接测试成功",
@@ -0,0 +1,165 @@
+import logging
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional
+from config import Config
+
+class PipelineCancelled(Exception):
+    """流水线已被取消"""
+
+_DONE = object()  # 生产者正常结束的标记
+
+class _ProducerError:
+    """生产者抛出的异常，放入队列交给消费方重新抛出"""
+
+    def __init__(self, error: BaseException):
+        self.error = error
+
+class StagePipeline:
+    """
+    两阶段流水线：生产者（解析）在后台线程中运行，把产出的批次放入有界队列，调用方线程从队列中取出消费（插入）
+
+    队列满时生产者阻塞（背压），内存中最多保留queue_size个批次，解析再快也不会把整个文件读进内存；
+    消费方失败时调用cancel，生产者在下一次放入队列时停止并关闭迭代器（释放文件句柄）；
+    生产者抛出的异常在消费方取到该位置时重新抛出。
+    stats中记录两个阶段各自的忙碌时间和等待时间，用于判断哪个阶段是瓶颈
+    """
+
+    POLL_SECONDS = 0.1  # 阻塞等待时检查取消标记的间隔
+
+    def __init__(self, produce: Callable[[], Iterable[Any]],
+                 queue_size: int = Config.PIPELINE_QUEUE_SIZE,
+                 cancel_event: Optional[threading.Event] = None,
+                 name: str = 'pipeline'):
+        """
+        Args:
+            produce: 在生产者线程中调用，返回产出批次的可迭代对象（如生成器）
+            queue_size: 队列中最多等待消费的批次数
+            cancel_event: 外部的取消标记（可选），设置后两个阶段都停止
+            name: 生产者线程名，便于在日志中区分
+        """
+        self.produce = produce
+        self.queue: queue.Queue = queue.Queue(maxsize=max(1, queue_size))
+        self.cancel_event = cancel_event or threading.Event()
+        self.name = name
+        self.logger = logging.getLogger(__name__)
+        self._thread: Optional[threading.Thread] = None
+        self._stats = {
+            'produced': 0,
+            'consumed': 0,
+            'produce_seconds': 0.0,  # 生产者产出批次的耗时
+            'producer_wait_seconds': 0.0,  # 队列满时生产者等待的时间（背压）
+            'consumer_wait_seconds': 0.0,  # 队列空时消费方等待的时间
+            'max_queued': 0,
+        }
+
+    def __enter__(self) -> 'StagePipeline':
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+    def start(self):
+        """启动生产者线程"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run_producer, name=self.name, daemon=True)
+            self._thread.start()
+
+    def __iter__(self) -> Iterator[Any]:
+        """按顺序取出生产者产出的批次，生产者失败时抛出它的异常，被取消时抛出PipelineCancelled"""
+        self.start()
+        while True:
+            wait_start = time.perf_counter()
+            item = self._get()
+            self._stats['consumer_wait_seconds'] += time.perf_counter() - wait_start
+            if item is _DONE:
+                return
+            if isinstance(item, _ProducerError):
+                raise item.error
+            self._stats['consumed'] += 1
+            yield item
+
+    def cancel(self):
+        """取消流水线，生产者和消费方在下一次等待时停止"""
+        self.cancel_event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self.cancel_event.is_set()
+
+    def close(self):
+        """停止生产者并等待线程结束，未消费的批次被丢弃"""
+        if self._thread is None:
+            return
+        if self._thread.is_alive():
+            self.cancel()
+            self._drain()
+            self._thread.join()
+        self._drain()
+
+    def stats(self) -> Dict[str, Any]:
+        """各阶段的批次数和耗时"""
+        return dict(self._stats)
+
+    def _run_producer(self):
+        """生产者线程：逐批产出并放入队列，队列满时等待，被取消时关闭迭代器"""
+        iterator = None
+        try:
+            iterator = iter(self.produce())
+            while not self.cancelled:
+                produce_start = time.perf_counter()
+                item = next(iterator, _DONE)
+                self._stats['produce_seconds'] += time.perf_counter() - produce_start
+                if item is _DONE:
+                    break
+                self._put(item)
+                self._stats['produced'] += 1
+            self._put(_DONE)
+        except PipelineCancelled:
+            self.logger.info(f"流水线 '{self.name}' 已取消，生产者停止")
+        except BaseException as e:
+            try:
+                self._put(_ProducerError(e))
+            except PipelineCancelled:
+                pass
+        finally:
+            close = getattr(iterator, 'close', None)
+            if close is not None:
+                close()
+
+    def _put(self, item: Any):
+        """放入队列，队列满时阻塞直到有空位或被取消"""
+        wait_start = time.perf_counter()
+        try:
+            while True:
+                if self.cancelled:
+                    raise PipelineCancelled()
+                try:
+                    self.queue.put(item, timeout=self.POLL_SECONDS)
+                    break
+                except queue.Full:
+                    continue
+        finally:
+            self._stats['producer_wait_seconds'] += time.perf_counter() - wait_start
+        self._stats['max_queued'] = max(self._stats['max_queued'], self.queue.qsize())
+
+    def _get(self) -> Any:
+        """从队列取出，队列空时阻塞直到有数据或被取消"""
+        while True:
+            if self.cancelled:
+                raise PipelineCancelled("导入已取消")
+            try:
+                return self.queue.get(timeout=self.POLL_SECONDS)
+            except queue.Empty:
+                continue
+
+    def _drain(self):
+        """丢弃队列中剩余的批次，使阻塞的生产者尽快发现取消标记"""
+        while True:
+            try:
+                self.queue.get_nowait()
+            except queue.Empty:
+                return
@@ -0,0 +1,275 @@
+import datetime
+import importlib.util
+import logging
+import os
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+import openpyxl
+from openpyxl.utils.cell import column_index_from_string
+from openpyxl.worksheet._reader import WorkSheetParser
+from config import Config
+
+ENGINES = ('auto', 'openpyxl', 'calamine', 'xlrd', 'pyxlsb')
+
+# select_columns(表头) -> 需要读取的列位置（从0开始）
+ColumnSelector = Callable[[tuple], List[int]]
+
+class ReaderEngine:
+    """Excel读取引擎：逐行读取工作表，第一行作为表头，只产出选中的列"""
+
+    name = ''
+    module = ''  # 依赖的第三方模块
+    extensions: Tuple[str, ...] = ()
+
+    def __init__(self):
+        self.logger = logging.getLogger(__name__)
+
+    def is_available(self) -> bool:
+        """依赖的模块是否已安装"""
+        return importlib.util.find_spec(self.module) is not None
+
+    def supports(self, file_path: str) -> bool:
+        """是否支持该文件类型"""
+        return file_path.lower().endswith(self.extensions)
+
+    def iter_rows(self, file_path: str, sheet_name: Optional[str],
+                  select_columns: ColumnSelector) -> Iterator[tuple]:
+        """读取表头后调用select_columns确定要读取的列，再逐行产出这些列的值组成的元组（不含表头）"""
+        rows = self._iter_raw_rows(file_path, sheet_name)
+        try:
+            # 第一个非空行作为表头
+            header = next((row for row in rows if any(value not in (None, '') for value in row)), None)
+            if header is None:
+                return
+            positions = select_columns(tuple(self.convert_value(value) for value in header))
+            convert = self.convert_value
+            for row in rows:
+                width = len(row)
+                yield tuple([convert(row[i]) if i < width else None for i in positions])
+        finally:
+            rows.close()
+
+    def _iter_raw_rows(self, file_path: str, sheet_name: Optional[str]) -> Iterator[tuple]:
+        """逐行产出工作表的原始值"""
+        raise NotImplementedError
+
+    def convert_value(self, value: Any) -> Any:
+        """把引擎返回的值转换为与openpyxl一致的Python值"""
+        return value
+
+class OpenpyxlEngine(ReaderEngine):
+    """openpyxl只读模式，流式解析，内存占用与行数无关，只解析选中列的单元格"""
+
+    name = 'openpyxl'
+    module = 'openpyxl'
+    extensions = ('.xlsx', '.xlsm')
+
+    def iter_rows(self, file_path: str, sheet_name: Optional[str],
+                  select_columns: ColumnSelector) -> Iterator[tuple]:
+        workbook = openpyxl.load_workbook(file_path, read_only=True, data_only=True)
+        try:
+            worksheet = workbook[sheet_name] if sheet_name else workbook.worksheets[0]
+            try:
+                parser = _ProjectedSheetParser(
+                    worksheet._get_source(), worksheet._shared_strings,
+                    data_only=worksheet.parent.data_only, epoch=worksheet.parent.epoch,
+                    date_formats=worksheet.parent._date_formats,
+                    timedelta_formats=worksheet.parent._timedelta_formats
+                )
+            except (AttributeError, TypeError) as e:
+                self.logger.info(f"无法只解析需要的列，改为读取全部列: {e}")
+                yield from self._iter_all_columns(worksheet, select_columns)
+                return
+
+            try:
+                rows = parser.parse()
+                # 第一个非空行作为表头，只有格式的行跳过
+                first_row = next((row for row in rows if any(value not in (None, '') for _, value in row[1])), None)
+                if first_row is None:
+                    return
+                positions = select_columns(parser.row_values(first_row[1]))
+                # 列号从1开始；其他列的单元格不再解析
+                parser.columns = {position + 1: index for index, position in enumerate(positions)}
+                for _, cells in rows:
+                    yield parser.row_values(cells)
+            finally:
+                parser.source.close()
+        finally:
+            workbook.close()
+
+    def _iter_all_columns(self, worksheet, select_columns: ColumnSelector) -> Iterator[tuple]:
+        """使用openpyxl公开的iter_rows读取全部列后再选择"""
+        rows = worksheet.iter_rows(values_only=True)
+        header = next((row for row in rows if any(value not in (None, '') for value in row)), None)
+        if header is None:
+            return
+        positions = select_columns(tuple(header))
+        for row in rows:
+            width = len(row)
+            yield tuple([row[i] if i < width else None for i in positions])
+
+class CalamineEngine(ReaderEngine):
+    """基于Rust calamine的读取引擎，比openpyxl快一个数量级，但会把整个工作表读入内存"""
+
+    name = 'calamine'
+    module = 'python_calamine'
+    extensions = ('.xlsx', '.xlsm', '.xls', '.xlsb', '.ods')
+
+    def _iter_raw_rows(self, file_path: str, sheet_name: Optional[str]) -> Iterator[tuple]:
+        python_calamine = importlib.import_module(self.module)
+        workbook = python_calamine.CalamineWorkbook.from_path(file_path)
+        try:
+            sheet = workbook.get_sheet_by_name(sheet_name) if sheet_name else workbook.get_sheet_by_index(0)
+            # iter_rows从第一行开始，但不包含数据区域左侧的空列
+            padding = (None,) * (sheet.start[1] if sheet.start else 0)
+            for row in sheet.iter_rows():
+                yield padding + tuple(row)
+        finally:
+            workbook.close()
+
+    def convert_value(self, value: Any) -> Any:
+        # calamine用空字符串表示空单元格，整数以浮点数返回
+        if value == '':
+            return None
+        if isinstance(value, float) and value.is_integer():
+            return int(value)
+        if type(value) is datetime.date:
+            return datetime.datetime(value.year, value.month, value.day)
+        return value
+
+class XlrdEngine(ReaderEngine):
+    """xlrd读取旧版.xls文件"""
+
+    name = 'xlrd'
+    module = 'xlrd'
+    extensions = ('.xls',)
+
+    def _iter_raw_rows(self, file_path: str, sheet_name: Optional[str]) -> Iterator[tuple]:
+        xlrd = importlib.import_module(self.module)
+        book = xlrd.open_workbook(file_path, on_demand=True)
+        try:
+            sheet = book.sheet_by_name(sheet_name) if sheet_name else book.sheet_by_index(0)
+            for index in range(sheet.nrows):
+                yield tuple(
+                    self._cell_value(xlrd, book, cell_type, value)
+                    for cell_type, value in zip(sheet.row_types(index), sheet.row_values(index))
+                )
+        finally:
+            book.release_resources()
+
+    def _cell_value(self, xlrd, book, cell_type: int, value: Any) -> Any:
+        """按单元格类型转换xlrd返回的值"""
+        if cell_type in (xlrd.XL_CELL_EMPTY, xlrd.XL_CELL_BLANK, xlrd.XL_CELL_ERROR):
+            return None
+        if cell_type == xlrd.XL_CELL_DATE:
+            try:
+                return xlrd.xldate_as_datetime(value, book.datemode)
+            except (ValueError, OverflowError):
+                return value
+        if cell_type == xlrd.XL_CELL_BOOLEAN:
+            return bool(value)
+        if cell_type == xlrd.XL_CELL_NUMBER and value.is_integer():
+            return int(value)
+        return value
+
+class PyxlsbEngine(ReaderEngine):
+    """pyxlsb读取二进制.xlsb文件（日期以Excel序列号的数值返回）"""
+
+    name = 'pyxlsb'
+    module = 'pyxlsb'
+    extensions = ('.xlsb',)
+
+    def _iter_raw_rows(self, file_path: str, sheet_name: Optional[str]) -> Iterator[tuple]:
+        pyxlsb = importlib.import_module(self.module)
+        with pyxlsb.open_workbook(file_path) as workbook:
+            # pyxlsb的工作表索引从1开始
+            with workbook.get_sheet(sheet_name or 1) as sheet:
+                for row in sheet.rows(sparse=False):
+                    yield tuple(cell.v for cell in row)
+
+    def convert_value(self, value: Any) -> Any:
+        if isinstance(value, float) and value.is_integer():
+            return int(value)
+        return value
+
+class _ProjectedSheetParser(WorkSheetParser):
+    """只解析指定列单元格的openpyxl工作表解析器，跳过的单元格不做类型转换"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.columns: Dict[int, int] | None = None  # 列号（从1开始） -> 输出位置，None表示解析全部列
+
+    def parse_row(self, row):
+        """解析一行，返回(行号, [(列号, 值), ...])"""
+        row_number = row.get('r')
+        self.row_counter = int(float(row_number)) if row_number else self.row_counter + 1
+
+        cells = []
+        column = 0
+        for element in row:
+            coordinate = element.get('r')
+            column = column_index_from_string(coordinate.rstrip('0123456789')) if coordinate else column + 1
+            if self.columns is None or column in self.columns:
+                cells.append((column, self.parse_cell(element)['value']))
+        return self.row_counter, cells
+
+    def row_values(self, cells: List[Tuple[int, Any]]) -> tuple:
+        """把一行解析出的单元格按输出位置排列为值元组，缺失的单元格为None"""
+        if self.columns is None:
+            width = cells[-1][0] if cells else 0
+            values = [None] * width
+            for column, value in cells:
+                values[column - 1] = value
+            return tuple(values)
+        values = [None] * len(self.columns)
+        for column, value in cells:
+            values[self.columns[column]] = value
+        return tuple(values)
+
+_READERS: Dict[str, ReaderEngine] = {
+    engine.name: engine for engine in (OpenpyxlEngine(), CalamineEngine(), XlrdEngine(), PyxlsbEngine())
+}
+
+# 自动选择时各文件类型的候选引擎，按优先顺序排列
+_AUTO_ORDER: Dict[str, Tuple[str, ...]] = {
+    '.xlsx': ('calamine', 'openpyxl'),
+    '.xlsm': ('calamine', 'openpyxl'),
+    '.xls': ('xlrd', 'calamine'),
+    '.xlsb': ('pyxlsb', 'calamine'),
+    '.ods': ('calamine',),
+}
+
+def available_engines() -> List[str]:
+    """已安装的读取引擎"""
+    return [name for name, reader in _READERS.items() if reader.is_available()]
+
+def select_engine(file_path: str, engine: str = 'auto') -> Optional[ReaderEngine]:
+    """
+    为本地文件选择读取引擎
+
+    指定引擎时检查是否已安装、是否支持该文件类型，不满足时抛出ValueError；
+    auto按文件类型选择：xlsx优先使用calamine，但超过EXCEL_CALAMINE_MAX_MB的文件使用openpyxl流式读取，
+    避免整个工作表读入内存。没有可用引擎时返回None，由调用方退回pandas
+    """
+    if engine not in ENGINES:
+        raise ValueError(f"不支持的读取引擎: {engine}，可选: {', '.join(ENGINES)}")
+    if engine != 'auto':
+        reader = _READERS[engine]
+        if not reader.is_available():
+            raise ValueError(f"读取引擎 '{engine}' 未安装（需要{reader.module}）")
+        if not reader.supports(file_path):
+            raise ValueError(f"读取引擎 '{engine}' 不支持该文件类型: {file_path}")
+        return reader
+
+    candidates = _AUTO_ORDER.get(os.path.splitext(file_path.lower())[1], ())
+    try:
+        file_size = os.path.getsize(file_path)
+    except OSError:
+        file_size = 0
+    for name in candidates:
+        reader = _READERS[name]
+        if not reader.is_available():
+            continue
+        if name == 'calamine' and 'openpyxl' in candidates and file_size > Config.EXCEL_CALAMINE_MAX_MB * 1024 * 1024:
+            continue
+        return reader
+    return None
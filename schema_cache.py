@@ -0,0 +1,96 @@
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+from config import Config
+
+class TableStructureCache:
+    """进程级表结构缓存，按(数据库, 表名)缓存，过期后用表的版本信息重新验证"""
+
+    def __init__(self, ttl: float = Config.SCHEMA_CACHE_TTL):
+        self.ttl = ttl
+        self.logger = logging.getLogger(__name__)
+        self._lock = threading.Lock()
+        # (数据库, 表名) -> (表结构, 版本信息, 验证时间)
+        self._entries: Dict[Tuple[str, str], Tuple[Dict[str, str], Any, float]] = {}
+        self._stats = {'hits': 0, 'misses': 0, 'revalidations': 0, 'invalidations': 0}
+
+    def get(self, database: str, table_name: str,
+            fetch_version: Callable[[], Any],
+            fetch_structure: Callable[[], Dict[str, str]]) -> Dict[str, str]:
+        """
+        获取表结构，未缓存或版本变化时调用fetch_structure重新查询
+
+        Args:
+            database: 数据库名
+            table_name: 表名
+            fetch_version: 查询表的版本信息（如列和索引的校验和），表结构变化时版本信息变化
+            fetch_structure: 查询完整的表结构
+        """
+        key = (database, table_name)
+        if self.ttl <= 0:
+            self._count('misses')
+            return fetch_structure()
+
+        with self._lock:
+            entry = self._entries.get(key)
+        now = time.monotonic()
+
+        if entry is not None:
+            structure, version, validated_at = entry
+            if now - validated_at < self.ttl:
+                self._count('hits')
+                return dict(structure)
+
+            # 缓存已过期，版本信息没变时只刷新验证时间，不重新查询列信息
+            current_version = fetch_version()
+            if current_version is not None and current_version == version:
+                with self._lock:
+                    self._entries[key] = (structure, version, now)
+                self._count('hits')
+                self._count('revalidations')
+                return dict(structure)
+            self.logger.info(f"表 '{table_name}' 的版本已变化，重新获取表结构")
+        else:
+            current_version = fetch_version()
+
+        self._count('misses')
+        structure = fetch_structure()
+        if structure:
+            with self._lock:
+                self._entries[key] = (dict(structure), current_version, now)
+        return structure
+
+    def invalidate(self, database: str, table_name: Optional[str] = None):
+        """使缓存失效，不指定表名时使整个数据库的缓存失效"""
+        with self._lock:
+            keys = [key for key in self._entries
+                    if key[0] == database and (table_name is None or key[1] == table_name)]
+            for key in keys:
+                del self._entries[key]
+            self._stats['invalidations'] += len(keys)
+        if keys:
+            self.logger.info(f"表结构缓存已失效: {[key[1] for key in keys]}")
+
+    def clear(self):
+        """清空缓存和统计"""
+        with self._lock:
+            self._entries.clear()
+            for name in self._stats:
+                self._stats[name] = 0
+
+    def stats(self) -> Dict[str, int]:
+        """缓存命中统计"""
+        with self._lock:
+            return dict(self._stats, size=len(self._entries))
+
+    def _count(self, name: str):
+        """累加统计计数"""
+        with self._lock:
+            self._stats[name] += 1
+
+# 进程内共享的表结构缓存
+table_structure_cache = TableStructureCache()
+
+# 进程内共享的主键和唯一索引缓存（索引名 -> 列名列表），upsert按这些键更新已存在的行
+table_key_cache = TableStructureCache()
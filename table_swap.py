@@ -0,0 +1,93 @@
+import logging
+import uuid
+from typing import Optional
+
+MAX_IDENTIFIER_LENGTH = 64  # MySQL表名的最大长度
+BACKUP_SUFFIX = '__old'
+
+def derived_table_name(table_name: str, suffix: str) -> str:
+    """在表名后加后缀，超过MySQL表名长度限制时截短原表名"""
+    return table_name[:MAX_IDENTIFIER_LENGTH - len(suffix)] + suffix
+
+def backup_table_name(table_name: str) -> str:
+    """替换模式保留的旧表名"""
+    return derived_table_name(table_name, BACKUP_SUFFIX)
+
+class StagingTable:
+    """
+    替换模式的临时表：按目标表的结构（CREATE TABLE ... LIKE，包括索引）创建临时表，
+    数据全部写入临时表，提交后用一条RENAME TABLE原子地换入，读取方不会看到写了一半的表
+
+    换下来的旧表保留为 <表名>__old，可以用restore_backup换回；只保留最近一份旧表。
+    CREATE TABLE ... LIKE不复制外键，而RENAME会让其他表的外键跟随旧表，
+    所以有外键或被外键引用的表不能使用替换模式
+    """
+
+    def __init__(self, db_manager, table_name: str):
+        """
+        Args:
+            db_manager: 已连接的DatabaseManager
+            table_name: 要替换的目标表
+        """
+        self.db_manager = db_manager
+        self.table_name = table_name
+        # 临时表名带随机后缀，同一张表的并发替换互不干扰
+        self.staging_name = derived_table_name(table_name, f"__stg_{uuid.uuid4().hex[:8]}")
+        self.backup_name = backup_table_name(table_name)
+        self.created = False
+        self.swapped = False
+        self.logger = logging.getLogger(__name__)
+
+    def create(self) -> str:
+        """创建临时表，成功返回空字符串，失败返回错误信息"""
+        foreign_keys = self.db_manager.get_foreign_keys(self.table_name)
+        referencing = self.db_manager.get_referencing_tables(self.table_name)
+        if referencing is None:
+            return f"无法查询引用表 '{self.table_name}' 的外键"
+        if foreign_keys or referencing:
+            return f"表 '{self.table_name}' 有外键约束或被其他表的外键引用，不能使用替换模式"
+        if not self.db_manager.execute_sql(f"CREATE TABLE `{self.staging_name}` LIKE `{self.table_name}`"):
+            return f"创建临时表 '{self.staging_name}' 失败"
+        self.created = True
+        self.logger.info(f"已创建临时表 '{self.staging_name}'，数据写入后替换表 '{self.table_name}'")
+        return ''
+
+    def swap(self) -> bool:
+        """
+        用一条RENAME TABLE把目标表换下、临时表换入，然后删除上一份旧表并把换下的表改名为旧表
+
+        换入是原子的，删除上一份旧表（可能很大）在换入之后进行，不会延长目标表不可用的时间
+        """
+        retired_name = derived_table_name(self.table_name, f"__ret_{uuid.uuid4().hex[:8]}")
+        if not self.db_manager.execute_sql(
+                f"RENAME TABLE `{self.table_name}` TO `{retired_name}`, `{self.staging_name}` TO `{self.table_name}`"):
+            self.logger.error(f"替换表 '{self.table_name}' 失败，目标表保持不变")
+            return False
+        self.swapped = True
+        self.logger.info(f"已用临时表 '{self.staging_name}' 替换表 '{self.table_name}'")
+        if not (self.db_manager.execute_sql(f"DROP TABLE IF EXISTS `{self.backup_name}`")
+                and self.db_manager.execute_sql(f"RENAME TABLE `{retired_name}` TO `{self.backup_name}`")):
+            # 替换已经完成，旧数据仍在retired_name中
+            self.logger.warning(f"旧表未能改名为 '{self.backup_name}'，旧数据保留在 '{retired_name}'")
+            self.backup_name = retired_name
+        return True
+
+    def discard(self):
+        """导入失败时删除临时表，已换入的临时表不删除"""
+        if self.created and not self.swapped:
+            if self.db_manager.execute_sql(f"DROP TABLE IF EXISTS `{self.staging_name}`"):
+                self.created = False
+
+def restore_backup(db_manager, table_name: str, backup_name: Optional[str] = None) -> bool:
+    """
+    用保留的旧表换回目标表，换下来的表成为新的旧表（再调用一次即可撤销），三步改名在一条RENAME TABLE中原子完成
+    """
+    backup_name = backup_name or backup_table_name(table_name)
+    temp_name = derived_table_name(table_name, f"__tmp_{uuid.uuid4().hex[:8]}")
+    if not db_manager.execute_sql(
+            f"RENAME TABLE `{table_name}` TO `{temp_name}`, `{backup_name}` TO `{table_name}`, "
+            f"`{temp_name}` TO `{backup_name}`"):
+        logging.getLogger(__name__).error(f"用旧表 '{backup_name}' 换回表 '{table_name}' 失败")
+        return False
+    logging.getLogger(__name__).info(f"已用旧表 '{backup_name}' 换回表 '{table_name}'")
+    return True
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试批量插入器（使用模拟连接，不需要真实数据库）
+"""
+
+from bulk_insert import BulkInserter
+from conftest import FakeServer, create_db_manager
+
+def test_single_transaction():
+    """测试默认所有批次在一个事务中提交"""
+    print("=== 测试单事务批量插入 ===")
+    db_manager = create_db_manager(FakeServer().create_table('users'))
+    rows = [(i, f'用户{i}') for i in range(25)]
+
+    inserter = BulkInserter(db_manager, 'users', ['id', 'name'], batch_size=10, commit_every=0, target_seconds=0)
+    assert inserter.insert(rows)
+    assert inserter.finish()
+
+    connection = db_manager.connection
+    print(f"批次: {connection.batches}, 事务: {connection.events}")
+    assert [size for size, _ in connection.batches] == [10, 10, 5]
+    assert connection.events == ['begin', 'commit']
+    assert inserter.rows_committed == 25
+    print("✅ 单事务提交正确")
+
+def test_commit_every():
+    """测试每N批提交一次"""
+    print("=== 测试分批提交 ===")
+    db_manager = create_db_manager(FakeServer().create_table('users'))
+    inserter = BulkInserter(db_manager, 'users', ['id'], batch_size=10, commit_every=2, target_seconds=0)
+    assert inserter.insert([(i,) for i in range(45)])
+    assert inserter.finish()
+    assert db_manager.connection.events == ['begin', 'commit', 'begin', 'commit', 'begin', 'commit']
+    print("✅ 分批提交正确")
+
+def test_packet_aware_batches():
+    """测试按max_allowed_packet限制每批字节数"""
+    print("=== 测试按字节分批 ===")
+    db_manager = create_db_manager(FakeServer(max_allowed_packet=128 * 1024).create_table('users'))
+    rows = [(i, 'x' * 10000) for i in range(50)]
+
+    inserter = BulkInserter(db_manager, 'users', ['id', 'name'], batch_size=1000, target_seconds=0)
+    assert inserter.insert(rows)
+    assert inserter.finish()
+
+    batches = db_manager.connection.batches
+    print(f"批次: {batches}")
+    assert sum(size for size, _ in batches) == 50
+    assert all(size * 10000 < 128 * 1024 for size, _ in batches)
+    assert all(max_stmt_length <= 128 * 1024 for _, max_stmt_length in batches)
+    print("✅ 每批不超过max_allowed_packet")
+
+def test_rollback_on_failure():
+    """测试插入失败时回滚"""
+    print("=== 测试失败回滚 ===")
+    db_manager = create_db_manager(FakeServer(fail_on_batch=1).create_table('users'))
+    inserter = BulkInserter(db_manager, 'users', ['id'], batch_size=10, commit_every=0, target_seconds=0)
+    assert not inserter.insert([(i,) for i in range(30)])
+    assert db_manager.connection.events == ['begin', 'rollback']
+    assert inserter.rows_committed == 0
+    print("✅ 失败时回滚")
+
+def test_adaptive_batch_size():
+    """测试往返耗时很短时批大小加倍"""
+    print("=== 测试自适应批大小 ===")
+    db_manager = create_db_manager(FakeServer().create_table('users'))
+    inserter = BulkInserter(db_manager, 'users', ['id'], batch_size=10, target_seconds=10)
+    assert inserter.insert([(i,) for i in range(70)])
+    assert inserter.finish()
+    sizes = [size for size, _ in db_manager.connection.batches]
+    print(f"批次: {sizes}")
+    assert sizes == [10, 20, 40]
+    print("✅ 批大小自适应调整")
+
+if __name__ == "__main__":
+    test_single_transaction()
+    test_commit_every()
+    test_packet_aware_batches()
+    test_rollback_on_failure()
+    test_adaptive_batch_size()
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试批量导入模式（使用模拟连接，不需要真实数据库）
+"""
+
+import os
+from bulk_mode import BulkLoadSession
+from conftest import DEFAULT_SESSION, FakeServer, create_db_manager, create_pool, write_csv
+from database import DatabaseManager
+from excel_to_mysql import ExcelToMySQL
+
+# 索引名 -> [(列名, 是否唯一, 类型, 前缀长度, 排序)]
+INDEXES = {
+    'PRIMARY': [('id', True, 'BTREE', None, 'A')],
+    'uk_email': [('email', True, 'BTREE', None, 'A')],
+    'idx_name_age': [('name', False, 'BTREE', 10, 'A'), ('age', False, 'BTREE', None, 'D')],
+    'idx_created': [('created', False, 'BTREE', None, 'A')],
+    'fk_dept': [('dept_id', False, 'BTREE', None, 'A')],
+    'ft_bio': [('bio', False, 'FULLTEXT', None, None)],
+}
+
+def create_server(**kwargs):
+    """创建有users表的模拟服务器：users有各类索引和引用departments的外键"""
+    return FakeServer(**kwargs).create_table(
+        'users', indexes=INDEXES, foreign_keys=[('fk_dept', 'dept_id', 'departments', 'id')])
+
+def alter_statements(server):
+    """执行过的ALTER TABLE语句"""
+    return [sql for sql in server.statements if sql.startswith('ALTER TABLE')]
+
+def test_session_settings_and_index_rebuild():
+    """测试关闭检查后恢复原来的设置，只删除普通二级索引并在一条语句中重建"""
+    print("=== 测试会话设置和索引重建 ===")
+
+    server = create_server()
+    db_manager = create_db_manager(server)
+    session = BulkLoadSession(db_manager, 'users')
+    assert sorted(session.drop_secondary_indexes()) == ['idx_created', 'idx_name_age']
+    indexes = server.tables['users'].indexes
+    assert 'uk_email' in indexes and 'fk_dept' in indexes and 'ft_bio' in indexes
+    print("✅ 保留了主键、唯一索引、外键索引和全文索引")
+
+    assert session.apply([db_manager])
+    assert db_manager.connection.session == {
+        'unique_checks': 0, 'foreign_key_checks': 0, 'transaction_isolation': 'READ-COMMITTED'
+    }
+    assert session.restore()
+    assert db_manager.connection.session == DEFAULT_SESSION
+    rebuild = alter_statements(server)[-1]
+    assert rebuild.count('ADD INDEX') == 2 and '`name`(10), `age` DESC' in rebuild
+    assert sorted(indexes) == ['PRIMARY', 'fk_dept', 'ft_bio', 'idx_created', 'idx_name_age', 'uk_email']
+    assert session.restore() and len(alter_statements(server)) == 3
+    print(f"✅ 会话设置已恢复，索引重建: {rebuild}")
+
+    try:
+        BulkLoadSession(db_manager, 'users', isolation_level='DIRTY')
+    except ValueError as e:
+        print(f"✅ {e}")
+    else:
+        raise AssertionError("无效的隔离级别应当报错")
+
+def test_verify_reports_violations():
+    """测试导入后校验唯一索引和外键"""
+    print("=== 测试导入后校验 ===")
+
+    assert BulkLoadSession(create_db_manager(create_server()), 'users').verify() == []
+    violations = BulkLoadSession(create_db_manager(create_server(duplicates=2, orphans=5)), 'users').verify()
+    assert violations == ['唯一索引 uk_email 有2组重复值', '外键 fk_dept 有5行引用的 departments 记录不存在']
+    print(f"✅ {violations}")
+
+def test_restore_failure_discards_connection():
+    """测试恢复失败的连接被关闭，不会回到连接池"""
+    print("=== 测试恢复失败 ===")
+
+    server = create_server()
+    pool = create_pool(server, max_size=2)
+    db_manager = DatabaseManager(pool=pool)
+    assert db_manager.connect()
+    session = BulkLoadSession(db_manager, 'users')
+    assert session.apply([db_manager])
+    db_manager.connection.fail_restore = True
+    assert not session.restore()
+    db_manager.disconnect()
+    assert pool.stats() == {'size': 0, 'idle': 0, 'in_use': 0, 'max_size': 2}
+    print("✅ 没有恢复设置的连接已丢弃")
+
+def test_import_in_bulk_mode():
+    """测试导入时所有写入连接都关闭检查，成功和失败后都恢复设置和索引"""
+    print("=== 测试批量模式导入 ===")
+
+    file_path = write_csv('name,email', [f'user{i},u{i}@example.com' for i in range(5000)])
+    structure = {'name': 'varchar(50)', 'email': 'varchar(100)'}
+    try:
+        for fail_on_batch in (None, 2):
+            server = create_server(duplicates=1, fail_on_batch=fail_on_batch)
+            pool = create_pool(server, max_size=4)
+            importer = ExcelToMySQL(pool=pool)
+            importer.excel_processor.estimate_row_count = lambda *args: 2000000
+            result = importer.import_excel_to_mysql(
+                'users', file_path, table_structure=structure, chunk_size=500,
+                insert_workers=3, bulk_mode=True)
+            pool.close()
+
+            assert result.bulk_mode and len(server.connections) == 3
+            assert all(session['unique_checks'] == 0 for session in server.insert_sessions)
+            assert all(connection.session == DEFAULT_SESSION for connection in server.connections)
+            assert 'idx_created' in server.tables['users'].indexes
+            assert alter_statements(server)[-1].startswith('ALTER TABLE `users` ADD INDEX')
+            if fail_on_batch is None:
+                assert result and result.violations == ['唯一索引 uk_email 有1组重复值']
+                print(f"✅ {result.message}")
+            else:
+                assert not result and result.violations == []
+                print(f"✅ 导入失败后同样恢复了设置和索引: {result.message}")
+    finally:
+        os.unlink(file_path)
+
+if __name__ == "__main__":
+    test_session_settings_and_index_rebuild()
+    test_verify_reports_violations()
+    test_restore_failure_discards_connection()
+    test_import_in_bulk_mode()
@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试向量化数据清理
+"""
+
+import numpy as np
+import pandas as pd
+from excel_processor import ExcelProcessor
+
+def test_clean_data():
+    """测试空字符串、空白字符串和NaN最终都转换为None"""
+    print("=== 测试数据清理 ===")
+
+    df = pd.DataFrame({
+        'name': ['张三', '', '   ', None, '李四'],
+        'mixed': [1, '', 'a', np.nan, ' \t'],
+        'score': [1.5, np.nan, 2.0, 3.0, 4.0],
+        'created_at': pd.date_range('2024-01-01', periods=5)
+    })
+    processor = ExcelProcessor()
+    cleaned_df = processor.clean_data(df)
+
+    # 原地清理，返回同一个DataFrame
+    assert cleaned_df is df
+    # 数值和日期列保持原有类型
+    assert cleaned_df['score'].dtype == np.float64
+    assert pd.api.types.is_datetime64_any_dtype(cleaned_df['created_at'])
+
+    rows = processor.convert_to_tuples(cleaned_df, ['name', 'mixed', 'score'])
+    print(f"清理结果: {rows}")
+    assert [row[0] for row in rows] == ['张三', None, None, None, '李四']
+    assert [row[1] for row in rows] == [1, None, 'a', None, None]
+    assert [row[2] for row in rows] == [1.5, None, 2.0, 3.0, 4.0]
+    print("✅ 数据清理正确")
+
+def test_clean_data_duplicate_columns():
+    """测试重复列名时按位置清理"""
+    print("=== 测试重复列名清理 ===")
+
+    df = pd.DataFrame([['', 'a'], ['b', ' ']], columns=['col', 'col'])
+    cleaned_df = ExcelProcessor().clean_data(df)
+    assert cleaned_df.iloc[:, 0].isna().tolist() == [True, False]
+    assert cleaned_df.iloc[:, 1].isna().tolist() == [False, True]
+    print("✅ 重复列名清理正确")
+
+if __name__ == "__main__":
+    test_clean_data()
+    test_clean_data_duplicate_columns()
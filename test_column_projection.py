@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试读取Excel时的列投影和类型转换
+"""
+
+import datetime
+import decimal
+import os
+import tempfile
+import pandas as pd
+from excel_processor import ExcelProcessor
+
+TABLE_STRUCTURE = {
+    'id': 'int(11)',
+    'name': 'varchar(50)',
+    'age': 'int(11)',
+    'score': 'double',
+    'joined': 'date',
+    'balance': 'decimal(10,2)'
+}
+
+def create_wide_excel(row_count: int = 25):
+    """创建包含大量表中不存在的列的测试Excel文件"""
+    data = {f'extra_{i}': [f'x{i}-{j}' for j in range(row_count)] for i in range(20)}
+    data['name'] = [f'用户{j}' for j in range(row_count)]
+    data['age'] = [20 + j if j % 5 else None for j in range(row_count)]
+    data['score'] = [j * 1.5 for j in range(row_count)]
+    data['joined'] = [f'2024-01-{j % 28 + 1:02d}' for j in range(row_count)]
+    data['balance'] = ['12345678.91'] * row_count
+    df = pd.DataFrame(data)
+
+    temp_file = tempfile.NamedTemporaryFile(suffix='.xlsx', delete=False)
+    temp_file.close()
+    df.to_excel(temp_file.name, index=False)
+    return temp_file.name
+
+def test_projection_in_chunks():
+    """测试流式读取只保留表中存在的列，并按列类型转换"""
+    print("=== 测试流式读取列投影 ===")
+
+    excel_file = create_wide_excel()
+    try:
+        processor = ExcelProcessor()
+        chunks = list(processor.read_excel_chunks(excel_file, chunk_size=10, table_structure=TABLE_STRUCTURE))
+        assert [len(chunk) for chunk in chunks] == [10, 10, 5]
+
+        chunk = chunks[0]
+        assert list(chunk.columns) == ['name', 'age', 'score', 'joined', 'balance']
+        print(f"✅ 只读取了表中存在的列: {list(chunk.columns)}")
+
+        # 含空值的整数列转换为可空整数，而不是浮点数
+        assert str(chunk['age'].dtype) == 'Int64'
+        assert chunk['age'].isna().sum() == 2
+        assert pd.api.types.is_datetime64_any_dtype(chunk['joined'].dtype)
+        # decimal列不经过浮点数，转换为精确的Decimal
+        assert chunk['balance'].iloc[0] == decimal.Decimal('12345678.91')
+        print("✅ 整数、日期、decimal列按表结构转换类型")
+    finally:
+        os.unlink(excel_file)
+
+def test_projection_in_whole_sheet():
+    """测试整表读取时同样只读取需要的列"""
+    print("=== 测试整表读取列投影 ===")
+
+    excel_file = create_wide_excel()
+    try:
+        processor = ExcelProcessor()
+        df = processor.read_excel(excel_file, table_structure=TABLE_STRUCTURE)
+        assert list(df.columns) == ['name', 'age', 'score', 'joined', 'balance']
+        assert str(df['age'].dtype) == 'Int64'
+        print("✅ 整表读取使用usecols只读取需要的列")
+    finally:
+        os.unlink(excel_file)
+
+def test_dtype_hints_keep_unconvertible_columns():
+    """测试无法无损转换的列保持原样"""
+    print("=== 测试类型转换失败时保持原值 ===")
+
+    processor = ExcelProcessor()
+    df = pd.DataFrame({
+        'age': [1, 'abc', None],
+        'count': [1.5, 2.0, None],
+        'joined': ['2024-01-01', '下周', None],
+        'created': [45000, 45001, 45002],
+    }, dtype=object)
+    hints = processor.get_dtype_hints({'age': 'int', 'count': 'bigint', 'joined': 'datetime', 'created': 'timestamp'})
+    processor.apply_dtype_hints(df, hints)
+
+    assert df['age'].tolist()[:2] == [1, 'abc']
+    assert df['count'].tolist()[:2] == [1.5, 2.0]
+    assert df['joined'].tolist()[1] == '下周'
+    # 数值不会被当作时间戳转换为日期
+    assert not pd.api.types.is_datetime64_any_dtype(df['created'].dtype)
+    print("✅ 含非法值、小数或数值日期的列不转换")
+
+def test_dtype_hints_keep_text_and_exact_decimals():
+    """测试字符串列中的数字转换为文本，decimal列转换为Decimal，浮点数按显示的值转换"""
+    print("=== 测试字符串和decimal列 ===")
+
+    processor = ExcelProcessor()
+    df = pd.DataFrame({
+        'code': ['00123', 42, 7.0, None],
+        'price': ['0.10', 0.1, 3, None],
+        'note': ['1.5', 'abc', 2.5, None],
+    }, dtype=object)
+    hints = processor.get_dtype_hints({'code': 'varchar(20)', 'price': 'decimal(10,2)', 'note': 'decimal(5,1)'})
+    assert hints == {'code': 'str', 'price': 'decimal', 'note': 'decimal'}
+    processor.apply_dtype_hints(df, hints)
+
+    assert df['code'].tolist()[:3] == ['00123', '42', '7']
+    assert df['price'].tolist()[:3] == [decimal.Decimal('0.10'), decimal.Decimal('0.1'), decimal.Decimal(3)]
+    # 含无法转换的值时整列保持原样
+    assert df['note'].tolist()[:3] == ['1.5', 'abc', 2.5]
+    print("✅ 前导零和精确小数保留")
+
+def test_process_chunks_with_projection():
+    """测试分块处理后的元组只包含表中的列，整数为Python int"""
+    print("=== 测试分块处理使用列投影 ===")
+
+    excel_file = create_wide_excel()
+    try:
+        processor = ExcelProcessor()
+        batches = list(processor.process_excel_file_chunks(
+            excel_file, TABLE_STRUCTURE, start_id=1, chunk_size=10))
+        columns, rows = batches[0]
+        assert columns == ['id', 'name', 'age', 'score', 'joined', 'balance']
+        assert rows[1][2] == 21 and isinstance(rows[1][2], int)
+        assert rows[0][2] is None
+        assert rows[0][4] == datetime.datetime(2024, 1, 1)
+        print("✅ 多余的列不会出现在INSERT中")
+    finally:
+        os.unlink(excel_file)
+
+if __name__ == "__main__":
+    test_projection_in_chunks()
+    test_projection_in_whole_sheet()
+    test_dtype_hints_keep_unconvertible_columns()
+    test_dtype_hints_keep_text_and_exact_decimals()
+    test_process_chunks_with_projection()
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试数据库连接池（使用模拟连接，不需要真实数据库）
+"""
+
+import time
+from database import ConnectionPool, DatabaseManager
+
+class FakeConnection:
+    """模拟的数据库连接"""
+    created = 0
+
+    def __init__(self):
+        FakeConnection.created += 1
+        self.open = True
+        self.alive = True
+
+    def ping(self, reconnect=False):
+        if not self.alive:
+            raise ConnectionError("连接已断开")
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        self.open = False
+
+def create_pool(**kwargs):
+    """创建使用模拟连接的连接池"""
+    FakeConnection.created = 0
+    return ConnectionPool(connection_factory=FakeConnection, **kwargs)
+
+def test_reuse_warm_connection():
+    """测试归还后的连接会被复用"""
+    print("=== 测试连接复用 ===")
+    pool = create_pool(max_size=2)
+
+    for _ in range(5):
+        db_manager = DatabaseManager(pool=pool)
+        assert db_manager.connect()
+        db_manager.disconnect()
+
+    print(f"连接池状态: {pool.stats()}")
+    assert FakeConnection.created == 1
+    assert pool.stats() == {'size': 1, 'idle': 1, 'in_use': 0, 'max_size': 2}
+    print("✅ 连接被复用")
+
+def test_bounded_pool_timeout():
+    """测试连接池已满时等待超时"""
+    print("=== 测试连接池上限 ===")
+    pool = create_pool(max_size=1)
+    connection = pool.acquire()
+    try:
+        pool.acquire(timeout=0.05)
+        assert False, "连接池已满时应该超时"
+    except TimeoutError as e:
+        print(f"超时: {e}")
+    pool.release(connection)
+    assert pool.acquire(timeout=0.05) is connection
+    print("✅ 连接数不超过上限")
+
+def test_dead_connection_replaced():
+    """测试借出时ping失败的连接被丢弃"""
+    print("=== 测试ping检查 ===")
+    pool = create_pool(max_size=1)
+    connection = pool.acquire()
+    pool.release(connection)
+    connection.alive = False
+
+    new_connection = pool.acquire()
+    assert new_connection is not connection
+    assert not connection.open
+    assert pool.stats()['size'] == 1
+    print("✅ 失效连接被替换")
+
+def test_idle_and_lifetime_eviction():
+    """测试空闲超时和最长存活时间回收"""
+    print("=== 测试连接回收 ===")
+    pool = create_pool(max_size=2, idle_timeout=0.01)
+    connection = pool.acquire()
+    pool.release(connection)
+    time.sleep(0.02)
+    assert pool.acquire() is not connection
+    assert not connection.open
+
+    pool = create_pool(max_size=2, max_lifetime=0.0)
+    connection = pool.acquire()
+    pool.release(connection)
+    assert not connection.open
+    assert pool.stats()['size'] == 0
+    print("✅ 空闲和过期连接被回收")
+
+if __name__ == "__main__":
+    test_reuse_warm_connection()
+    test_bounded_pool_timeout()
+    test_dead_connection_replaced()
+    test_idle_and_lifetime_eviction()
@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试按列转换元组和分批产出
+"""
+
+import datetime
+import numpy as np
+import pandas as pd
+from excel_processor import ExcelProcessor
+
+def create_test_frame():
+    """创建包含各种类型和空值的测试数据"""
+    return pd.DataFrame({
+        'id': [1, 2, 3, 4, 5],
+        'name': ['张三', None, '王五', '赵六', np.nan],
+        'score': [1.5, np.nan, 2.0, 3.0, 4.0],
+        'created_at': pd.to_datetime(['2024-01-01', None, '2024-01-03', '2024-01-04', '2024-01-05'])
+    })
+
+def test_convert_to_tuples():
+    """测试按指定列顺序转换，空值转换为None，日期转换为datetime"""
+    print("=== 测试元组转换 ===")
+
+    df = create_test_frame()
+    rows = ExcelProcessor().convert_to_tuples(df, ['name', 'id', 'score', 'created_at'])
+    print(f"转换结果: {rows}")
+
+    assert rows[0] == ('张三', 1, 1.5, datetime.datetime(2024, 1, 1))
+    assert rows[1] == (None, 2, None, None)
+    assert rows[4][0] is None
+    # 转换为Python原生类型，便于pymysql处理
+    assert type(rows[0][1]) is int
+    assert type(rows[0][3]) is datetime.datetime
+    # 不修改原始数据
+    assert df['score'].isna().sum() == 1
+    print("✅ 元组转换正确")
+
+def test_iter_tuple_batches():
+    """测试分批产出元组"""
+    print("=== 测试分批产出 ===")
+
+    df = create_test_frame()
+    batches = list(ExcelProcessor().iter_tuple_batches(df, ['id', 'name'], batch_size=2))
+    print(f"批次大小: {[len(batch) for batch in batches]}")
+
+    assert [len(batch) for batch in batches] == [2, 2, 1]
+    assert [row[0] for batch in batches for row in batch] == [1, 2, 3, 4, 5]
+    assert list(ExcelProcessor().iter_tuple_batches(df.iloc[0:0], ['id'])) == []
+    print("✅ 分批产出正确")
+
+if __name__ == "__main__":
+    test_convert_to_tuples()
+    test_iter_tuple_batches()
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试按行内容哈希的增量导入（使用模拟连接，不需要真实数据库）
+"""
+
+import os
+import pandas as pd
+from conftest import FakeServer, create_importer, write_csv
+from excel_processor import ExcelProcessor
+from schema_cache import table_key_cache
+
+def create_server():
+    """创建users表按email唯一的模拟服务器；行哈希索引表由导入时创建"""
+    return FakeServer().create_table('users', unique_keys={'uk_email': ['email']})
+
+def find_user(server, email):
+    return next(row for row in server.rows('users') if row['email'] == email)
+
+def write_users(lines):
+    return write_csv('email,name,age', lines)
+
+STRUCTURE = {'email': 'varchar(100)', 'name': 'varchar(50)', 'age': 'int(11)'}
+
+def test_row_hashes_ignore_chunk_dtypes():
+    """测试同一行在不同块中列类型不同时哈希相同，内容不同时哈希不同"""
+    print("=== 测试行哈希 ===")
+
+    processor = ExcelProcessor()
+    typed = pd.DataFrame({'name': ['a', None], 'age': pd.array([1, None], dtype='Int64')})
+    text = pd.DataFrame({'name': ['a', None], 'age': ['1', None]}, index=[10, 11])
+    assert (processor.row_hashes(typed, ['name', 'age']) == processor.row_hashes(text, ['name', 'age'])).all()
+    changed = pd.DataFrame({'name': ['a', ''], 'age': ['2', None]})
+    assert not (processor.row_hashes(changed, ['name', 'age']) == processor.row_hashes(text, ['name', 'age'])).any()
+    print("✅ 哈希只取决于内容")
+
+def test_delta_import_sends_only_changes():
+    """测试重复导入相同的文件不发送任何行，修改少量行后只发送这些行"""
+    print("=== 测试增量导入 ===")
+
+    lines = [f'u{i}@example.com,user{i},{i % 90}' for i in range(5000)]
+    first = write_users(lines)
+    for i in range(0, 2000, 100):
+        lines[i] = f'u{i}@example.com,renamed{i},{i % 90}'
+    third = write_users(lines + [f'new{i}@example.com,new{i},1' for i in range(10)])
+    try:
+        table_key_cache.clear()
+        server = create_server()
+        result = create_importer(server).import_excel_to_mysql(
+            'users', first, table_structure=STRUCTURE, chunk_size=1000, mode='delta')
+        assert result and result.rows_inserted == 5000 and len(server.rows('users__row_hashes')) == 5000
+        print(f"✅ 首次导入: {result.message}")
+
+        server.rows_sent = {}
+        result = create_importer(server).import_excel_to_mysql(
+            'users', first, table_structure=STRUCTURE, chunk_size=1000, mode='delta')
+        assert result and result.rows_inserted == 0 and result.rows_skipped == 5000
+        assert server.rows_sent == {}
+        print(f"✅ 相同文件: {result.message}")
+
+        server.rows_sent = {}
+        result = create_importer(server).import_excel_to_mysql(
+            'users', third, table_structure=STRUCTURE, chunk_size=1000, mode='delta')
+        assert result and result.rows_inserted == 30 and result.rows_skipped == 4980
+        assert server.rows_sent == {'users': 30, 'users__row_hashes': 30}
+        assert find_user(server, 'u100@example.com')['name'] == 'renamed100'
+        assert len(server.rows('users')) == 5010 and len(server.rows('users__row_hashes')) == 5010
+        print(f"✅ 修改20行、新增10行: {result.message}")
+    finally:
+        os.unlink(first)
+        os.unlink(third)
+
+def test_delta_import_allocates_ids_only_for_new_rows():
+    """测试有id列时有变化的行沿用已有的id，只为新增的行分配id，不按文件行数预留"""
+    print("=== 测试增量导入的id分配 ===")
+
+    structure = {'id': 'int(11)', **STRUCTURE}
+    lines = [f'u{i}@example.com,user{i},{i % 90}' for i in range(3000)]
+    first = write_users(lines)
+    lines[5] = 'u5@example.com,renamed5,5'
+    second = write_users(lines + ['new0@example.com,new0,1', 'new1@example.com,new1,1'])
+    try:
+        table_key_cache.clear()
+        server = create_server()
+        for file_path in (first, second):
+            result = create_importer(server).import_excel_to_mysql(
+                'users', file_path, table_structure=structure, chunk_size=1000, mode='delta')
+            assert result, result.message
+        ids = {row['email']: row['id'] for row in server.rows('users')}
+        assert ids['u5@example.com'] == 6 and find_user(server, 'u5@example.com')['name'] == 'renamed5'
+        assert ids['new0@example.com'] == 3001 and ids['new1@example.com'] == 3002
+        assert server.rows('_import_id_sequence')[0]['next_id'] == 3003
+        print("✅ 修改的行保留id 6，新增的行分配3001、3002")
+
+        result = create_importer(server).import_excel_to_mysql(
+            'users', second, table_structure=structure, chunk_size=1000, mode='upsert')
+        assert result and find_user(server, 'u5@example.com')['id'] == 6
+        assert server.rows('_import_id_sequence')[0]['next_id'] == 3003 + 3002
+        print("✅ upsert模式只按实际发送的行数分配id")
+    finally:
+        os.unlink(first)
+        os.unlink(second)
+
+def test_delta_import_skips_ids_for_rows_without_recorded_id():
+    """测试没有id列时导入过的行之后加了id列再增量导入，有变化的已有行不分配id"""
+    print("=== 测试没有记录id的已有行 ===")
+
+    lines = [f'u{i}@example.com,user{i},{i % 90}' for i in range(100)]
+    first = write_users(lines)
+    lines[5] = 'u5@example.com,renamed5,5'
+    second = write_users(lines + ['new0@example.com,new0,1'])
+    try:
+        table_key_cache.clear()
+        server = create_server()
+        result = create_importer(server).import_excel_to_mysql(
+            'users', first, table_structure=STRUCTURE, mode='delta')
+        assert result and {row['row_id'] for row in server.rows('users__row_hashes')} == {0}
+
+        result = create_importer(server).import_excel_to_mysql(
+            'users', second, table_structure={'id': 'int(11)', **STRUCTURE}, mode='delta')
+        assert result and result.rows_inserted == 2
+        assert find_user(server, 'u5@example.com')['name'] == 'renamed5'
+        assert find_user(server, 'u5@example.com')['id'] == 6
+        assert find_user(server, 'new0@example.com')['id'] == 101
+        assert server.rows('_import_id_sequence')[0]['next_id'] == 102
+        print("✅ 修改的行保留id 6，只为新增的1行分配了id 101")
+    finally:
+        os.unlink(first)
+        os.unlink(second)
+
+def test_other_modes_drop_row_hashes():
+    """测试增量导入之后以upsert模式写入会删除行哈希索引，再次增量导入时重新发送全部行"""
+    print("=== 测试增量、upsert、增量 ===")
+
+    lines = [f'u{i}@example.com,user{i},{i % 90}' for i in range(100)]
+    original = write_users(lines)
+    renamed = write_users([line.replace(',user', ',renamed') for line in lines])
+    try:
+        table_key_cache.clear()
+        server = create_server()
+        result = create_importer(server).import_excel_to_mysql(
+            'users', original, table_structure=STRUCTURE, mode='delta')
+        assert result and len(server.rows('users__row_hashes')) == 100
+
+        result = create_importer(server).import_excel_to_mysql(
+            'users', renamed, table_structure=STRUCTURE, mode='upsert')
+        assert result and 'users__row_hashes' not in server.tables
+        print("✅ upsert写入后行哈希索引已删除")
+
+        server.statements.clear()
+        result = create_importer(server).import_excel_to_mysql(
+            'users', renamed, table_structure=STRUCTURE, mode='upsert')
+        assert result and server.count('DROP TABLE') == 0
+        print("✅ 没有行哈希索引时不执行DROP TABLE")
+
+        result = create_importer(server).import_excel_to_mysql(
+            'users', original, table_structure=STRUCTURE, mode='delta')
+        assert result and result.rows_inserted == 100 and result.rows_skipped == 0
+        assert find_user(server, 'u0@example.com')['name'] == 'user0'
+        print(f"✅ 再次增量导入: {result.message}")
+    finally:
+        os.unlink(original)
+        os.unlink(renamed)
+
+if __name__ == "__main__":
+    test_row_hashes_ignore_chunk_dtypes()
+    test_delta_import_sends_only_changes()
+    test_delta_import_allocates_ids_only_for_new_rows()
+    test_delta_import_skips_ids_for_rows_without_recorded_id()
+    test_other_modes_drop_row_hashes()
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试Dify MCP服务器在后台线程池中执行导入（使用模拟导入，不需要真实数据库）
+"""
+
+import asyncio
+import time
+from excel_to_mysql import ExcelToMySQL, ImportResult
+from dify_mcp_server import DifyMCPServer
+
+def slow_import(self, table_name, excel_file_path, sheet_name=None, **kwargs):
+    """模拟耗时的同步导入"""
+    time.sleep(0.3)
+    return ImportResult(success=True, table_name=table_name, rows_inserted=3)
+
+def import_request(table_name):
+    """构造导入请求"""
+    return {
+        "method": "tools/call",
+        "params": {
+            "name": "import_excel_to_mysql",
+            "arguments": {"table_name": table_name, "excel_url": "https://example.com/test.xlsx"}
+        }
+    }
+
+def run_with_slow_import(coroutine_factory):
+    """替换导入方法后运行协程"""
+    original = ExcelToMySQL.import_excel_to_mysql
+    ExcelToMySQL.import_excel_to_mysql = slow_import
+    try:
+        return asyncio.run(coroutine_factory())
+    finally:
+        ExcelToMySQL.import_excel_to_mysql = original
+
+def test_tools_list_while_importing():
+    """测试导入执行期间tools/list仍能立即响应"""
+    print("=== 测试导入期间的请求响应 ===")
+
+    async def scenario():
+        server = DifyMCPServer(import_workers=1, import_queue_size=0)
+        try:
+            import_task = asyncio.create_task(server.handle_request(import_request('users')))
+            await asyncio.sleep(0.05)
+
+            start = time.perf_counter()
+            tools_response = await server.handle_request({"method": "tools/list", "params": {}})
+            list_seconds = time.perf_counter() - start
+            assert not import_task.done()
+
+            import_response = await import_task
+            return list_seconds, tools_response, import_response
+        finally:
+            server.close()
+
+    list_seconds, tools_response, import_response = run_with_slow_import(scenario)
+    print(f"tools/list耗时: {list_seconds:.4f}s")
+    assert list_seconds < 0.1
+    assert tools_response["result"]["tools"]
+    assert import_response["result"]["imported_count"] == 3
+    print("✅ 导入不阻塞事件循环")
+
+def test_import_queue_limit():
+    """测试超过并发和排队上限的导入被拒绝"""
+    print("=== 测试导入排队上限 ===")
+
+    async def scenario():
+        server = DifyMCPServer(import_workers=1, import_queue_size=1)
+        try:
+            return await asyncio.gather(*(server.handle_request(import_request(f'table_{i}')) for i in range(3)))
+        finally:
+            server.close()
+
+    responses = run_with_slow_import(scenario)
+    results = [response["result"]["success"] for response in responses]
+    print(f"导入结果: {results}")
+    assert results == [True, True, False]
+    print("✅ 超出上限的导入被拒绝")
+
+if __name__ == "__main__":
+    test_tools_list_while_importing()
+    test_import_queue_limit()
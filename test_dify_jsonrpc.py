@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试Dify MCP服务器的JSON-RPC并发分发（使用模拟导入，不需要真实数据库）
+"""
+
+import asyncio
+import json
+import time
+from excel_to_mysql import ExcelToMySQL, ImportResult
+from dify_mcp_server import DifyMCPServer, serve
+
+def slow_import(self, table_name, excel_file_path, sheet_name=None, **kwargs):
+    """模拟耗时的同步导入"""
+    time.sleep(0.3)
+    return ImportResult(success=True, table_name=table_name, rows_inserted=1)
+
+def test_response_carries_request_id():
+    """测试响应带有请求id，通知不返回响应"""
+    print("=== 测试请求id关联 ===")
+
+    async def scenario():
+        server = DifyMCPServer()
+        try:
+            response = await server.handle_message({"jsonrpc": "2.0", "id": 7, "method": "tools/list"})
+            notification = await server.handle_message({"jsonrpc": "2.0", "method": "tools/list"})
+            unknown = await server.handle_message({"jsonrpc": "2.0", "id": "a", "method": "unknown"})
+            invalid = await server.handle_message("not a request")
+            return response, notification, unknown, invalid
+        finally:
+            server.close()
+
+    response, notification, unknown, invalid = asyncio.run(scenario())
+    assert response["id"] == 7 and response["jsonrpc"] == "2.0" and response["result"]["tools"]
+    assert notification is None
+    assert unknown["id"] == "a" and unknown["error"]["code"] == -32601
+    assert invalid["error"]["code"] == -32600
+    print("✅ 响应带有请求id")
+
+def test_batch_request():
+    """测试批量请求"""
+    print("=== 测试批量请求 ===")
+
+    async def scenario():
+        server = DifyMCPServer()
+        try:
+            return await server.handle_message([
+                {"jsonrpc": "2.0", "id": 1, "method": "tools/list"},
+                {"jsonrpc": "2.0", "method": "tools/list"},
+                {"jsonrpc": "2.0", "id": 2, "method": "unknown"}
+            ]), await server.handle_message([])
+        finally:
+            server.close()
+
+    responses, empty_batch = asyncio.run(scenario())
+    print(f"批量响应id: {[response['id'] for response in responses]}")
+    assert [response["id"] for response in responses] == [1, 2]
+    assert empty_batch["error"]["code"] == -32600
+    print("✅ 批量请求处理正确")
+
+def test_slow_import_does_not_block_other_requests():
+    """测试慢导入不阻塞后续请求，响应按完成顺序输出"""
+    print("=== 测试并发分发 ===")
+
+    lines = [
+        json.dumps({"jsonrpc": "2.0", "id": 1, "method": "tools/call", "params": {
+            "name": "import_excel_to_mysql",
+            "arguments": {"table_name": "users", "excel_url": "https://example.com/users.xlsx"}
+        }}),
+        "{bad json",
+        json.dumps({"jsonrpc": "2.0", "id": 2, "method": "tools/list"})
+    ]
+
+    async def scenario():
+        server = DifyMCPServer()
+        outputs = []
+
+        async def read_line():
+            await asyncio.sleep(0.01)
+            return lines.pop(0) + "\n" if lines else ""
+
+        try:
+            await serve(server, read_line, outputs.append)
+        finally:
+            server.close()
+        return outputs
+
+    original = ExcelToMySQL.import_excel_to_mysql
+    ExcelToMySQL.import_excel_to_mysql = slow_import
+    try:
+        outputs = asyncio.run(scenario())
+    finally:
+        ExcelToMySQL.import_excel_to_mysql = original
+
+    print(f"输出顺序: {[output['id'] for output in outputs]}")
+    assert [output["id"] for output in outputs] == [None, 2, 1]
+    assert outputs[0]["error"]["code"] == -32700
+    assert outputs[2]["result"]["success"]
+    print("✅ 慢导入不阻塞其他请求")
+
+if __name__ == "__main__":
+    test_response_carries_request_id()
+    test_batch_request()
+    test_slow_import_does_not_block_other_requests()
@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试URL下载缓存
+"""
+
+import hashlib
+import os
+import shutil
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from download_cache import DownloadCache
+from excel_to_mysql import ExcelToMySQL
+
+class FileServer:
+    """本地HTTP服务器，按路径返回内容，支持ETag条件请求，记录请求次数"""
+
+    def __init__(self):
+        self.files = {}  # 路径 -> (内容, 额外响应头)
+        self.requests = []  # (路径, 是否条件请求, 状态码)
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                content, headers = server.files.get(self.path, (None, {}))
+                if content is None:
+                    self.send_response(404)
+                    self.end_headers()
+                    server.requests.append((self.path, False, 404))
+                    return
+                etag = '"' + hashlib.md5(content).hexdigest() + '"'
+                conditional = self.headers.get('If-None-Match') is not None
+                if self.headers.get('If-None-Match') == etag:
+                    self.send_response(304)
+                    self.send_header('ETag', etag)
+                    self.end_headers()
+                    server.requests.append((self.path, conditional, 304))
+                    return
+                self.send_response(200)
+                self.send_header('ETag', etag)
+                self.send_header('Content-Length', str(len(content)))
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(content)
+                server.requests.append((self.path, conditional, 200))
+
+            def log_message(self, format, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+
+    def url(self, path: str) -> str:
+        return f"http://127.0.0.1:{self.httpd.server_address[1]}{path}"
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+def test_cache_hit_and_revalidation():
+    """测试有效期内不请求，过期后条件请求返回304，内容变化时重新下载"""
+    print("=== 测试缓存命中和重新验证 ===")
+
+    server = FileServer()
+    cache_dir = tempfile.mkdtemp()
+    try:
+        server.files['/users.csv'] = (b'name,age\nalice,20\n', {})
+        cache = DownloadCache(cache_dir, max_bytes=1024 * 1024, ttl=300)
+
+        first = cache.fetch(server.url('/users.csv'))
+        assert first.status == 'downloaded' and first.path.endswith('.csv')
+        assert first.sha256 == hashlib.sha256(b'name,age\nalice,20\n').hexdigest()
+        second = cache.fetch(server.url('/users.csv'))
+        assert second.status == 'hit' and second.path == first.path
+        assert len(server.requests) == 1
+        print("✅ 有效期内重复获取不发出请求")
+
+        cache.ttl = 0
+        for entry in os.listdir(os.path.join(cache_dir, 'urls')):
+            os.remove(os.path.join(cache_dir, 'urls', entry))
+        cache.fetch(server.url('/users.csv'))
+        third = cache.fetch(server.url('/users.csv'))
+        assert third.status == 'revalidated'
+        assert server.requests[-1] == ('/users.csv', True, 304)
+        print("✅ 过期后条件请求，服务器返回304时使用缓存")
+
+        server.files['/users.csv'] = (b'name,age\nbob,30\n', {})
+        fourth = cache.fetch(server.url('/users.csv'))
+        assert fourth.status == 'downloaded' and fourth.sha256 != first.sha256
+        print("✅ 内容变化时重新下载")
+
+        server.files['/no-cache.csv'] = (b'a\n1\n', {'Cache-Control': 'no-cache'})
+        cache.ttl = 300
+        cache.fetch(server.url('/no-cache.csv'))
+        assert cache.fetch(server.url('/no-cache.csv')).status == 'revalidated'
+        print("✅ Cache-Control: no-cache时每次都验证")
+
+        stats = cache.stats()
+        assert stats['downloads'] == 4 and stats['hits'] == 1 and stats['revalidations'] == 2
+        print(f"✅ 统计: {stats}")
+    finally:
+        server.close()
+        shutil.rmtree(cache_dir)
+
+def test_same_content_shared_and_stale_fallback():
+    """测试内容相同的URL共用文件，服务器不可用时使用旧版本"""
+    print("=== 测试内容去重和服务器不可用 ===")
+
+    server = FileServer()
+    cache_dir = tempfile.mkdtemp()
+    try:
+        content = b'id,name\n1,a\n'
+        server.files['/a.csv?token=1'] = (content, {})
+        server.files['/a.csv?token=2'] = (content, {})
+        cache = DownloadCache(cache_dir, max_bytes=1024 * 1024, ttl=0)
+        first = cache.fetch(server.url('/a.csv?token=1'))
+        second = cache.fetch(server.url('/a.csv?token=2'))
+        assert first.path == second.path
+        assert len(os.listdir(os.path.join(cache_dir, 'blobs'))) == 1
+        print("✅ 内容相同的URL共用一个缓存文件")
+
+        server.close()
+        stale = cache.fetch(server.url('/a.csv?token=1'))
+        assert stale.status == 'hit' and stale.path == first.path
+        print("✅ 服务器不可用时使用缓存的文件")
+    finally:
+        shutil.rmtree(cache_dir)
+
+def test_lru_eviction_keeps_pinned_files():
+    """测试超过大小上限时淘汰最久未使用的文件，正在使用的文件不淘汰"""
+    print("=== 测试LRU淘汰 ===")
+
+    server = FileServer()
+    cache_dir = tempfile.mkdtemp()
+    try:
+        for name in ('a', 'b', 'c'):
+            server.files[f'/{name}.csv'] = (name.encode() * 400, {})
+        cache = DownloadCache(cache_dir, max_bytes=1000, ttl=300)
+
+        a = cache.fetch(server.url('/a.csv'))
+        cache.release(a)
+        b = cache.fetch(server.url('/b.csv'))  # 不释放，正在使用
+        os.utime(b.path, (0, 0))  # 让b成为最久未使用的文件
+        c = cache.fetch(server.url('/c.csv'))
+        cache.release(c)
+
+        assert not os.path.exists(a.path)
+        assert os.path.exists(b.path) and os.path.exists(c.path)
+        assert cache.stats()['evictions'] == 1
+        print("✅ 淘汰了未使用的a，保留了正在使用的b")
+
+        # 被淘汰的文件再次获取时重新下载
+        assert cache.fetch(server.url('/a.csv')).status == 'downloaded'
+        print("✅ 已淘汰的文件重新下载")
+    finally:
+        server.close()
+        shutil.rmtree(cache_dir)
+
+def test_import_uses_cache():
+    """测试导入URL时通过缓存下载，结果中记录下载状态和内容哈希（数据库不可用时在连接阶段失败）"""
+    print("=== 测试导入使用下载缓存 ===")
+
+    server = FileServer()
+    cache_dir = tempfile.mkdtemp()
+    try:
+        server.files['/orders'] = (b'name,amount\nx,1\n', {'Content-Type': 'text/csv; charset=utf-8'})
+        importer = ExcelToMySQL()
+        importer.download_cache = DownloadCache(cache_dir, max_bytes=1024 * 1024, ttl=300)
+        importer.db_manager.connect = lambda: False
+
+        first = importer.import_excel_to_mysql('orders', server.url('/orders'))
+        second = importer.import_excel_to_mysql('orders', server.url('/orders'))
+        assert first.download_status == 'downloaded' and second.download_status == 'hit'
+        assert first.file_format == 'csv'
+        assert first.source_sha256 == hashlib.sha256(b'name,amount\nx,1\n').hexdigest()
+        assert 'download' in first.timings and len(server.requests) == 1
+        assert importer.download_cache._pins == {}
+        print("✅ 第二次导入没有请求服务器，没有扩展名时按Content-Type识别为CSV")
+    finally:
+        server.close()
+        shutil.rmtree(cache_dir)
+
+if __name__ == "__main__":
+    test_cache_hit_and_revalidation()
+    test_same_content_shared_and_stale_fallback()
+    test_lru_eviction_keeps_pinned_files()
+    test_import_uses_cache()
@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试CSV、TSV、JSONL和Parquet文件的读取
+"""
+
+import asyncio
+import datetime
+import gzip
+import json
+import os
+import tempfile
+import pandas as pd
+from conftest import FakeServer, create_importer
+from excel_processor import ExcelProcessor
+from excel_to_mysql import ExcelToMySQL
+from file_formats import detect_file_format, file_suffix, is_parquet_available
+from mcp_server import ImportExcelRequest, MCPExcelToMySQLServer
+from schema_cache import table_structure_cache
+
+TABLE_STRUCTURE = {
+    'id': 'int(11)',
+    'code': 'varchar(20)',
+    'name': 'varchar(50)',
+    'age': 'int(11)',
+    'user_id': 'bigint(20)',
+    'joined': 'date'
+}
+
+ROWS = [
+    {'code': '00123', 'name': '张三', 'age': 20, 'user_id': 9007199254740993, 'joined': '2024-01-01', 'extra': 'x'},
+    {'code': 'NA', 'name': None, 'age': None, 'user_id': None, 'joined': '2024-01-02', 'extra': 'y'},
+    {'code': '00456', 'name': 'Tom, Jr.', 'age': 35, 'user_id': 42, 'joined': '2024-01-03', 'extra': 'z'},
+]
+
+def write_file(suffix: str, writer):
+    """创建临时文件并用writer写入内容"""
+    temp_file = tempfile.NamedTemporaryFile(suffix=suffix, delete=False)
+    temp_file.close()
+    writer(temp_file.name)
+    return temp_file.name
+
+def write_jsonl(path: str):
+    """把ROWS写为JSONL，空值的键不写出，末尾带一个空行"""
+    with open(path, 'w', encoding='utf-8') as f:
+        for row in ROWS:
+            f.write(json.dumps({key: value for key, value in row.items() if value is not None},
+                               ensure_ascii=False) + '\n')
+        f.write('\n')
+
+def write_gzip(path: str, writer):
+    """先写入未压缩的临时文件，再压缩到path"""
+    plain_path = path + '.plain'
+    writer(plain_path)
+    with open(plain_path, 'rb') as source, gzip.open(path, 'wb') as target:
+        target.write(source.read())
+    os.unlink(plain_path)
+
+def text_writer(content: str):
+    """返回把content写入文件的writer"""
+    def writer(path: str):
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(content)
+    return writer
+
+def read_rows(file_path: str, chunk_size: int = 2):
+    """分块处理文件，返回列名和全部行"""
+    processor = ExcelProcessor()
+    columns, rows = None, []
+    for columns, batch in processor.process_excel_file_chunks(
+            file_path, TABLE_STRUCTURE, start_id=1, chunk_size=chunk_size):
+        rows.extend(batch)
+    return columns, rows
+
+def check_rows(columns, rows):
+    """检查各格式读取出的数据：编码保留文本、大整数不丢精度、日期已转换"""
+    assert columns == ['id', 'code', 'name', 'age', 'user_id', 'joined'], columns
+    assert [row[0] for row in rows] == [1, 2, 3]
+    assert [row[1] for row in rows] == ['00123', 'NA', '00456']
+    assert rows[1][2] is None and rows[2][2] == 'Tom, Jr.'
+    assert [row[3] for row in rows] == [20, None, 35]
+    assert rows[0][4] == 9007199254740993 and rows[1][4] is None
+    assert rows[0][5] == datetime.datetime(2024, 1, 1)
+
+def test_detect_file_format():
+    """测试按扩展名识别文件格式"""
+    print("=== 测试识别文件格式 ===")
+
+    assert detect_file_format('data.xlsx') == 'excel'
+    assert detect_file_format('data.CSV') == 'csv'
+    assert detect_file_format('data.tsv.gz') == 'tsv'
+    assert detect_file_format('https://example.com/events.jsonl?token=abc') == 'jsonl'
+    assert detect_file_format('data.parquet') == 'parquet'
+    assert detect_file_format('data.parquet.gz') is None
+    assert detect_file_format('data.txt') is None
+    assert file_suffix('https://example.com/a.csv.gz?x=1') == '.csv.gz'
+    print("✅ 扩展名识别正确，压缩扩展名只用于文本格式")
+
+def test_csv_and_tsv():
+    """测试CSV、TSV和压缩CSV分块读取"""
+    print("=== 测试CSV和TSV ===")
+
+    # 按object保存，大整数不经过浮点数
+    df = pd.DataFrame(ROWS, dtype=object)
+    for suffix, writer in (
+        ('.csv', lambda path: df.to_csv(path, index=False)),
+        ('.tsv', lambda path: df.to_csv(path, index=False, sep='\t')),
+        ('.csv.gz', lambda path: df.to_csv(path, index=False, compression='gzip')),
+    ):
+        file_path = write_file(suffix, writer)
+        try:
+            check_rows(*read_rows(file_path))
+            header = ExcelProcessor().probe_header(file_path)
+            assert header == ['code', 'name', 'age', 'user_id', 'joined', 'extra']
+            print(f"✅ {suffix}读取正确，表头探测: {header}")
+        finally:
+            os.unlink(file_path)
+
+def test_jsonl():
+    """测试JSONL分块读取，缺少的键为空值"""
+    print("=== 测试JSONL ===")
+
+    for suffix, writer in (
+        ('.jsonl', write_jsonl),
+        ('.jsonl.gz', lambda path: write_gzip(path, write_jsonl)),
+    ):
+        file_path = write_file(suffix, writer)
+        try:
+            check_rows(*read_rows(file_path))
+            print(f"✅ {suffix}读取正确")
+        finally:
+            os.unlink(file_path)
+
+def test_jsonl_nested_and_invalid():
+    """测试嵌套值序列化为JSON字符串，无效的行报错"""
+    print("=== 测试JSONL嵌套值和无效行 ===")
+
+    processor = ExcelProcessor()
+    file_path = write_file('.jsonl', text_writer(
+        '{"name": "a", "tags": ["x", "y"]}\n{"name": "b", "tags": {"k": 1}}\n'))
+    try:
+        chunk = next(processor.read_jsonl_chunks(file_path, chunk_size=0))
+        assert chunk['tags'].tolist() == ['["x", "y"]', '{"k": 1}']
+        print("✅ 嵌套值转换为JSON字符串")
+    finally:
+        os.unlink(file_path)
+
+    file_path = write_file('.jsonl', text_writer('{"name": "a"}\n[1, 2]\n'))
+    try:
+        list(processor.read_jsonl_chunks(file_path))
+    except ValueError as e:
+        print(f"✅ {e}")
+    else:
+        raise AssertionError("JSON数组行应当报错")
+    finally:
+        os.unlink(file_path)
+
+def test_parquet():
+    """测试Parquet分批读取（未安装pyarrow时跳过）"""
+    print("=== 测试Parquet ===")
+
+    if not is_parquet_available():
+        print("⚠️  未安装pyarrow，跳过Parquet测试")
+        return
+    df = pd.DataFrame(ROWS, dtype=object)
+    for column in ('age', 'user_id'):
+        df[column] = pd.array(df[column].tolist(), dtype='Int64')
+    file_path = write_file('.parquet', lambda path: df.to_parquet(path, index=False))
+    try:
+        check_rows(*read_rows(file_path))
+        processor = ExcelProcessor()
+        assert processor.estimate_row_count(file_path) == 3
+        assert processor.probe_header(file_path)[:2] == ['code', 'name']
+        print("✅ Parquet读取正确，从元数据获取行数和列名")
+    finally:
+        os.unlink(file_path)
+
+def test_import_reports_format():
+    """测试不支持的格式在参数验证时拒绝，工作表导入只接受Excel"""
+    print("=== 测试导入文件格式检查 ===")
+
+    importer = ExcelToMySQL()
+    file_path = write_file('.txt', text_writer('a,b\n1,2\n'))
+    try:
+        result = importer.import_excel_to_mysql('users', file_path)
+        assert not result and result.message == "参数验证失败"
+        print("✅ .txt文件被拒绝")
+    finally:
+        os.unlink(file_path)
+
+    file_path = write_file('.csv', text_writer('a,b\n1,2\n'))
+    try:
+        result = importer.import_workbook_sheets(file_path, table_name='users')
+        assert not result and '工作表' in result.message
+        print(f"✅ {result.message}")
+    finally:
+        os.unlink(file_path)
+
+def test_mcp_response_reports_format():
+    """测试MCP服务器的导入结果与Dify服务器一样返回文件格式和读取引擎"""
+    print("=== 测试MCP导入结果中的文件格式 ===")
+
+    file_path = write_file('.csv', text_writer('name,age\nuser0,20\n'))
+    try:
+        table_structure_cache.clear()
+        server = MCPExcelToMySQLServer()
+        server.importer = create_importer(FakeServer().create_table(
+            'users', {'id': 'int(11)', 'name': 'varchar(50)', 'age': 'int(11)'}))
+        request = ImportExcelRequest(table_name='users', excel_url=file_path, force=True)
+        response = asyncio.run(server.import_excel_to_mysql(request))
+        assert response.success and response.file_format == 'csv' and response.reader_engine
+        print(f"✅ file_format={response.file_format}, reader_engine={response.reader_engine}")
+    finally:
+        os.unlink(file_path)
+
+if __name__ == "__main__":
+    test_detect_file_format()
+    test_csv_and_tsv()
+    test_jsonl()
+    test_jsonl_nested_and_invalid()
+    test_parquet()
+    test_import_reports_format()
+    test_mcp_response_reports_format()
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试只读取表头的列检查
+"""
+
+import os
+import tempfile
+import time
+import openpyxl
+import pandas as pd
+from excel_processor import ExcelProcessor
+
+def create_workbook(rows: int = 10):
+    """创建包含两个工作表的测试Excel文件，表头含空列、重复列和数字列名"""
+    workbook = openpyxl.Workbook()
+    worksheet = workbook.active
+    worksheet.title = 'data'
+    worksheet.append(['name', None, 'age', 'name', 2024])
+    for i in range(rows):
+        worksheet.append([f'用户{i}', None, 20 + i % 30, f'别名{i}', i * 1.5])
+    other = workbook.create_sheet('other')
+    other.append(['id', 'email'])
+    other.append([1, 'a@example.com'])
+
+    temp_file = tempfile.NamedTemporaryFile(suffix='.xlsx', delete=False)
+    temp_file.close()
+    workbook.save(temp_file.name)
+    return temp_file.name
+
+def test_probe_header_matches_reader():
+    """测试表头探测与完整读取得到的列名一致"""
+    print("=== 测试表头探测 ===")
+
+    excel_file = create_workbook()
+    try:
+        processor = ExcelProcessor()
+        header = processor.probe_header(excel_file)
+        assert header == list(pd.read_excel(excel_file).columns)
+        assert header == ['name', 'Unnamed: 1', 'age', 'name.1', 2024]
+        print(f"✅ 表头: {header}")
+
+        assert processor.probe_header(excel_file, 'other') == ['id', 'email']
+        assert processor.probe_header(excel_file, 'missing') is None
+        print("✅ 支持指定工作表，工作表不存在时返回None")
+
+        assert processor.estimate_row_count(excel_file) == 10
+        print("✅ 从工作表维度信息估算行数")
+    finally:
+        os.unlink(excel_file)
+
+def test_find_missing_columns():
+    """测试缺少列的检查，没有id列时不算缺少"""
+    print("=== 测试列检查 ===")
+
+    processor = ExcelProcessor()
+    structure = {'id': 'int', 'name': 'varchar(50)', 'email': 'varchar(100)'}
+    assert processor.find_missing_columns(['name', 'email'], structure) == []
+    assert processor.find_missing_columns(['name'], structure) == ['email']
+    # Excel中有_id列时不会自动生成id
+    assert processor.find_missing_columns(['_id', 'name', 'email'], structure) == ['id']
+    print("✅ 缺少的列检查正确")
+
+def test_probe_is_fast_on_large_file():
+    """测试大文件缺少列时只读表头就拒绝"""
+    print("=== 测试大文件快速拒绝 ===")
+
+    excel_file = create_workbook(rows=50000)
+    try:
+        processor = ExcelProcessor()
+        structure = {'name': 'varchar(50)', 'email': 'varchar(100)'}
+
+        start = time.perf_counter()
+        assert processor.process_excel_file(excel_file, structure) is None
+        elapsed = time.perf_counter() - start
+        print(f"✅ 缺少email列，{elapsed * 1000:.1f}ms内拒绝")
+        assert elapsed < 1.0
+    finally:
+        os.unlink(excel_file)
+
+def test_probe_skips_leading_empty_rows():
+    """测试开头是空行（包括只有格式的行）时，表头探测与流式读取一样使用第一个非空行"""
+    print("=== 测试开头的空行 ===")
+
+    workbook = openpyxl.Workbook()
+    worksheet = workbook.active
+    worksheet.row_dimensions[1].height = 30
+    worksheet['A2'].font = openpyxl.styles.Font(bold=True)
+    worksheet.append(['name', 'age'])
+    worksheet.append(['用户0', 20])
+    temp_file = tempfile.NamedTemporaryFile(suffix='.xlsx', delete=False)
+    temp_file.close()
+    workbook.save(temp_file.name)
+    try:
+        processor = ExcelProcessor()
+        assert processor.probe_header(temp_file.name) == ['name', 'age']
+        chunks = list(processor.read_chunks(temp_file.name, None, 100, None, 'openpyxl'))
+        assert list(chunks[0].columns) == ['name', 'age'] and len(chunks[0]) == 1
+        print("✅ 第3行作为表头")
+    finally:
+        os.unlink(temp_file.name)
+
+if __name__ == "__main__":
+    test_probe_header_matches_reader()
+    test_find_missing_columns()
+    test_probe_is_fast_on_large_file()
+    test_probe_skips_leading_empty_rows()
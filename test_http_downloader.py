@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试并行Range下载、内存暂存和大小限制
+"""
+
+import asyncio
+import hashlib
+import os
+import re
+import shutil
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from http_downloader import DownloadError, DownloadTooLargeError, HttpDownloader
+
+class RangeServer:
+    """支持Range和If-Range的本地HTTP服务器，记录请求和最大并发数"""
+
+    def __init__(self, content: bytes, support_range: bool = True, send_length: bool = True,
+                 delay: float = 0.0):
+        self.content = content
+        self.etag = '"v1"'
+        self.support_range = support_range
+        self.send_length = send_length
+        self.delay = delay
+        self.requests = []
+        self.active = 0
+        self.max_active = 0
+        self.lock = threading.Lock()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                with server.lock:
+                    server.active += 1
+                    server.max_active = max(server.max_active, server.active)
+                    server.requests.append(dict(self.headers))
+                try:
+                    time.sleep(server.delay)
+                    self.respond()
+                finally:
+                    with server.lock:
+                        server.active -= 1
+
+            def respond(self):
+                content = server.content
+                range_header = self.headers.get('Range')
+                if_range = self.headers.get('If-Range')
+                use_range = server.support_range and range_header and (if_range is None or if_range == server.etag)
+                if use_range:
+                    start, end = map(int, re.match(r'bytes=(\d+)-(\d+)', range_header).groups())
+                    end = min(end, len(content) - 1)
+                    body = content[start:end + 1]
+                    self.send_response(206)
+                    self.send_header('Content-Range', f"bytes {start}-{end}/{len(content)}")
+                else:
+                    body = content
+                    self.send_response(200)
+                self.send_header('ETag', server.etag)
+                if server.send_length:
+                    self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        # 客户端超时断开后写入失败是预期的，不输出异常
+        self.httpd.handle_error = lambda request, client_address: None
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}/data.xlsx"
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+def test_parallel_ranges():
+    """测试服务器支持Range时分段并行下载，内容和哈希正确"""
+    print("=== 测试并行Range下载 ===")
+
+    content = os.urandom(100 * 1024)
+    server = RangeServer(content, delay=0.05)
+    temp_dir = tempfile.mkdtemp()
+    try:
+        downloader = HttpDownloader(parallel=3, part_bytes=16 * 1024, spool_bytes=1024 * 1024)
+        result = downloader.download_sync(server.url, temp_dir=temp_dir)
+        assert result.data == content and result.path is None
+        assert result.sha256 == hashlib.sha256(content).hexdigest()
+        assert result.parts == 7 and len(server.requests) == 7
+        assert 2 <= server.max_active <= 3
+        assert all(headers.get('If-Range') == '"v1"' for headers in server.requests[1:])
+        print(f"✅ 分{result.parts}段下载，最大并发{server.max_active}")
+
+        # 超过内存阈值时写入临时文件
+        downloader.spool_bytes = 10 * 1024
+        result = downloader.download_sync(server.url, temp_dir=temp_dir)
+        assert result.data is None and os.path.dirname(result.path) == temp_dir
+        with open(result.path, 'rb') as f:
+            assert f.read() == content
+        result.discard()
+        assert os.listdir(temp_dir) == []
+        print("✅ 超过内存阈值的文件写入临时文件")
+    finally:
+        server.close()
+        shutil.rmtree(temp_dir)
+
+def test_size_limit_refused_early():
+    """测试文件超过上限时在读取内容之前拒绝"""
+    print("=== 测试大小限制 ===")
+
+    server = RangeServer(b'x' * 50000)
+    temp_dir = tempfile.mkdtemp()
+    try:
+        downloader = HttpDownloader(max_bytes=10000, part_bytes=4096)
+        try:
+            downloader.download_sync(server.url, temp_dir=temp_dir)
+        except DownloadTooLargeError as e:
+            print(f"✅ {e}")
+        else:
+            raise AssertionError("超过上限的文件应当被拒绝")
+        assert len(server.requests) == 1 and os.listdir(temp_dir) == []
+        print("✅ 只发出了第一个请求，没有留下临时文件")
+    finally:
+        server.close()
+        shutil.rmtree(temp_dir)
+
+def test_without_range_support():
+    """测试服务器不支持Range时整体流式下载，大小未知时边读边检查上限"""
+    print("=== 测试不支持Range的服务器 ===")
+
+    content = os.urandom(30000)
+    server = RangeServer(content, support_range=False, send_length=False)
+    try:
+        downloader = HttpDownloader(part_bytes=4096, spool_bytes=10000)
+        result = downloader.download_sync(server.url)
+        assert result.parts == 0 and len(server.requests) == 1
+        with open(result.path, 'rb') as f:
+            assert f.read() == content
+        result.discard()
+        print("✅ 整体下载，超过内存阈值后转存到临时文件")
+
+        downloader.max_bytes = 20000
+        try:
+            downloader.download_sync(server.url)
+        except DownloadTooLargeError as e:
+            print(f"✅ {e}")
+        else:
+            raise AssertionError("超过上限的文件应当被拒绝")
+    finally:
+        server.close()
+
+def test_changed_file_and_timeout():
+    """测试下载过程中文件变化时失败，读取超时时失败"""
+    print("=== 测试文件变化和读取超时 ===")
+
+    server = RangeServer(b'a' * 20000)
+    try:
+        downloader = HttpDownloader(part_bytes=4096, parallel=1)
+        original_fetch = downloader._fetch_range
+
+        def fetch_after_change(*args):
+            server.etag = '"v2"'
+            return original_fetch(*args)
+
+        downloader._fetch_range = fetch_after_change
+        try:
+            downloader.download_sync(server.url)
+        except DownloadError as e:
+            print(f"✅ {e}")
+        else:
+            raise AssertionError("文件变化后应当失败")
+
+        server.etag = '"v1"'
+        server.delay = 1.0
+        downloader = HttpDownloader(part_bytes=4096, read_timeout=0.2)
+        started = time.perf_counter()
+        try:
+            downloader.download_sync(server.url)
+        except DownloadError as e:
+            print(f"✅ 读取超时: {e}")
+        else:
+            raise AssertionError("读取超时应当失败")
+        assert time.perf_counter() - started < 1.0
+    finally:
+        server.close()
+
+def test_download_inside_event_loop():
+    """测试在运行中的事件循环里同步下载"""
+    print("=== 测试在事件循环中下载 ===")
+
+    server = RangeServer(b'hello')
+    try:
+        async def run():
+            return HttpDownloader().download_sync(server.url)
+        assert asyncio.run(run()).data == b'hello'
+        print("✅ 在新线程中运行下载")
+    finally:
+        server.close()
+
+if __name__ == "__main__":
+    test_parallel_ranges()
+    test_size_limit_refused_early()
+    test_without_range_support()
+    test_changed_file_and_timeout()
+    test_download_inside_event_loop()
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试自动id分配（使用模拟连接，不需要真实数据库）
+"""
+
+import os
+import re
+import tempfile
+import threading
+import zipfile
+import pandas as pd
+from conftest import FakeServer, create_db_manager, create_importer
+from excel_processor import ExcelProcessor
+from id_allocator import IdAllocator
+
+def create_server(max_ids):
+    """创建模拟服务器，每张表有一行id为max_ids中的值，序列表还不存在"""
+    server = FakeServer()
+    for table_name, max_id in max_ids.items():
+        server.create_table(table_name, rows=[{'id': max_id}] if max_id else [])
+    return server
+
+def first_words(server):
+    """执行过的语句的第一个词"""
+    return [sql.split()[0] for sql in server.statements]
+
+def test_reserve_id_range():
+    """测试序列首次使用时按MAX(id)初始化，之后连续预留"""
+    print("=== 测试id区间预留 ===")
+
+    server = create_server({'users': 41})
+    db_manager = create_db_manager(server)
+
+    assert db_manager.reserve_id_range('users', 10) == 42
+    assert db_manager.reserve_id_range('users', 5) == 52
+    assert db_manager.reserve_id_range('users', 0) is None
+    # 只在第一次初始化序列
+    assert first_words(server).count('INSERT') == 1
+    print("✅ 序列按MAX(id)初始化一次，之后连续预留")
+
+    # Excel自带id时推进序列
+    assert db_manager.advance_id_sequence('users', 1000)
+    assert db_manager.reserve_id_range('users', 1) == 1000
+    print("✅ 自带id后序列被推进")
+
+def test_reserve_on_fresh_database():
+    """测试序列表不存在时先创建再预留，而不是预留失败"""
+    print("=== 测试新数据库上的id预留 ===")
+
+    server = create_server({'users': 0})
+    db_manager = create_db_manager(server)
+
+    assert db_manager.reserve_id_range('users', 3) == 1
+    assert first_words(server)[:4] == ['UPDATE', 'CREATE', 'INSERT', 'UPDATE']
+    assert IdAllocator(create_db_manager(server), 'users').reserve(2) == 4
+    print("✅ 序列表不存在时自动创建")
+
+def test_concurrent_reservations():
+    """测试并发预留的区间互不重叠"""
+    print("=== 测试并发预留 ===")
+
+    server = create_server({'orders': 0})
+    ranges = []
+    ranges_lock = threading.Lock()
+
+    def worker(size):
+        db_manager = create_db_manager(server)
+        for _ in range(50):
+            start_id = db_manager.reserve_id_range('orders', size)
+            with ranges_lock:
+                ranges.append((start_id, start_id + size))
+
+    threads = [threading.Thread(target=worker, args=(size,)) for size in range(1, 9)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    ranges.sort()
+    assert all(prev[1] <= cur[0] for prev, cur in zip(ranges, ranges[1:]))
+    assert ranges[0][0] == 1
+    print(f"✅ {len(ranges)}次并发预留的区间互不重叠")
+
+def test_id_allocator_blocks():
+    """测试分配器按预计行数整块预留，块不够时再预留"""
+    print("=== 测试id分配器 ===")
+
+    server = create_server({'users': 100})
+    allocator = IdAllocator(create_db_manager(server), 'users', expected_rows=25)
+
+    assert allocator.reserve(10) == 101
+    assert allocator.reserve(10) == 111
+    # 当前块只剩5个，重新预留
+    assert allocator.reserve(10) == 126
+    assert first_words(server).count('UPDATE') == 3  # 首次UPDATE时序列表不存在、创建并初始化后重试、第二块
+    print("✅ 一次导入的id尽量连续，块不够时追加预留")
+
+def test_release_unused_ids():
+    """测试归还块中没有用到的id，之后已有其他预留时不归还"""
+    print("=== 测试归还id ===")
+
+    server = create_server({'users': 0})
+    allocator = IdAllocator(create_db_manager(server), 'users', expected_rows=100)
+    assert allocator.reserve(10) == 1
+    allocator.release()
+    assert IdAllocator(create_db_manager(server), 'users').reserve(1) == 11
+    print("✅ 没有用到的90个id已归还")
+
+    allocator = IdAllocator(create_db_manager(server), 'users', expected_rows=100)
+    assert allocator.reserve(10) == 12
+    assert create_db_manager(server).reserve_id_range('users', 1) == 112
+    allocator.release()
+    assert create_db_manager(server).reserve_id_range('users', 1) == 113
+    print("✅ 其他导入已在之后预留时不归还")
+
+def write_inflated_workbook(rows):
+    """写入rows行数据，工作表维度信息被导出工具写成A1:Z1048576"""
+    temp_file = tempfile.NamedTemporaryFile(suffix='.xlsx', delete=False)
+    temp_file.close()
+    pd.DataFrame({'name': [f'用户{i}' for i in range(rows)]}).to_excel(temp_file.name, index=False)
+    with zipfile.ZipFile(temp_file.name) as archive:
+        files = {name: archive.read(name) for name in archive.namelist()}
+    sheet = 'xl/worksheets/sheet1.xml'
+    files[sheet] = re.sub(rb'<dimension ref="[^"]+"', b'<dimension ref="A1:Z1048576"', files[sheet])
+    with zipfile.ZipFile(temp_file.name, 'w') as archive:
+        for name, content in files.items():
+            archive.writestr(name, content)
+    return temp_file.name
+
+def test_import_with_inflated_dimension():
+    """测试维度信息远大于实际行数时，导入结束后序列只前进实际插入的行数"""
+    print("=== 测试维度信息偏大的文件 ===")
+
+    file_path = write_inflated_workbook(30)
+    try:
+        processor = ExcelProcessor()
+        assert processor.estimate_row_count(file_path) == 1048575
+        server = FakeServer().create_table('users', rows=[{'id': 10}])
+        result = create_importer(server).import_excel_to_mysql(
+            'users', file_path, table_structure={'id': 'int(11)', 'name': 'varchar(50)'}, chunk_size=10)
+        assert result and result.rows_inserted == 30
+        assert [row['id'] for row in server.rows('users')] == list(range(10, 41))
+        assert server.rows('_import_id_sequence')[0]['next_id'] == 41
+        print("✅ 序列从11前进到41，没有预留的id被作废")
+    finally:
+        os.unlink(file_path)
+
+def test_process_chunks_with_allocator():
+    """测试分块处理时每块从分配器获取id，自带id的块不分配"""
+    print("=== 测试分块处理使用分配器 ===")
+
+    df = pd.DataFrame({'name': [f'用户{i}' for i in range(25)]})
+    temp_file = tempfile.NamedTemporaryFile(suffix='.xlsx', delete=False)
+    temp_file.close()
+    df.to_excel(temp_file.name, index=False)
+    try:
+        processor = ExcelProcessor()
+        requests = []
+
+        def allocate(count):
+            requests.append(count)
+            return 1000 * len(requests)
+
+        ids = []
+        for columns, data_tuples in processor.process_excel_file_chunks(
+                temp_file.name, {'id': 'int', 'name': 'varchar(50)'},
+                chunk_size=10, id_allocator=allocate):
+            ids.extend(row[0] for row in data_tuples)
+
+        assert requests == [10, 10, 5]
+        assert ids == list(range(1000, 1010)) + list(range(2000, 2010)) + list(range(3000, 3005))
+        print("✅ 每块从分配器获取起始id")
+
+        with_ids = pd.DataFrame({'id': [7, 8], 'name': ['a', 'b']})
+        assert not processor.needs_auto_id(with_ids)
+        assert processor.needs_auto_id(df)
+        print("✅ 自带id的数据不需要分配")
+    finally:
+        os.unlink(temp_file.name)
+
+if __name__ == "__main__":
+    test_reserve_id_range()
+    test_reserve_on_fresh_database()
+    test_concurrent_reservations()
+    test_id_allocator_blocks()
+    test_release_unused_ids()
+    test_import_with_inflated_dimension()
+    test_process_chunks_with_allocator()
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试导入记录：重复导入同一个文件时直接返回之前的结果（使用模拟连接，不需要真实数据库）
+"""
+
+import os
+import threading
+import time
+from conftest import FakeServer, create_pool, write_csv
+from excel_to_mysql import CONNECTIONS_PER_IMPORT, ExcelToMySQL
+from import_ledger import ImportLedger, file_sha256, ledger_key
+
+def create_server():
+    """创建有users和customers表的模拟服务器；记录表由导入记录自己创建"""
+    ImportLedger._ensured_tables.clear()
+    return FakeServer().create_table('users').create_table('customers')
+
+def ledger_rows(server):
+    """导入记录表中的行"""
+    return server.rows('_import_ledger')
+
+def write_users():
+    return write_csv('email,name,age', [f'u{i}@example.com,user{i},{i % 90}' for i in range(100)])
+
+STRUCTURE = {'email': 'varchar(100)', 'name': 'varchar(50)', 'age': 'int(11)'}
+
+def run_import(pool, file_path, table_name='users', **kwargs):
+    """使用导入记录导入"""
+    kwargs.setdefault('idempotent', True)
+    kwargs.setdefault('table_structure', STRUCTURE)
+    return ExcelToMySQL(pool=pool).import_excel_to_mysql(table_name, file_path, **kwargs)
+
+def test_duplicate_import_returns_previous_result():
+    """测试相同的文件再次导入时直接返回之前的结果，目标表不同或指定不使用记录时重新导入"""
+    print("=== 测试重复导入 ===")
+
+    file_path = write_users()
+    try:
+        server = create_server()
+        pool = create_pool(server, max_size=4)
+        first = run_import(pool, file_path)
+        assert first and not first.duplicate and len(server.rows('users')) == 100
+        assert first.source_sha256 == file_sha256(file_path)
+        print(f"✅ 首次导入: {first.message}")
+
+        second = run_import(pool, file_path)
+        assert second and second.duplicate and len(server.rows('users')) == 100
+        assert second.rows_inserted == 100 and second.columns == first.columns
+        assert 'ledger' in second.timings and 'read_excel' not in second.timings
+        print(f"✅ 再次导入: {second.message}")
+
+        result = run_import(pool, file_path, table_name='customers')
+        assert result and not result.duplicate and len(server.rows('customers')) == 100
+        print("✅ 目标表不同时重新导入")
+
+        result = run_import(pool, file_path, idempotent=False)
+        assert result and not result.duplicate and len(server.rows('users')) == 200
+        print("✅ 不使用导入记录时重新导入")
+    finally:
+        os.unlink(file_path)
+
+def test_failed_and_stale_imports_are_retried():
+    """测试失败的导入和失去心跳的导入允许重新导入"""
+    print("=== 测试重试失败和中断的导入 ===")
+
+    file_path = write_users()
+    try:
+        server = create_server()
+        pool = create_pool(server, max_size=4)
+        server.fail_insert = True
+        result = run_import(pool, file_path)
+        assert not result and ledger_rows(server)[0]['status'] == 'failed'
+        server.fail_insert = False
+        result = run_import(pool, file_path)
+        assert result and not result.duplicate and len(server.rows('users')) == 100
+        print("✅ 失败的导入可以重试")
+
+        server = create_server()
+        pool = create_pool(server, max_size=4)
+        key = ledger_key(file_sha256(file_path), 'users', None, {'mode': 'append', 'update_columns': None})
+        server.create_table('_import_ledger', unique_keys={'PRIMARY': ['ledger_key']}, rows=[
+            {'ledger_key': key, 'status': 'running', 'owner': 'crashed', 'result': None, 'heartbeat_at': time.time() - 3600}
+        ])
+        result = run_import(pool, file_path)
+        assert result and not result.duplicate and len(server.rows('users')) == 100
+        assert ledger_rows(server)[0]['status'] == 'completed'
+        print("✅ 失去心跳的导入被接手")
+    finally:
+        os.unlink(file_path)
+
+def test_concurrent_duplicate_waits():
+    """测试相同的文件同时导入两次时，后到的调用等待先到的完成并返回其结果"""
+    print("=== 测试并发重复导入 ===")
+
+    file_path = write_users()
+    try:
+        server = create_server()
+        server.insert_delay = 1
+        pool = create_pool(server, max_size=4)
+        results = {}
+        first = threading.Thread(target=lambda: results.update(first=run_import(pool, file_path)))
+        first.start()
+        assert server.inserting.wait(10)
+        second = run_import(pool, file_path)
+        first.join()
+        assert results['first'] and not results['first'].duplicate
+        assert second and second.duplicate and second.rows_inserted == 100
+        assert len(server.rows('users')) == 100
+        print(f"✅ 只导入了一次: {second.message}")
+    finally:
+        os.unlink(file_path)
+
+def test_concurrent_imports_fit_default_pool():
+    """测试默认大小的连接池中两个导入同时进行，相同文件的第三个调用等待时不会占满连接池"""
+    print("=== 测试并发导入的连接数 ===")
+
+    users_path = write_users()
+    customers_path = write_csv('email,name,age', [f'c{i}@example.com,customer{i},{i % 90}' for i in range(100)])
+    try:
+        server = create_server()
+        server.insert_delay = 2
+        both_inserting = threading.Event()
+        tables = set()
+
+        def on_insert(table_name, rows):
+            tables.add(table_name)
+            if {'users', 'customers'} <= tables:
+                both_inserting.set()
+        server.on_insert = on_insert
+        # 写入比等待连接的时间长，连接不够时后到的调用等待连接超时
+        pool = create_pool(server, timeout=1)
+        structure = {'id': 'int(11)', **STRUCTURE}
+        results = {}
+        threads = [
+            threading.Thread(target=lambda: results.update(users=run_import(pool, users_path, table_structure=structure))),
+            threading.Thread(target=lambda: results.update(customers=run_import(
+                pool, customers_path, table_name='customers', table_structure=structure))),
+        ]
+        for thread in threads:
+            thread.start()
+        assert both_inserting.wait(10)
+        assert pool.stats()['in_use'] <= 2 * CONNECTIONS_PER_IMPORT
+        duplicate = run_import(pool, users_path, table_structure=structure)
+        for thread in threads:
+            thread.join()
+        assert results['users'] and results['customers'] and duplicate and duplicate.duplicate
+        assert server.max_active == 2
+        assert pool.stats()['max_size'] == 5 and len(server.connections) <= 5
+        assert [row['id'] for row in server.rows('users')] == list(range(1, 101))
+        print(f"✅ 两个导入和等待的调用共使用{len(server.connections)}个连接")
+    finally:
+        os.unlink(users_path)
+        os.unlink(customers_path)
+
+if __name__ == "__main__":
+    test_duplicate_import_returns_previous_result()
+    test_failed_and_stale_imports_are_retried()
+    test_concurrent_duplicate_waits()
+    test_concurrent_imports_fit_default_pool()
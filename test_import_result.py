@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试导入结果对象
+"""
+
+import asyncio
+import json
+from dataclasses import fields
+from excel_to_mysql import ExcelToMySQL, ImportResult
+from dify_mcp_server import DifyMCPServer
+from mcp_server import ImportExcelRequest, MCPExcelToMySQLServer
+
+def test_record_rows():
+    """测试记录行数、列名和id范围"""
+    print("=== 测试导入结果记录 ===")
+
+    result = ImportResult(table_name='users')
+    result.record_rows(['id', 'name'], [(5, '张三'), (6, '李四')])
+    result.record_rows(['id', 'name'], [(7, '王五')])
+    result.add_timing('insert', 0.5)
+    result.add_timing('insert', 0.25)
+
+    assert result.rows_inserted == 3
+    assert result.columns == ['id', 'name']
+    assert (result.id_start, result.id_end) == (5, 7)
+    assert result.timings['insert'] == 0.75
+
+    # 结果必须可以直接序列化为JSON返回给客户端
+    data = json.loads(json.dumps(result.to_dict(), ensure_ascii=False))
+    print(f"结果: {data}")
+    assert data['rows_inserted'] == 3
+    print("✅ 导入结果记录正确")
+
+def test_failed_import_result():
+    """测试导入失败时返回带消息的结果对象"""
+    print("=== 测试导入失败结果 ===")
+
+    importer = ExcelToMySQL()
+    result = importer.import_excel_to_mysql(
+        table_name='users',
+        excel_file_path='not_exists.xlsx'
+    )
+
+    print(f"结果: {result.to_dict()}")
+    assert not result
+    assert result.rows_inserted == 0
+    assert result.message
+    print("✅ 导入失败时返回结果对象")
+
+def test_server_responses_include_all_fields():
+    """测试MCP和Dify服务器的导入响应包含导入结果的全部字段"""
+    print("=== 测试服务器响应字段 ===")
+
+    def fake_import(self, table_name, excel_file_path, sheet_name=None, **kwargs):
+        return ImportResult(success=True, table_name=table_name, rows_inserted=2, mode='upsert',
+                            download_status='hit', upsert_keys=['uk_email'], rows_skipped=5)
+
+    original = ExcelToMySQL.import_excel_to_mysql
+    ExcelToMySQL.import_excel_to_mysql = fake_import
+    try:
+        response = asyncio.run(MCPExcelToMySQLServer().import_excel_to_mysql(
+            ImportExcelRequest(table_name='users', excel_url='https://example.com/users.xlsx')))
+        dify_server = DifyMCPServer(import_workers=1)
+        try:
+            dify_response = asyncio.run(dify_server.handle_request({
+                "method": "tools/call",
+                "params": {"name": "import_excel_to_mysql",
+                           "arguments": {"table_name": "users", "excel_url": "https://example.com/users.xlsx"}}
+            }))["result"]
+        finally:
+            dify_server.close()
+    finally:
+        ExcelToMySQL.import_excel_to_mysql = original
+
+    assert response.success and response.imported_count == 2
+    assert (response.download_status, response.upsert_keys, response.rows_skipped) == ('hit', ['uk_email'], 5)
+    assert dify_response["imported_count"] == 2
+    assert (dify_response["download_status"], dify_response["upsert_keys"], dify_response["rows_skipped"]) == \
+        ('hit', ['uk_email'], 5)
+    missing = [item.name for item in fields(ImportResult)
+               if item.name != 'rows_inserted' and item.name not in type(response).model_fields]
+    assert not missing, missing
+    print("✅ 两个服务器都返回download_status、upsert_keys和rows_skipped")
+
+if __name__ == "__main__":
+    test_record_rows()
+    test_failed_import_result()
+    test_server_responses_include_all_fields()
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试LOAD DATA LOCAL INFILE导入（使用模拟连接，不需要真实数据库）
+"""
+
+import datetime
+import decimal
+import os
+import tempfile
+import pandas as pd
+from bulk_insert import LoadDataInserter, format_tsv_value
+from conftest import FakeServer, create_db_manager
+from excel_processor import ExcelProcessor
+
+def test_format_tsv_value():
+    """测试NULL、日期、小数和特殊字符的转换"""
+    print("=== 测试TSV字段转换 ===")
+    cases = [
+        (None, '\\N'),
+        ('a\tb\nc\\d', 'a\\tb\\nc\\\\d'),
+        (True, '1'),
+        (42, '42'),
+        (1.5, '1.5'),
+        (float('nan'), '\\N'),
+        (float('inf'), '\\N'),
+        (float('-inf'), '\\N'),
+        (b'a\tb', 'a\\tb'),
+        (decimal.Decimal('1E-7'), '0.0000001'),
+        (datetime.datetime(2024, 1, 2, 3, 4, 5), '2024-01-02 03:04:05'),
+        (datetime.datetime(2024, 1, 2, 3, 4, 5, 120), '2024-01-02 03:04:05.000120'),
+        (pd.Timestamp('2024-01-02 03:04:05'), '2024-01-02 03:04:05'),
+        (datetime.date(2024, 1, 2), '2024-01-02'),
+        ('张三', '张三')
+    ]
+    for value, expected in cases:
+        actual = format_tsv_value(value)
+        print(f"{value!r} -> {actual!r}")
+        assert actual == expected
+    print("✅ TSV字段转换正确")
+
+def test_load_data_segments():
+    """测试按段大小分段加载，并在结束时提交、删除临时文件"""
+    print("=== 测试分段加载 ===")
+    server = FakeServer().create_table('users', {'id': 'int(11)', 'name': 'varchar(50)'})
+    db_manager = create_db_manager(server)
+
+    loader = LoadDataInserter(db_manager, 'users', ['id', 'name'], segment_bytes=50)
+    for start in range(0, 30, 10):
+        assert loader.insert([(i, f'用户{i}' if i % 3 else None) for i in range(start, start + 10)])
+    assert loader.finish()
+
+    lines = [line for segment in server.loaded for line in segment]
+    print(f"分段数: {len(server.loaded)}, 总行数: {len(lines)}")
+    assert len(server.loaded) == 3
+    assert lines[0] == '0\t\\N' and lines[1] == '1\t用户1'
+    assert loader.rows_committed == 30 and len(server.rows('users')) == 30
+    assert db_manager.connection.events == ['begin', 'commit']
+    assert not any(os.path.exists(path) for path in server.files)
+    print("✅ 分段加载正确")
+
+def test_load_binary_columns():
+    """测试二进制列按十六进制写入并用UNHEX还原，任意字节原样保存；文本列中不是UTF-8的bytes报错"""
+    print("=== 测试二进制列 ===")
+    server = FakeServer().create_table('files', {'id': 'int(11)', 'name': 'varchar(50)', 'data': 'blob'})
+    db_manager = create_db_manager(server)
+
+    payload = bytes(range(256))
+    loader = LoadDataInserter(db_manager, 'files', ['id', 'name', 'data'])
+    assert loader.sql.endswith("(`id`, `name`, @v2) SET `data` = UNHEX(@v2)")
+    assert loader.insert([(1, 'a.bin', payload), (2, 'b.txt', '文本'), (3, 'empty', None)])
+    assert loader.finish()
+    rows = server.rows('files')
+    assert rows[0]['data'] == payload and rows[0]['name'] == 'a.bin'
+    assert rows[1]['data'] == '文本'.encode('utf-8') and rows[2]['data'] is None
+    print("✅ 二进制列的256个字节全部保留")
+
+    loader = LoadDataInserter(db_manager, 'files', ['id', 'name'])
+    assert not loader.insert([(4, b'\xff\xfe')])
+    assert len(server.rows('files')) == 3
+    print("✅ 文本列中的非UTF-8字节报错，没有写入替换字符")
+
+def test_estimate_row_count():
+    """测试根据工作表维度估算行数"""
+    print("=== 测试估算行数 ===")
+    temp_file = tempfile.NamedTemporaryFile(suffix='.xlsx', delete=False)
+    temp_file.close()
+    try:
+        pd.DataFrame({'name': [f'用户{i}' for i in range(42)]}).to_excel(temp_file.name, index=False)
+        assert ExcelProcessor().estimate_row_count(temp_file.name) == 42
+        assert ExcelProcessor().estimate_row_count('https://example.com/data.xlsx') is None
+        print("✅ 行数估算正确")
+    finally:
+        os.unlink(temp_file.name)
+
+if __name__ == "__main__":
+    test_format_tsv_value()
+    test_load_data_segments()
+    test_load_binary_columns()
+    test_estimate_row_count()
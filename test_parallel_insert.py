@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试多连接并行插入（使用模拟连接，不需要真实数据库）
+"""
+
+import os
+import threading
+import time
+from bulk_insert import ParallelInserter
+from conftest import FakeServer, create_db_manager, create_pool, write_csv
+from database import DatabaseManager
+from excel_to_mysql import ExcelToMySQL
+
+def create_managers(server, count):
+    """创建count个各自连接到模拟服务器的DatabaseManager"""
+    return [create_db_manager(server) for _ in range(count)]
+
+def create_server(**kwargs):
+    """创建有users表的模拟服务器"""
+    return FakeServer(**kwargs).create_table('users')
+
+def make_batches(count, size=1000):
+    return [[(i * size + j, f'name{j}') for j in range(size)] for i in range(count)]
+
+def test_parallel_speedup_and_commit_together():
+    """测试多个分区同时写入，全部写完后才提交"""
+    print("=== 测试并行写入 ===")
+
+    batches = make_batches(12)
+    timings = {}
+    for workers in (1, 4):
+        server = create_server(row_delay=0.00005)
+        inserter = ParallelInserter(create_managers(server, workers), 'users', ['id', 'name'])
+        started = time.perf_counter()
+        for batch in batches:
+            assert inserter.insert(batch)
+        assert inserter.finish()
+        timings[workers] = time.perf_counter() - started
+
+        rows = sorted(row for connection in server.connections for row in connection.rows)
+        assert rows == sorted(row for batch in batches for row in batch)
+        assert inserter.rows_committed == 12000
+        assert server.max_active == workers
+        # 每个分区提交时所有批次都已写完
+        for connection in server.connections:
+            assert connection.events[-1] == 'commit' and connection.committed_after == server.batches
+        assert [item['status'] for item in inserter.manifest()] == ['committed'] * workers
+    assert timings[4] < timings[1] / 2.5, timings
+    print(f"✅ 1个连接{timings[1]:.2f}s，4个连接{timings[4]:.2f}s，各分区在全部写完后提交")
+
+def test_partition_failure_rolls_back_all():
+    """测试某个分区写入失败时所有分区回滚"""
+    print("=== 测试分区失败 ===")
+
+    server = create_server(row_delay=0.00001, fail_on_batch=5)
+    inserter = ParallelInserter(create_managers(server, 3), 'users', ['id', 'name'])
+    ok = all(inserter.insert(batch) for batch in make_batches(20)) and inserter.finish()
+    assert not ok and inserter.rows_committed == 0
+    assert all(connection.events[-1] == 'rollback' for connection in server.connections)
+    assert server.rows('users') == []
+    statuses = sorted(item['status'] for item in inserter.manifest())
+    assert statuses == ['failed', 'rolled_back', 'rolled_back']
+    assert not any(thread.name.startswith('insert-users') for thread in threading.enumerate())
+    print(f"✅ 所有分区已回滚: {inserter.manifest()}")
+
+def test_commit_failure_reported_in_manifest():
+    """测试提交阶段失败时，manifest中记录已提交和已回滚的分区"""
+    print("=== 测试提交失败 ===")
+
+    server = create_server(row_delay=0.00002, fail_commit_on=1)
+    inserter = ParallelInserter(create_managers(server, 3), 'users', ['id', 'name'])
+    for batch in make_batches(6):
+        assert inserter.insert(batch)
+    assert not inserter.finish()
+    manifest = inserter.manifest()
+    statuses = [item['status'] for item in manifest]
+    assert statuses[0] == 'committed' and 'failed' in statuses and statuses[-1] != 'committed'
+    committed = sum(item['rows_committed'] for item in manifest if item['status'] == 'committed')
+    assert inserter.rows_committed == committed > 0
+    print(f"✅ {manifest}")
+
+def test_connect_partitions_does_not_wait():
+    """测试借出额外连接时连接池已满不等待"""
+    print("=== 测试借出额外连接 ===")
+
+    server = create_server()
+    pool = create_pool(server, max_size=3)
+    db_manager = DatabaseManager(pool=pool)
+    assert db_manager.connect()
+    started = time.perf_counter()
+    partitions = db_manager.connect_partitions(4)
+    assert len(partitions) == 2 and time.perf_counter() - started < 1
+    for partition in partitions:
+        partition.disconnect()
+    db_manager.disconnect()
+    assert pool.stats()['in_use'] == 0
+    print("✅ 连接池最多3个连接时只借到2个额外连接")
+
+def test_import_with_parallel_insert():
+    """测试导入时使用多个连接写入，结果中记录各分区"""
+    print("=== 测试并行导入 ===")
+
+    file_path = write_csv('name,age', [f'user{i},{i % 90}' for i in range(10000)])
+    structure = {'name': 'varchar(50)', 'age': 'int(11)'}
+    server = create_server(row_delay=0.00001)
+    pool = create_pool(server, max_size=4)
+    try:
+        result = ExcelToMySQL(pool=pool).import_excel_to_mysql(
+            'users', file_path, table_structure=structure, chunk_size=500, insert_workers=3)
+        assert result and result.rows_inserted == 10000
+        assert len(result.partitions) == 3
+        assert sum(item['rows_committed'] for item in result.partitions) == 10000
+        assert sum(len(connection.rows) for connection in server.connections) == 10000
+        assert pool.stats()['in_use'] == 0
+        print(f"✅ {result.message}，分区: {result.partitions}")
+
+        result = ExcelToMySQL(pool=pool).import_excel_to_mysql(
+            'users', file_path, table_structure=structure, chunk_size=500, insert_workers=1)
+        assert result and result.partitions == []
+        print("✅ insert_workers为1时单连接写入")
+    finally:
+        pool.close()
+        os.unlink(file_path)
+
+if __name__ == "__main__":
+    test_parallel_speedup_and_commit_together()
+    test_partition_failure_rolls_back_all()
+    test_commit_failure_reported_in_manifest()
+    test_connect_partitions_does_not_wait()
+    test_import_with_parallel_insert()
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试解析和插入的流水线（使用模拟连接，不需要真实数据库）
+"""
+
+import os
+import threading
+import time
+from conftest import FakeServer, create_importer, write_csv
+from pipeline import PipelineCancelled, StagePipeline
+
+def slow_items(count: int, delay: float, state: dict):
+    """每隔delay秒产出一个数字，记录产出数量和是否被关闭"""
+    state['closed'] = False
+    try:
+        for i in range(count):
+            time.sleep(delay)
+            state['produced'] = i + 1
+            yield i
+    finally:
+        state['closed'] = True
+
+def test_stages_overlap():
+    """测试两个阶段重叠进行，总耗时接近较慢的阶段"""
+    print("=== 测试阶段重叠 ===")
+
+    state = {}
+    started = time.perf_counter()
+    items = []
+    with StagePipeline(lambda: slow_items(10, 0.03, state)) as pipeline:
+        for item in pipeline:
+            time.sleep(0.03)
+            items.append(item)
+    elapsed = time.perf_counter() - started
+    assert items == list(range(10))
+    # 顺序执行需要0.6秒，重叠后约0.33秒
+    assert elapsed < 0.5, elapsed
+    print(f"✅ 10批数据耗时{elapsed:.2f}s（顺序执行约0.60s）")
+
+def test_backpressure():
+    """测试消费方较慢时生产者阻塞，队列中的批次不超过上限"""
+    print("=== 测试背压 ===")
+
+    state = {}
+    pipeline = StagePipeline(lambda: slow_items(20, 0, state), queue_size=2)
+    with pipeline:
+        for item in pipeline:
+            time.sleep(0.01)
+            # 生产者最多领先：队列中的2批加上正在放入的1批
+            assert state['produced'] - item <= 4, (state['produced'], item)
+    stats = pipeline.stats()
+    assert stats['max_queued'] <= 2 and stats['producer_wait_seconds'] > 0.1
+    assert stats['produced'] == stats['consumed'] == 20
+    print(f"✅ 队列最多{stats['max_queued']}批，生产者等待{stats['producer_wait_seconds']:.2f}s")
+
+def test_producer_error_and_early_stop():
+    """测试生产者的异常交给消费方，消费方提前停止时生产者被关闭"""
+    print("=== 测试异常和提前停止 ===")
+
+    def failing():
+        yield 1
+        yield 2
+        raise ValueError("第3批解析失败")
+
+    items = []
+    try:
+        with StagePipeline(failing) as pipeline:
+            for item in pipeline:
+                items.append(item)
+    except ValueError as e:
+        assert items == [1, 2]
+        print(f"✅ 之前的批次已消费，之后抛出: {e}")
+    else:
+        raise AssertionError("生产者的异常应当交给消费方")
+
+    state = {}
+    with StagePipeline(lambda: slow_items(1000, 0, state), queue_size=2) as pipeline:
+        for item in pipeline:
+            if item == 3:
+                break
+    assert state['closed'] and state['produced'] < 10
+    assert not any(thread.name == 'pipeline' for thread in threading.enumerate())
+    print(f"✅ 消费方停止后生产者只产出了{state['produced']}批并被关闭")
+
+def test_cancel():
+    """测试外部取消时消费方抛出PipelineCancelled"""
+    print("=== 测试取消 ===")
+
+    state = {}
+    cancel_event = threading.Event()
+    threading.Timer(0.1, cancel_event.set).start()
+    try:
+        with StagePipeline(lambda: slow_items(1000, 0.01, state), cancel_event=cancel_event) as pipeline:
+            for _ in pipeline:
+                pass
+    except PipelineCancelled:
+        assert state['closed']
+        print(f"✅ 取消后停止，共产出{state['produced']}批")
+    else:
+        raise AssertionError("取消后应当抛出PipelineCancelled")
+
+def import_connection(server):
+    """执行导入事务的连接"""
+    return next(connection for connection in server.connections if connection.events)
+
+def test_import_pipeline():
+    """测试导入时解析和插入并行，插入失败时停止解析并回滚，取消时回滚"""
+    print("=== 测试导入流水线 ===")
+
+    file_path = write_csv('name,age', [f'user{i},{i % 90}' for i in range(10000)])
+    structure = {'name': 'varchar(50)', 'age': 'int(11)'}
+    try:
+        server = FakeServer(insert_delay=0.01).create_table('users')
+        result = create_importer(server).import_excel_to_mysql(
+            'users', file_path, table_structure=structure, chunk_size=500)
+        assert result and result.rows_inserted == 10000
+        assert len(server.rows('users')) == 10000 and import_connection(server).events == ['begin', 'commit']
+        assert 'parse_wait' in result.timings and 'insert_wait' in result.timings
+        print(f"✅ 导入{result.rows_inserted}条记录，耗时: {result.to_dict()['timings']}")
+
+        server = FakeServer(insert_delay=0.01, fail_on_batch=1).create_table('users')
+        result = create_importer(server).import_excel_to_mysql(
+            'users', file_path, table_structure=structure, chunk_size=500)
+        assert not result and '插入数据失败' in result.message
+        assert import_connection(server).events[-1] == 'rollback' and server.rows('users') == []
+        print(f"✅ {result.message}")
+
+        server = FakeServer(insert_delay=0.2).create_table('users')
+        importer = create_importer(server)
+        threading.Timer(0.3, importer.cancel).start()
+        result = importer.import_excel_to_mysql(
+            'users', file_path, table_structure=structure, chunk_size=500)
+        assert not result and '导入已取消' in result.message
+        assert import_connection(server).events[-1] == 'rollback' and server.rows('users') == []
+        print(f"✅ {result.message}")
+    finally:
+        os.unlink(file_path)
+
+if __name__ == "__main__":
+    test_stages_overlap()
+    test_backpressure()
+    test_producer_error_and_early_stop()
+    test_cancel()
+    test_import_pipeline()
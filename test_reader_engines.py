@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试可插拔的Excel读取引擎
+"""
+
+import datetime
+import os
+import tempfile
+import pandas as pd
+import reader_engines
+from config import Config
+from excel_processor import ExcelProcessor
+from excel_to_mysql import ExcelToMySQL
+from reader_engines import available_engines, select_engine
+
+TABLE_STRUCTURE = {
+    'id': 'int(11)',
+    'name': 'varchar(50)',
+    'age': 'int(11)',
+    'score': 'double',
+    'joined': 'datetime'
+}
+
+def create_excel(row_count: int = 30):
+    """创建包含空值、小数、日期和多余列的测试Excel文件"""
+    df = pd.DataFrame({
+        'extra': [f'x{i}' for i in range(row_count)],
+        'name': [f'用户{i}' if i % 7 else None for i in range(row_count)],
+        'age': [20 + i if i % 5 else None for i in range(row_count)],
+        'score': [i * 1.5 for i in range(row_count)],
+        'joined': [datetime.datetime(2024, 1, i % 28 + 1, 8, 30) for i in range(row_count)],
+    })
+    temp_file = tempfile.NamedTemporaryFile(suffix='.xlsx', delete=False)
+    temp_file.close()
+    df.to_excel(temp_file.name, index=False)
+    return temp_file.name
+
+def read_rows(excel_file: str, engine: str):
+    """用指定引擎分块处理，返回列名和全部行"""
+    processor = ExcelProcessor()
+    columns, rows = None, []
+    for columns, batch in processor.process_excel_file_chunks(
+            excel_file, TABLE_STRUCTURE, start_id=1, chunk_size=10, engine=engine):
+        rows.extend(batch)
+    return columns, rows
+
+def select_engine_supports(excel_file: str, engine: str) -> bool:
+    """引擎是否支持该文件"""
+    try:
+        select_engine(excel_file, engine)
+        return True
+    except ValueError:
+        return False
+
+def test_engines_match_openpyxl():
+    """测试已安装的各引擎读取结果与openpyxl一致"""
+    print("=== 测试各引擎读取结果一致 ===")
+
+    excel_file = create_excel()
+    try:
+        expected_columns, expected_rows = read_rows(excel_file, 'openpyxl')
+        assert expected_columns == ['id', 'name', 'age', 'score', 'joined']
+        assert len(expected_rows) == 30
+
+        for engine in available_engines():
+            if engine == 'openpyxl' or not select_engine_supports(excel_file, engine):
+                continue
+            columns, rows = read_rows(excel_file, engine)
+            assert columns == expected_columns, engine
+            assert rows == expected_rows, engine
+            print(f"✅ {engine}与openpyxl读取结果一致")
+        if 'calamine' not in available_engines():
+            print("⚠️  未安装python-calamine，跳过calamine对比")
+    finally:
+        os.unlink(excel_file)
+
+def test_explicit_engine_errors():
+    """测试指定未知、未安装或不支持该文件类型的引擎时报错"""
+    print("=== 测试指定引擎的检查 ===")
+
+    for engine, file_path in (('fast', 'data.xlsx'), ('pyxlsb', 'data.xlsx'), ('xlrd', 'data.xlsx')):
+        try:
+            select_engine(file_path, engine)
+        except ValueError as e:
+            print(f"✅ {engine}: {e}")
+        else:
+            raise AssertionError(f"{engine}读取data.xlsx应当报错")
+
+    # 导入时指定不可用的引擎，连接数据库之前就失败
+    excel_file = create_excel(3)
+    try:
+        result = ExcelToMySQL().import_excel_to_mysql('users', excel_file, engine='pyxlsb')
+        assert not result
+        assert 'pyxlsb' in result.message
+        assert 'connect' not in result.timings
+        print(f"✅ 导入失败: {result.message}")
+    finally:
+        os.unlink(excel_file)
+
+def test_auto_selection():
+    """测试自动选择：xlsx优先calamine，超过大小上限时使用openpyxl流式读取"""
+    print("=== 测试自动选择引擎 ===")
+
+    excel_file = create_excel(3)
+    saved_limit = Config.EXCEL_CALAMINE_MAX_MB
+    try:
+        expected = 'calamine' if 'calamine' in available_engines() else 'openpyxl'
+        assert select_engine(excel_file).name == expected
+        print(f"✅ xlsx自动选择: {expected}")
+
+        Config.EXCEL_CALAMINE_MAX_MB = 0
+        assert select_engine(excel_file).name == 'openpyxl'
+        print("✅ 超过EXCEL_CALAMINE_MAX_MB时使用openpyxl")
+
+        # 没有可用引擎的文件类型由pandas读取
+        assert select_engine('data.csv') is None
+        print("✅ 不支持的文件类型返回None")
+    finally:
+        Config.EXCEL_CALAMINE_MAX_MB = saved_limit
+        os.unlink(excel_file)
+
+def test_auto_skips_missing_engine():
+    """测试自动选择跳过未安装的引擎"""
+    print("=== 测试跳过未安装的引擎 ===")
+
+    calamine = reader_engines._READERS['calamine']
+    saved_module = calamine.module
+    calamine.module = 'python_calamine_not_installed'
+    try:
+        assert select_engine('data.xlsx').name == 'openpyxl'
+        assert 'calamine' not in available_engines()
+        print("✅ calamine未安装时使用openpyxl")
+    finally:
+        calamine.module = saved_module
+
+if __name__ == "__main__":
+    test_engines_match_openpyxl()
+    test_explicit_engine_errors()
+    test_auto_selection()
+    test_auto_skips_missing_engine()
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试替换模式的临时表和原子换表（使用模拟连接，不需要真实数据库）
+"""
+
+import os
+import re
+from conftest import FakeServer, create_importer, write_csv
+from database import DatabaseManager
+from table_swap import StagingTable
+
+STRUCTURE = {'id': 'int(11)', 'name': 'varchar(50)', 'age': 'int(11)'}
+OLD_ROWS = [{'id': 1, 'name': 'old', 'age': 1}]
+
+def create_server(referencing=(), **kwargs):
+    """创建有users表（一行旧数据）的模拟服务器，referencing为有外键引用users的表"""
+    server = FakeServer(**kwargs).create_table('users', STRUCTURE, OLD_ROWS)
+    for name in referencing:
+        server.create_table(name, foreign_keys=[(f'fk_{name}_users', 'user_id', 'users', 'id')])
+    return server
+
+def write_users(count):
+    return write_csv('name,age', [f'user{i},{i % 90}' for i in range(count)])
+
+def ddl_statements(server):
+    """执行过的CREATE、RENAME和DROP语句"""
+    return [sql for sql in server.statements if sql.split()[0] in ('CREATE', 'RENAME', 'DROP')]
+
+def test_replace_swaps_atomically_and_keeps_old_copy():
+    """测试数据写入临时表，写入期间目标表不变，提交后一条RENAME换入并保留旧表"""
+    print("=== 测试替换整张表 ===")
+
+    file_path = write_users(3000)
+    try:
+        server = create_server()
+        visible_during_load = []
+        server.on_insert = lambda table_name, rows: visible_during_load.append(list(server.rows('users')))
+        result = create_importer(server).import_excel_to_mysql(
+            'users', file_path, table_structure=STRUCTURE, chunk_size=500, mode='replace')
+        assert result and result.rows_inserted == 3000 and result.backup_table == 'users__old'
+        assert visible_during_load and all(rows == OLD_ROWS for rows in visible_during_load)
+        assert sorted(server.tables) == ['_import_id_sequence', 'users', 'users__old']
+        assert len(server.rows('users')) == 3000 and server.rows('users__old') == OLD_ROWS
+        assert [row['id'] for row in server.rows('users')] == list(range(2, 3002))
+        swap = next(sql for sql in server.statements if sql.startswith('RENAME TABLE `users`'))
+        assert re.fullmatch(r'RENAME TABLE `users` TO `users__ret_\w+`, `users__stg_\w+` TO `users`', swap)
+        assert 'swap' in result.timings
+        print(f"✅ {result.message}，换表语句: {swap}")
+
+        # 再次替换时只保留最近一份旧表
+        server.on_insert = None
+        result = create_importer(server).import_excel_to_mysql(
+            'users', file_path, table_structure=STRUCTURE, chunk_size=500, mode='replace')
+        assert result and sorted(server.tables) == ['_import_id_sequence', 'users', 'users__old']
+        assert len(server.rows('users__old')) == 3000
+        print("✅ 再次替换后旧表为上一次导入的数据")
+
+        server.create_table('users__old', STRUCTURE, OLD_ROWS)
+        assert create_importer(server).restore_previous_table('users')
+        assert server.rows('users') == OLD_ROWS and len(server.rows('users__old')) == 3000
+        print("✅ 已用旧表换回")
+    finally:
+        os.unlink(file_path)
+
+def test_replace_failure_leaves_table_untouched():
+    """测试写入失败、空文件和有外键引用时不替换目标表，临时表被删除"""
+    print("=== 测试替换失败 ===")
+
+    file_path = write_users(3000)
+    empty_path = write_users(0)
+    try:
+        server = create_server(fail_on_batch=1)
+        result = create_importer(server).import_excel_to_mysql(
+            'users', file_path, table_structure=STRUCTURE, chunk_size=500, mode='replace')
+        assert not result and result.backup_table == ''
+        assert sorted(server.tables) == ['_import_id_sequence', 'users'] and server.rows('users') == OLD_ROWS
+        print(f"✅ {result.message}，临时表已删除")
+
+        server = create_server()
+        result = create_importer(server).import_excel_to_mysql(
+            'users', empty_path, table_structure=STRUCTURE, mode='replace')
+        assert not result and '没有数据' in result.message
+        assert sorted(server.tables) == ['users'] and server.rows('users') == OLD_ROWS
+        print(f"✅ {result.message}")
+
+        server = create_server(referencing=['orders'])
+        result = create_importer(server).import_excel_to_mysql(
+            'users', file_path, table_structure=STRUCTURE, mode='replace')
+        assert not result and '外键' in result.message and ddl_statements(server) == []
+        print(f"✅ {result.message}")
+
+        result = create_importer(create_server()).import_excel_to_mysql(
+            'users', file_path, table_structure=STRUCTURE, mode='merge')
+        assert not result and '不支持的导入模式' in result.message
+        print(f"✅ {result.message}")
+    finally:
+        os.unlink(file_path)
+        os.unlink(empty_path)
+
+def test_long_table_names():
+    """测试临时表和旧表名不超过MySQL表名长度限制"""
+    print("=== 测试长表名 ===")
+
+    db_manager = DatabaseManager()
+    staging = StagingTable(db_manager, 't' * 64)
+    assert len(staging.staging_name) == 64 and len(staging.backup_name) == 64
+    assert staging.staging_name != staging.backup_name
+    print(f"✅ {staging.staging_name}")
+
+if __name__ == "__main__":
+    test_replace_swaps_atomically_and_keeps_old_copy()
+    test_replace_failure_leaves_table_untouched()
+    test_long_table_names()
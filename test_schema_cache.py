@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试表结构缓存
+"""
+
+import time
+from conftest import FakeConnection, FakeServer, create_db_manager
+from database import ddl_tables
+from schema_cache import TableStructureCache, table_structure_cache
+
+class FakeTable:
+    """模拟的表，记录查询次数"""
+
+    def __init__(self):
+        self.version = '2024-01-01 00:00:00'
+        self.structure = {'id': 'int', 'name': 'varchar(50)'}
+        self.structure_queries = 0
+        self.version_queries = 0
+
+    def fetch_version(self):
+        self.version_queries += 1
+        return self.version
+
+    def fetch_structure(self):
+        self.structure_queries += 1
+        return dict(self.structure)
+
+def get(cache, table):
+    """通过缓存获取表结构"""
+    return cache.get('test', 'users', table.fetch_version, table.fetch_structure)
+
+def test_cache_hit_and_miss():
+    """测试首次查询未命中，之后命中且不再查询数据库"""
+    print("=== 测试缓存命中 ===")
+    cache = TableStructureCache(ttl=60)
+    table = FakeTable()
+
+    for _ in range(3):
+        assert get(cache, table) == table.structure
+
+    print(f"缓存统计: {cache.stats()}")
+    assert table.structure_queries == 1
+    assert cache.stats()['hits'] == 2 and cache.stats()['misses'] == 1
+    print("✅ 缓存命中正确")
+
+def test_revalidate_after_ttl():
+    """测试过期后版本未变只验证，版本变化时重新查询"""
+    print("=== 测试过期验证 ===")
+    cache = TableStructureCache(ttl=0.01)
+    table = FakeTable()
+    get(cache, table)
+
+    time.sleep(0.02)
+    get(cache, table)
+    assert table.structure_queries == 1
+    assert cache.stats()['revalidations'] == 1
+
+    time.sleep(0.02)
+    table.version = '2024-02-01 00:00:00'
+    table.structure['email'] = 'varchar(100)'
+    assert 'email' in get(cache, table)
+    assert table.structure_queries == 2
+    print(f"缓存统计: {cache.stats()}")
+    print("✅ 过期验证正确")
+
+def test_invalidate():
+    """测试DDL后使缓存失效"""
+    print("=== 测试缓存失效 ===")
+    cache = TableStructureCache(ttl=60)
+    table = FakeTable()
+    get(cache, table)
+    cache.invalidate('test')
+    get(cache, table)
+    assert table.structure_queries == 2
+    assert cache.stats()['invalidations'] == 1
+    print("✅ 缓存失效正确")
+
+def test_table_version_follows_instant_alter():
+    """测试其他连接执行的ALTER（INSTANT时CREATE_TIME不变）改变表的版本信息，缓存过期后重新获取表结构"""
+    print("=== 测试表的版本信息 ===")
+    server = FakeServer().create_table('users', {'id': 'int(11)', 'name': 'varchar(50)'})
+    db_manager = create_db_manager(server)
+    version = db_manager.get_table_version('users')
+    assert version is not None and db_manager.get_table_version('missing') is None
+
+    ttl = table_structure_cache.ttl
+    table_structure_cache.clear()
+    table_structure_cache.ttl = 0.01
+    try:
+        assert 'email' not in db_manager.get_table_structure('users')
+        # 其他进程添加列，本进程的缓存没有失效
+        with FakeConnection(server).cursor() as cursor:
+            cursor.execute("ALTER TABLE `users` ADD COLUMN `email` varchar(100)")
+        added = db_manager.get_table_version('users')
+        assert added != version
+        time.sleep(0.02)
+        assert 'email' in db_manager.get_table_structure('users')
+        with FakeConnection(server).cursor() as cursor:
+            cursor.execute("ALTER TABLE `users` ADD UNIQUE INDEX `uk_email` (`email`)")
+        assert db_manager.get_table_version('users') != added
+    finally:
+        table_structure_cache.ttl = ttl
+    print("✅ 添加列和索引后版本信息变化，缓存过期后重新获取")
+
+def test_ddl_invalidates_only_affected_tables():
+    """测试执行DDL只使涉及的表的缓存失效"""
+    print("=== 测试按表失效 ===")
+    assert ddl_tables("RENAME TABLE `a` TO `a__old`, `b` TO `a`") == [
+        (None, 'a'), (None, 'a__old'), (None, 'b'), (None, 'a')]
+    assert ddl_tables("DROP TABLE IF EXISTS `a`, other.`b`") == [(None, 'a'), ('other', 'b')]
+    assert ddl_tables("CREATE UNIQUE INDEX `uk` ON `a` (`x`)") == [(None, 'a')]
+    assert ddl_tables("CREATE VIEW `v` AS SELECT 1") is None
+
+    server = FakeServer().create_table('users', {'id': 'int(11)'}).create_table('orders', {'id': 'int(11)'})
+    db_manager = create_db_manager(server)
+    ttl = table_structure_cache.ttl
+    table_structure_cache.clear()
+    table_structure_cache.ttl = 60
+    try:
+        db_manager.get_table_structure('users')
+        db_manager.get_table_structure('orders')
+        db_manager.execute_sql("ALTER TABLE `users` ADD COLUMN `email` varchar(100)")
+        assert 'email' in db_manager.get_table_structure('users')
+        db_manager.get_table_structure('orders')
+        stats = table_structure_cache.stats()
+        assert stats['invalidations'] == 1 and stats['misses'] == 3 and stats['hits'] == 1
+    finally:
+        table_structure_cache.ttl = ttl
+    print(f"✅ 只有users的缓存失效: {stats}")
+
+if __name__ == "__main__":
+    test_cache_hit_and_miss()
+    test_revalidate_after_ttl()
+    test_invalidate()
+    test_table_version_follows_instant_alter()
+    test_ddl_invalidates_only_affected_tables()
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试多工作表并行导入
+"""
+
+import os
+import tempfile
+import pandas as pd
+from excel_processor import ExcelProcessor
+from excel_to_mysql import ExcelToMySQL, ImportResult, WorkbookImportResult
+
+SHEETS = ['2024-01', '2024-02', '2024-03']
+
+def create_workbook():
+    """创建每月一个工作表的测试Excel文件"""
+    temp_file = tempfile.NamedTemporaryFile(suffix='.xlsx', delete=False)
+    temp_file.close()
+    with pd.ExcelWriter(temp_file.name) as writer:
+        for month, sheet in enumerate(SHEETS, start=1):
+            df = pd.DataFrame({'name': [f'订单{month}-{i}' for i in range(5)], 'amount': range(5)})
+            df.to_excel(writer, sheet_name=sheet, index=False)
+    return temp_file.name
+
+def test_list_sheet_names():
+    """测试获取所有工作表名称"""
+    print("=== 测试获取工作表名称 ===")
+
+    excel_file = create_workbook()
+    try:
+        assert ExcelProcessor().list_sheet_names(excel_file) == SHEETS
+        print(f"✅ 工作表: {SHEETS}")
+    finally:
+        os.unlink(excel_file)
+
+def test_workbook_result():
+    """测试按工作表汇总导入结果"""
+    print("=== 测试多工作表结果汇总 ===")
+
+    result = WorkbookImportResult()
+    result.add_sheet('a', ImportResult(success=True, table_name='orders', rows_inserted=10))
+    result.add_sheet('b', ImportResult(success=False, table_name='orders', message='插入失败'))
+    result.add_sheet('c', ImportResult(success=True, table_name='orders', rows_inserted=5))
+
+    assert result.rows_inserted == 15
+    assert result.failed_sheets() == ['b']
+    data = result.to_dict()
+    assert list(data['sheets']) == ['a', 'b', 'c']
+    assert data['sheets']['b']['message'] == '插入失败'
+    print("✅ 只统计成功工作表的行数，失败工作表单独列出")
+
+def test_missing_sheet():
+    """测试映射中的工作表不存在时直接失败"""
+    print("=== 测试工作表不存在 ===")
+
+    excel_file = create_workbook()
+    try:
+        result = ExcelToMySQL().import_workbook_sheets(excel_file, sheet_tables={'2025-01': 'orders'})
+        assert not result
+        assert '2025-01' in result.message
+        print(f"✅ {result.message}")
+    finally:
+        os.unlink(excel_file)
+
+def test_parallel_sheets_report_each_result():
+    """测试每个工作表在工作进程中导入，结果按工作簿顺序汇总（数据库不可用时每个工作表都失败）"""
+    print("=== 测试并行导入各工作表 ===")
+
+    excel_file = create_workbook()
+    saved_env = {key: os.environ.get(key) for key in ('DB_HOST', 'DB_PORT')}
+    # 工作进程重新读取配置，指向一个不可用的端口
+    os.environ['DB_HOST'] = '127.0.0.1'
+    os.environ['DB_PORT'] = '1'
+    try:
+        structure = {'id': 'int', 'name': 'varchar(50)', 'amount': 'int'}
+        result = ExcelToMySQL().import_workbook_sheets(
+            excel_file, table_name='orders', table_structure=structure, workers=2
+        )
+        assert not result
+        assert list(result.sheets) == SHEETS
+        assert all(not sheet.success and sheet.table_name == 'orders' for sheet in result.sheets.values())
+        assert 'total' in result.timings
+        print(f"✅ {result.message}")
+    finally:
+        for key, value in saved_env.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+        os.unlink(excel_file)
+
+if __name__ == "__main__":
+    test_list_sheet_names()
+    test_workbook_result()
+    test_missing_sheet()
+    test_parallel_sheets_report_each_result()
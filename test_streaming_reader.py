@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试Excel流式分块读取功能
+"""
+
+import pandas as pd
+import tempfile
+import os
+from excel_processor import ExcelProcessor
+
+def create_test_excel(row_count: int):
+    """创建指定行数的测试Excel文件"""
+    data = {
+        'name': [f'用户{i}' for i in range(row_count)],
+        'age': [20 + i % 30 for i in range(row_count)],
+        'email': [f'user{i}@example.com' if i % 7 else '' for i in range(row_count)]
+    }
+    df = pd.DataFrame(data)
+
+    # 创建临时文件
+    temp_file = tempfile.NamedTemporaryFile(suffix='.xlsx', delete=False)
+    df.to_excel(temp_file.name, index=False)
+    return temp_file.name
+
+def test_read_excel_chunks():
+    """测试分块读取的块大小和内容与整表读取一致"""
+    print("=== 测试流式分块读取 ===")
+
+    excel_file = create_test_excel(25)
+    try:
+        processor = ExcelProcessor()
+        chunks = list(processor.read_excel_chunks(excel_file, chunk_size=10))
+
+        print(f"块大小: {[len(chunk) for chunk in chunks]}")
+        assert [len(chunk) for chunk in chunks] == [10, 10, 5]
+
+        full_df = pd.read_excel(excel_file)
+        streamed_df = pd.concat(chunks, ignore_index=True)
+        assert list(streamed_df.columns) == list(full_df.columns)
+        assert streamed_df['name'].tolist() == full_df['name'].tolist()
+        assert streamed_df['age'].tolist() == full_df['age'].tolist()
+        print("✅ 分块内容与整表读取一致")
+    finally:
+        os.unlink(excel_file)
+
+def test_process_excel_file_chunks():
+    """测试分块处理时自动id在块之间连续"""
+    print("=== 测试分块处理流程 ===")
+
+    excel_file = create_test_excel(25)
+    try:
+        processor = ExcelProcessor()
+        table_structure = {
+            'id': 'int',
+            'name': 'varchar(50)',
+            'age': 'int',
+            'email': 'varchar(100)'
+        }
+
+        ids = []
+        for columns, data_tuples in processor.process_excel_file_chunks(
+                excel_file, table_structure, start_id=101, chunk_size=10):
+            assert columns == ['id', 'name', 'age', 'email']
+            ids.extend(row[0] for row in data_tuples)
+            # 空字符串应被转换为None
+            assert all(row[3] is None or row[3].startswith('user') for row in data_tuples)
+
+        print(f"id范围: {ids[0]} - {ids[-1]}")
+        assert ids == list(range(101, 126))
+        print("✅ 自动id在块之间连续编号")
+    finally:
+        os.unlink(excel_file)
+
+if __name__ == "__main__":
+    test_read_excel_chunks()
+    test_process_excel_file_chunks()
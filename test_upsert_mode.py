@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试upsert模式（使用模拟连接，不需要真实数据库）
+"""
+
+import os
+from pymysql.cursors import RE_INSERT_VALUES
+from conftest import FakeServer, create_db_manager, create_importer, write_csv
+from schema_cache import table_key_cache
+
+INDEXES = {
+    'PRIMARY': [('code', True, 'BTREE', None, 'A')],
+    'uk_email': [('email', True, 'BTREE', None, 'A')],
+    'idx_age': [('age', False, 'BTREE', None, 'A')],
+}
+
+def create_server(indexes=INDEXES):
+    """创建users表按email唯一、已有一行的模拟服务器"""
+    return FakeServer().create_table('users', indexes=indexes, rows=[
+        {'email': 'u0@example.com', 'name': 'old', 'age': 1, 'code': 'A0'}
+    ])
+
+def find_user(server, email):
+    return next(row for row in server.rows('users') if row['email'] == email)
+
+def statistics_queries(server):
+    """查询索引的次数"""
+    return server.count('SELECT INDEX_NAME, NON_UNIQUE')
+
+STRUCTURE = {'email': 'varchar(100)', 'name': 'varchar(50)', 'age': 'int(11)'}
+
+def test_upsert_sql_and_key_cache():
+    """测试生成的语句能被pymysql合并为多行INSERT，唯一键查询结果被缓存，DDL后失效"""
+    print("=== 测试upsert语句和键缓存 ===")
+
+    table_key_cache.clear()
+    server = create_server()
+    db_manager = create_db_manager(server)
+    sql = db_manager.build_upsert_sql('users', ['email', 'name', 'age'], ['name', 'age'])
+    assert sql.endswith("ON DUPLICATE KEY UPDATE `name` = VALUES(`name`), `age` = VALUES(`age`)")
+    assert RE_INSERT_VALUES.match(sql)
+    print(f"✅ {sql}")
+
+    sql = db_manager.build_upsert_sql('users', ['id', 'email'], [])
+    assert sql.endswith("ON DUPLICATE KEY UPDATE `id` = `id`") and RE_INSERT_VALUES.match(sql)
+    print("✅ 没有要更新的列时冲突的行保持不变")
+
+    assert db_manager.get_unique_keys('users') == {'PRIMARY': ['code'], 'uk_email': ['email']}
+    assert db_manager.default_update_columns('users', ['email', 'name', 'age']) == ['name', 'age']
+    assert statistics_queries(server) == 1
+    db_manager.execute_sql("ALTER TABLE `users` ADD UNIQUE INDEX `uk_name` (`name`)")
+    db_manager.get_unique_keys('users')
+    assert statistics_queries(server) == 2
+    print("✅ 唯一键已缓存，DDL后重新查询")
+
+def test_import_upsert():
+    """测试导入时已存在的行按唯一索引更新，新行插入，默认不更新键列"""
+    print("=== 测试upsert导入 ===")
+
+    file_path = write_csv('email,name,age', [f'u{i}@example.com,user{i},{i}' for i in range(3)])
+    try:
+        table_key_cache.clear()
+        server = create_server()
+        result = create_importer(server).import_excel_to_mysql(
+            'users', file_path, table_structure=STRUCTURE, mode='upsert')
+        assert result and result.upsert_keys == ['uk_email']
+        assert find_user(server, 'u0@example.com') == {'email': 'u0@example.com', 'name': 'user0', 'age': 0, 'code': 'A0'}
+        assert len(server.rows('users')) == 3
+        print(f"✅ {result.message}")
+
+        server = create_server()
+        result = create_importer(server).import_excel_to_mysql(
+            'users', file_path, table_structure=STRUCTURE, mode='upsert', update_columns=['age'])
+        assert result and find_user(server, 'u0@example.com')['name'] == 'old'
+        assert find_user(server, 'u0@example.com')['age'] == 0
+        print("✅ 只更新指定的列")
+
+        server = create_server()
+        result = create_importer(server).import_excel_to_mysql(
+            'users', file_path, table_structure=STRUCTURE, mode='append')
+        assert not result and find_user(server, 'u0@example.com')['name'] == 'old'
+        print(f"✅ append模式遇到重复键失败: {result.message}")
+    finally:
+        os.unlink(file_path)
+
+def test_upsert_rejected():
+    """测试表没有唯一键、文件缺少键列或更新列不存在时拒绝导入"""
+    print("=== 测试upsert前置检查 ===")
+
+    file_path = write_csv('name,age', ['user0,1'])
+    keyed_path = write_csv('email,name,age', ['u0@example.com,user0,1'])
+    try:
+        table_key_cache.clear()
+        structure = {'name': 'varchar(50)', 'age': 'int(11)'}
+        result = create_importer(create_server()).import_excel_to_mysql(
+            'users', file_path, table_structure=structure, mode='upsert')
+        assert not result and '无法匹配已有的行' in result.message
+        print(f"✅ {result.message}")
+
+        table_key_cache.clear()
+        server = create_server(indexes={'idx_age': INDEXES['idx_age']})
+        result = create_importer(server).import_excel_to_mysql(
+            'users', keyed_path, table_structure=STRUCTURE, mode='upsert')
+        assert not result and '没有主键或唯一索引' in result.message and server.batches == 0
+        print(f"✅ {result.message}")
+
+        table_key_cache.clear()
+        result = create_importer(create_server()).import_excel_to_mysql(
+            'users', keyed_path, table_structure=STRUCTURE, mode='upsert', update_columns=['salary'])
+        assert not result and '要更新的列不在文件中' in result.message
+        print(f"✅ {result.message}")
+    finally:
+        os.unlink(file_path)
+        os.unlink(keyed_path)
+
+if __name__ == "__main__":
+    test_upsert_sql_and_key_cache()
+    test_import_upsert()
+    test_upsert_rejected()
@@ -11,7 +11,7 @@ from pydantic import BaseModel, Field
 class ImportExcelTool(BaseModel):
     """导入Excel到MySQL工具"""
     name: str = "import_excel_to_mysql"
-    description: str = "将Excel文件导入MySQL数据库"
+    description: str = "将Excel文件导入MySQL数据库，也支持CSV、TSV、JSONL和Parquet文件"
     parameters: Dict[str, Any] = {
         "type": "object",
         "properties": {
@@ -21,12 +21,35 @@ class ImportExcelTool(BaseModel):
             },
             "excel_url": {
                 "type": "string",
-                "description": "Excel文件的URL地址"
+                "description": "Excel文件的URL地址（按扩展名识别格式，也支持.csv、.tsv、.jsonl、.parquet）"
             },
             "sheet_name": {
                 "type": "string",
                 "description": "工作表名称（可选）"
             },
+            "engine": {
+                "type": "string",
+                "description": "Excel读取引擎（可选），auto按文件类型和大小自动选择",
+                "enum": ["auto", "openpyxl", "calamine", "xlrd", "pyxlsb"],
+                "default": "auto"
+            },
+            "mode": {
+                "type": "string",
+                "description": "导入模式（可选），append追加数据，replace用文件数据原子地替换整张表并保留旧表，"
+                               "upsert按主键或唯一索引插入或更新，delta只插入或更新与上次导入相比新增和有变化的行",
+                "enum": ["append", "replace", "upsert", "delta"],
+                "default": "append"
+            },
+            "update_columns": {
+                "type": "array",
+                "items": {"type": "string"},
+                "description": "upsert和delta模式下键冲突时更新的列（可选），默认更新不属于任何键的列"
+            },
+            "force": {
+                "type": "boolean",
+                "description": "忽略导入记录，即使相同的文件已经以相同选项导入过也重新导入",
+                "default": False
+            },
             "verbose": {
                 "type": "boolean",
                 "description": "是否显示详细日志",
@@ -36,6 +59,30 @@ class ImportExcelTool(BaseModel):
         "required": ["table_name", "excel_url"]
     }
 
+class ImportExcelSheetsTool(BaseModel):
+    """并行导入Excel多个工作表工具"""
+    name: str = "import_excel_sheets_to_mysql"
+    description: str = "将Excel文件的多个工作表并行导入MySQL数据库"
+    parameters: Dict[str, Any] = {
+        "type": "object",
+        "properties": {
+            "excel_url": {
+                "type": "string",
+                "description": "Excel文件的URL地址"
+            },
+            "table_name": {
+                "type": "string",
+                "description": "所有工作表导入的目标表名（与sheet_tables二选一）"
+            },
+            "sheet_tables": {
+                "type": "object",
+                "description": "工作表名到目标表名的映射，只导入其中的工作表（可选）",
+                "additionalProperties": {"type": "string"}
+            }
+        },
+        "required": ["excel_url"]
+    }
+
 class GetTableStructureTool(BaseModel):
     """获取表结构工具"""
     name: str = "get_table_structure"
@@ -64,6 +111,7 @@ class TestDatabaseConnectionTool(BaseModel):
 # 工具列表
 TOOLS = [
     ImportExcelTool(),
+    ImportExcelSheetsTool(),
     GetTableStructureTool(),
     TestDatabaseConnectionTool()
 ]